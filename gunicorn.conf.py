@@ -0,0 +1,61 @@
+"""
+Gunicorn configuration used by the Procfile.
+
+The app is preloaded and warmed up in the master process before the port is
+bound so that traffic only reaches warm workers, which inherit the compiled
+templates and filled caches when forked. If VERBA_CACHE_SNAPSHOT_PATH is set,
+workers save their GitHub caches there so that they are reloaded on restart.
+
+Verba spends most of a request waiting on GitHub so each worker serves
+several requests at once with threads.
+"""
+import os
+
+
+preload_app = True
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+
+def on_starting(server):
+    from warmup.utils import warm_up
+    warm_up()
+
+
+def post_fork(server, worker):
+    # connections opened by the master must not be shared with the workers
+    from github.api import reset_connections
+    reset_connections()
+
+
+def post_worker_init(worker):
+    # runs before the worker accepts any request
+    from django.conf import settings
+    from warmup.utils import open_connections
+    from verba_settings import config
+
+    token = getattr(settings, 'VERBA_GITHUB_TOKEN', None)
+    if token:
+        try:
+            open_connections(token)
+        except Exception:
+            worker.log.exception('Could not open connections to GitHub')
+
+        # threads don't survive forking so each worker starts a poller,
+        # only one polls at a time and shares what it sees with the other
+        # workers, another one takes over if its worker exits
+        if config.EVENTS.POLL:
+            from revision.events import start_polling
+            start_polling(token)
+
+    if config.CACHE_SNAPSHOT.PATH:
+        from github.snapshot import start_snapshots
+        start_snapshots()
+
+
+def worker_exit(server, worker):
+    # restarts and deploys stop the workers gracefully, keep what they cached since the last snapshot
+    from github.snapshot import stop_snapshots
+    stop_snapshots()
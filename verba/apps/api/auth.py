@@ -0,0 +1,55 @@
+import hashlib
+
+from django.core.cache import cache
+
+from github import User as GitHubUser
+from github.auth import get_shared_read_token
+from github.exceptions import GitHubException
+
+from auth.models import VerbaUser, VerbaAnonymousUser
+
+from verba_settings import config
+
+
+def get_token_user(token):
+    """
+    Returns the VerbaUser of the GitHub `token` sent by a script in the
+    `Authorization: token <token>` header or None if GitHub doesn't accept it.
+
+    The user is cached for API.TOKEN_CACHE_TIMEOUT seconds by hash of the
+    token so that scripts don't cost a request to GitHub each call.
+    """
+    cache_key = 'api-user:{}'.format(hashlib.sha256(token.encode('utf-8')).hexdigest())
+    user_data = cache.get(cache_key)
+    if user_data is None:
+        try:
+            github_user = GitHubUser.get_logged_in(token)
+        except GitHubException:
+            return None
+
+        user_data = {
+            'login': github_user.username,
+            'name': github_user.name,
+            'email': github_user.email,
+            'avatar_url': github_user.avatar_url
+        }
+        cache.set(cache_key, user_data, timeout=config.API.TOKEN_CACHE_TIMEOUT)
+
+    user_data = dict(user_data)
+    return VerbaUser(pk=user_data.pop('login'), token=get_shared_read_token(token), user_data=user_data)
+
+
+def authenticate(request):
+    """
+    Sets `request.user` from the Authorization header if there is one,
+    logged-in users otherwise stay authenticated by their session.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not header:
+        return
+
+    scheme, _, token = header.partition(' ')
+    user = None
+    if scheme.lower() == 'token' and token.strip():
+        user = get_token_user(token.strip())
+    request.user = user or VerbaAnonymousUser()
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+from django.core.urlresolvers import reverse
+
+
+# field name => function returning its value for an object.
+# Only the fields asked for are computed so that, for example, the files of a
+# revision aren't fetched unless their URLs are needed.
+
+# works with both Revision and the RevisionSummary of the revision index
+REVISION_FIELDS = OrderedDict([
+    ('id', lambda revision: revision.id),
+    ('title', lambda revision: revision.title),
+    ('creator', lambda revision: revision.creator),
+    ('statuses', lambda revision: revision.statuses),
+    ('assignees', lambda revision: revision.assignees),
+    ('updated_at', lambda revision: revision.updated_at),
+    ('head_sha', lambda revision: revision.head_sha),
+    ('url', lambda revision: reverse('api:revision', kwargs={'revision_id': revision.id})),
+])
+
+REVISION_DETAIL_FIELDS = OrderedDict(REVISION_FIELDS)
+REVISION_DETAIL_FIELDS.update([
+    ('branch_name', lambda revision: revision.branch_name),
+    ('base_sha', lambda revision: revision.base_sha),
+    ('tot_comments', lambda revision: revision.tot_comments),
+    ('files_url', lambda revision: reverse('api:files', kwargs={'revision_id': revision.id})),
+    ('activities_url', lambda revision: reverse('api:activities', kwargs={'revision_id': revision.id})),
+])
+
+FILE_FIELDS = OrderedDict([
+    ('path', lambda revision_file: revision_file.path),
+    ('url', lambda revision_file: reverse(
+        'api:content', kwargs={'revision_id': revision_file.revision.id, 'file_path': revision_file.path}
+    )),
+])
+
+CONTENT_FIELDS = OrderedDict([
+    ('path', lambda revision_file: revision_file.path),
+    ('items', lambda revision_file: revision_file.get_content_items()),
+])
+
+ACTIVITY_FIELDS = OrderedDict([
+    ('description', lambda activity: activity.description),
+    ('body', lambda activity: getattr(activity, 'body', None)),
+    ('created_at', lambda activity: activity.created_at),
+    ('created_by', lambda activity: activity.created_by),
+])
+
+
+def serialize(obj, fields, names):
+    """
+    Returns the dict of the values of the fields `names` of `obj`, `fields`
+    being one of the *_FIELDS dicts.
+    """
+    return {
+        name: fields[name](obj)
+        for name in names
+    }
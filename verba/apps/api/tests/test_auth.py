@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, RequestFactory
+
+from github.exceptions import InvalidResponseException
+
+from api.auth import get_token_user, authenticate
+
+
+@mock.patch('api.auth.GitHubUser')
+class GetTokenUserTestCase(SimpleTestCase):
+    def setUp(self):
+        super(GetTokenUserTestCase, self).setUp()
+        cache.clear()
+
+    def test_valid_token(self, MockedGitHubUser):  # noqa
+        github_user = mock.MagicMock(
+            username='test-owner', email='example@email.com', avatar_url='https://example.com'
+        )
+        github_user.name = 'Test Owner'
+        MockedGitHubUser.get_logged_in.return_value = github_user
+
+        user = get_token_user('123456')
+        self.assertEqual(user.pk, 'test-owner')
+        self.assertEqual(user.token, '123456')
+        self.assertEqual(user.name, 'Test Owner')
+
+        # cached
+        get_token_user('123456')
+        self.assertEqual(MockedGitHubUser.get_logged_in.call_count, 1)
+
+    def test_invalid_token(self, MockedGitHubUser):  # noqa
+        MockedGitHubUser.get_logged_in.side_effect = InvalidResponseException('Bad credentials')
+
+        self.assertIsNone(get_token_user('123456'))
+
+
+@mock.patch('api.auth.get_token_user')
+class AuthenticateTestCase(SimpleTestCase):
+    def setUp(self):
+        super(AuthenticateTestCase, self).setUp()
+        self.request = RequestFactory().get('/')
+        self.request.user = mock.MagicMock(pk='session-user')
+
+    def test_no_header(self, mocked_get_token_user):
+        authenticate(self.request)
+
+        self.assertEqual(self.request.user.pk, 'session-user')
+        self.assertFalse(mocked_get_token_user.called)
+
+    def test_token(self, mocked_get_token_user):
+        self.request.META['HTTP_AUTHORIZATION'] = 'token 123456'
+
+        authenticate(self.request)
+
+        self.assertEqual(self.request.user, mocked_get_token_user.return_value)
+        mocked_get_token_user.assert_called_with('123456')
+
+    def test_invalid_token(self, mocked_get_token_user):
+        mocked_get_token_user.return_value = None
+        self.request.META['HTTP_AUTHORIZATION'] = 'token 123456'
+
+        authenticate(self.request)
+
+        self.assertFalse(self.request.user.is_authenticated())
+
+    def test_other_scheme(self, mocked_get_token_user):
+        self.request.META['HTTP_AUTHORIZATION'] = 'Basic dXNlcjpwYXNz'
+
+        authenticate(self.request)
+
+        self.assertFalse(self.request.user.is_authenticated())
+        self.assertFalse(mocked_get_token_user.called)
@@ -0,0 +1,231 @@
+import datetime
+from unittest import mock
+
+from django.core.urlresolvers import reverse
+
+from auth.tests.test_base import AuthTestCase
+from auth.models import VerbaUser
+
+from revision.index import RevisionSummary, RevisionPage
+from revision.exceptions import RevisionNotFoundException, InvalidCursorException
+
+
+class BaseAPITestCase(AuthTestCase):
+    def get_mocked_revision(self, assignees=None):
+        revision = mock.MagicMock(
+            id=1,
+            title='Stomach ache',
+            creator='test-owner',
+            statuses=['draft'],
+            assignees=assignees or ['test-owner'],
+            updated_at=datetime.datetime(2016, 8, 6, 10, 5, 12),
+            head_sha='head-sha',
+            base_sha='base-sha',
+            branch_name='content|stomach-ac|test-owner|abcdef',
+            tot_comments=1
+        )
+        return revision
+
+
+@mock.patch('api.views.revision_index')
+class RevisionListTestCase(BaseAPITestCase):
+    def setUp(self):
+        super(RevisionListTestCase, self).setUp()
+        self.url = reverse('api:revisions')
+        self.revision = RevisionSummary(
+            id=1, title='Stomach ache', creator='test-owner', statuses=['draft'], assignees=['test-owner'],
+            updated_at=datetime.datetime(2016, 8, 6, 10, 5, 12), head_sha='abc'
+        )
+
+    def test_not_authenticated(self, mocked_revision_index):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'error': 'Authentication required'})
+
+    def test_get(self, mocked_revision_index):
+        mocked_revision_index.query.return_value = RevisionPage(revisions=[self.revision], next_cursor='next-cursor')
+
+        self.login()
+
+        response = self.client.get(self.url, {'status': 'draft', 'page_size': '1'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['results'], [{
+            'id': 1,
+            'title': 'Stomach ache',
+            'creator': 'test-owner',
+            'statuses': ['draft'],
+            'assignees': ['test-owner'],
+            'updated_at': '2016-08-06T10:05:12',
+            'head_sha': 'abc',
+            'url': reverse('api:revision', kwargs={'revision_id': 1}),
+        }])
+        self.assertEqual(data['next_cursor'], 'next-cursor')
+        self.assertIn('cursor=next-cursor', data['next'])
+        self.assertEqual(mocked_revision_index.query.call_args[1]['status'], 'draft')
+        self.assertEqual(mocked_revision_index.query.call_args[1]['page_size'], 1)
+
+    def test_fields(self, mocked_revision_index):
+        mocked_revision_index.query.return_value = RevisionPage(revisions=[self.revision], next_cursor=None)
+
+        self.login()
+
+        response = self.client.get(self.url, {'fields': 'id,title'})
+        self.assertEqual(response.json()['results'], [{'id': 1, 'title': 'Stomach ache'}])
+
+        response = self.client.get(self.url, {'fields': 'id,unknown'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Unknown fields: unknown'})
+
+    def test_invalid_cursor(self, mocked_revision_index):
+        mocked_revision_index.query.side_effect = InvalidCursorException('Invalid cursor')
+
+        self.login()
+
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_modified(self, mocked_revision_index):
+        mocked_revision_index.query.return_value = RevisionPage(revisions=[self.revision], next_cursor=None)
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_gzip(self, mocked_revision_index):
+        mocked_revision_index.query.return_value = RevisionPage(revisions=[self.revision] * 10, next_cursor=None)
+
+        self.login()
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_gzip_not_modified(self, mocked_revision_index):
+        mocked_revision_index.query.return_value = RevisionPage(revisions=[self.revision] * 10, next_cursor=None)
+
+        self.login()
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    @mock.patch('api.auth.get_token_user')
+    def test_token(self, mocked_get_token_user, mocked_revision_index):
+        mocked_get_token_user.return_value = VerbaUser(pk='test-owner', token='654321')
+        mocked_revision_index.query.return_value = RevisionPage(revisions=[], next_cursor=None)
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='token 654321')
+        self.assertEqual(response.status_code, 200)
+        mocked_revision_index.update.assert_called_with('654321')
+
+
+@mock.patch('revision.views.RevisionManager')
+class RevisionDetailTestCase(BaseAPITestCase):
+    def setUp(self):
+        super(RevisionDetailTestCase, self).setUp()
+        self.url = reverse('api:revision', kwargs={'revision_id': 1})
+
+    def test_get(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get.return_value = self.get_mocked_revision()
+
+        self.login()
+
+        response = self.client.get(self.url, {'fields': 'id,branch_name,files_url'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'id': 1,
+            'branch_name': 'content|stomach-ac|test-owner|abcdef',
+            'files_url': reverse('api:files', kwargs={'revision_id': 1}),
+        })
+
+    def test_not_found(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get.side_effect = RevisionNotFoundException('Not found')
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_non_assignees_not_allowed(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get.return_value = self.get_mocked_revision(assignees=['somebody-else'])
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+
+@mock.patch('revision.views.RevisionManager')
+class FileListTestCase(BaseAPITestCase):
+    def setUp(self):
+        super(FileListTestCase, self).setUp()
+        self.url = reverse('api:files', kwargs={'revision_id': 1})
+
+    def test_paginated(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        revision.get_files.return_value = [
+            mock.MagicMock(path=path, revision=revision)
+            for path in ['page3', 'page1', 'page2']
+        ]
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+
+        response = self.client.get(self.url, {'page_size': 2, 'fields': 'path'})
+        data = response.json()
+        self.assertEqual(data['results'], [{'path': 'page1'}, {'path': 'page2'}])
+
+        response = self.client.get(self.url, {'page_size': 2, 'fields': 'path', 'cursor': data['next_cursor']})
+        data = response.json()
+        self.assertEqual(data['results'], [{'path': 'page3'}])
+        self.assertIsNone(data['next_cursor'])
+
+
+@mock.patch('revision.views.RevisionManager')
+class FileContentTestCase(BaseAPITestCase):
+    def test_get(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        revision.get_file().path = 'page1'
+        revision.get_file().get_content_items.return_value = {'title': 'Page 1', 'content': 'included content'}
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+
+        response = self.client.get(reverse('api:content', kwargs={'revision_id': 1, 'file_path': 'page1'}))
+        self.assertEqual(response.json(), {
+            'path': 'page1',
+            'items': {'title': 'Page 1', 'content': 'included content'}
+        })
+        revision.get_file.assert_called_with('page1')
+
+
+@mock.patch('revision.views.RevisionManager')
+class ActivityListTestCase(BaseAPITestCase):
+    def test_get(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        revision.activities = [
+            mock.MagicMock(
+                spec=['description', 'created_at', 'created_by'],
+                description='created this revision', created_at=datetime.datetime(2016, 8, 6), created_by='test-owner'
+            ),
+            mock.MagicMock(
+                description='commented', body='Looks good', created_at=datetime.datetime(2016, 8, 7),
+                created_by='test-developer'
+            ),
+        ]
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+
+        response = self.client.get(reverse('api:activities', kwargs={'revision_id': 1}), {'fields': 'body,created_by'})
+        self.assertEqual(response.json()['results'], [
+            {'body': None, 'created_by': 'test-owner'},
+            {'body': 'Looks good', 'created_by': 'test-developer'},
+        ])
@@ -0,0 +1,31 @@
+from django.conf.urls import url
+
+from . import views
+
+urlpatterns = [
+    url(
+        r'^revisions/$',
+        views.RevisionList.as_view(),
+        name='revisions'
+    ),
+    url(
+        r'^revisions/(?P<revision_id>\d+)/$',
+        views.RevisionDetail.as_view(),
+        name='revision'
+    ),
+    url(
+        r'^revisions/(?P<revision_id>\d+)/files/$',
+        views.FileList.as_view(),
+        name='files'
+    ),
+    url(
+        r'^revisions/(?P<revision_id>\d+)/files/(?P<file_path>.+)/$',
+        views.FileContent.as_view(),
+        name='content'
+    ),
+    url(
+        r'^revisions/(?P<revision_id>\d+)/activities/$',
+        views.ActivityList.as_view(),
+        name='activities'
+    ),
+]
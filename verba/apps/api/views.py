@@ -0,0 +1,188 @@
+import json
+import hashlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.generic import View
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from github.exceptions import NotFoundException
+
+from revision.views import RevisionMixin, RevisionDetailMixin
+from revision.forms import RevisionFilterForm
+from revision.index import revision_index
+from revision.utils import encode_cursor, decode_cursor
+from revision.exceptions import InvalidCursorException
+
+from verba_settings import config
+
+from .auth import authenticate
+from .serializers import serialize, REVISION_FIELDS, REVISION_DETAIL_FIELDS, FILE_FIELDS, CONTENT_FIELDS, \
+    ACTIVITY_FIELDS
+
+
+class APIException(Exception):
+    def __init__(self, message, status=400):
+        super(APIException, self).__init__(message)
+        self.status = status
+
+
+def paginate(items, cursor, page_size):
+    """
+    Returns a tuple of (the page of `items` starting at `cursor`, cursor of
+    the next page or None).
+
+    For short lists that are read in full anyway, the cursor is the offset.
+    """
+    offset = 0
+    if cursor:
+        offset, = decode_cursor(cursor, length=1)
+        if not isinstance(offset, int) or offset < 0:
+            raise InvalidCursorException("Invalid cursor '{}'".format(cursor))
+
+    next_cursor = None
+    if len(items) > offset + page_size:
+        next_cursor = encode_cursor([offset + page_size])
+    return items[offset:offset + page_size], next_cursor
+
+
+class APIView(RevisionMixin, View):
+    """
+    Base of the read-only JSON API views.
+
+    Users are authenticated by their session or, for scripts, by a GitHub
+    token in the `Authorization: token <token>` header. Responses have an
+    ETag of their content and only the fields in the `fields` GET param,
+    comma-separated, are returned if given.
+    """
+    http_method_names = ['get', 'head']
+    fields = None  # one of the *_FIELDS dicts of the serializers
+
+    def get_field_names(self):
+        param = self.request.GET.get('fields', '')
+        if not param:
+            return list(self.fields)
+
+        names = [name.strip() for name in param.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise APIException("Unknown fields: {}".format(', '.join(unknown)))
+        return names
+
+    def serialize(self, obj):
+        if not hasattr(self, '_field_names'):
+            self._field_names = self.get_field_names()
+        return serialize(obj, self.fields, self._field_names)
+
+    def get_page_size(self):
+        try:
+            page_size = int(self.request.GET.get('page_size', config.API.PAGE_SIZE))
+        except ValueError:
+            raise APIException('Invalid page_size')
+        return max(1, min(page_size, config.API.MAX_PAGE_SIZE))
+
+    def get_page_data(self, objs, next_cursor):
+        next_url = None
+        if next_cursor:
+            params = self.request.GET.copy()
+            params['cursor'] = next_cursor
+            next_url = '{}?{}'.format(self.request.path, params.urlencode())
+
+        return {
+            'results': [self.serialize(obj) for obj in objs],
+            'next_cursor': next_cursor,
+            'next': next_url,
+        }
+
+    def get_data(self):
+        raise NotImplementedError()
+
+    def error_response(self, message, status):
+        return JsonResponse({'error': message}, status=status)
+
+    def dispatch(self, request, *args, **kwargs):
+        authenticate(request)
+        if not request.user.is_authenticated():
+            return self.error_response('Authentication required', 401)
+
+        try:
+            return super(APIView, self).dispatch(request, *args, **kwargs)
+        except APIException as e:
+            return self.error_response(str(e), e.status)
+        except InvalidCursorException as e:
+            return self.error_response(str(e), 400)
+        except (Http404, NotFoundException) as e:
+            return self.error_response(str(e) or 'Not found', 404)
+
+    def get(self, request, *args, **kwargs):
+        content = json.dumps(self.get_data(), cls=DjangoJSONEncoder, sort_keys=True)
+        etag = hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type='application/json')
+
+        response['ETag'] = quote_etag(etag)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Cookie', 'Authorization'))
+        return response
+
+
+class RevisionList(APIView):
+    """
+    The open revisions from the revision index, filtered and sorted like the
+    revision list page.
+    """
+    fields = REVISION_FIELDS
+
+    def get_data(self):
+        form = RevisionFilterForm(data=self.request.GET)
+        if not form.is_valid():
+            raise APIException(form.errors.as_text())
+
+        revision_index.update(self.request.user.token)
+        page = revision_index.query(page_size=self.get_page_size(), **form.get_filters())
+        return self.get_page_data(page.revisions, page.next_cursor)
+
+
+class APIRevisionDetailMixin(RevisionDetailMixin):
+    def get_revision(self):
+        revision = super(APIRevisionDetailMixin, self).get_revision()
+        # same as in the revision pages
+        if self.request.user.pk not in revision.assignees:
+            raise APIException("The revision is not assigned to you", status=403)
+        return revision
+
+
+class RevisionDetail(APIRevisionDetailMixin, APIView):
+    fields = REVISION_DETAIL_FIELDS
+
+    def get_data(self):
+        return self.serialize(self.get_revision())
+
+
+class FileList(APIRevisionDetailMixin, APIView):
+    fields = FILE_FIELDS
+
+    def get_data(self):
+        revision_files = sorted(self.get_revision().get_files(), key=lambda revision_file: revision_file.path)
+        return self.get_page_data(*paginate(revision_files, self.request.GET.get('cursor'), self.get_page_size()))
+
+
+class FileContent(APIRevisionDetailMixin, APIView):
+    """
+    The content items of a file with the included files resolved.
+    """
+    fields = CONTENT_FIELDS
+
+    def get_data(self):
+        return self.serialize(self.get_revision().get_file(self.kwargs['file_path']))
+
+
+class ActivityList(APIRevisionDetailMixin, APIView):
+    fields = ACTIVITY_FIELDS
+
+    def get_data(self):
+        activities = self.get_revision().activities
+        return self.get_page_data(*paginate(activities, self.request.GET.get('cursor'), self.get_page_size()))
@@ -1,5 +1,5 @@
 from github import User as GitHubUser
-from github.auth import get_token
+from github.auth import get_token, get_shared_read_token
 from github.exceptions import AuthValidationError
 
 from . import get_user_model
@@ -34,4 +34,5 @@ class VerbaBackend(object):
 
     def get_user(self, pk, token, user_data={}):
         UserModel = get_user_model()  # noqa
-        return UserModel(pk, token, user_data=user_data)
+        # repo reads go through the service token if there is one
+        return UserModel(pk, get_shared_read_token(token), user_data=user_data)
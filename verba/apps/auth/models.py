@@ -1,5 +1,11 @@
 from django.utils.crypto import salted_hmac
 
+from github.cache import LRUCache
+
+
+# token => session auth hash so that it's only computed once per worker
+session_auth_hashes = LRUCache(max_entries=1000)
+
 
 class VerbaUser(object):
     """
@@ -38,8 +44,13 @@ class VerbaUser(object):
         """
         Return an HMAC of the token field.
         """
-        key_salt = "auth.models.VerbaUser.get_session_auth_hash"
-        return salted_hmac(key_salt, self.token).hexdigest()
+        token = str(self.token)
+        session_auth_hash = session_auth_hashes.get(token)
+        if session_auth_hash is None:
+            key_salt = "auth.models.VerbaUser.get_session_auth_hash"
+            session_auth_hash = salted_hmac(key_salt, token).hexdigest()
+            session_auth_hashes.set(token, session_auth_hash)
+        return session_auth_hash
 
 
 class VerbaAnonymousUser(object):
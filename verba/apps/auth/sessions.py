@@ -0,0 +1,142 @@
+import os
+import time
+import logging
+import datetime
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.sessions.backends.file import SessionStore as FileSessionStore
+from django.core.exceptions import SuspiciousOperation
+from django.utils import timezone
+
+from github.cache import LRUCache
+
+
+logger = logging.getLogger('auth.sessions')
+
+# seconds between two removals of the expired session files by a worker
+CLEAR_EXPIRED_INTERVAL = 60 * 60
+
+# session key => (version of the session file, expiry timestamp, serialized session data).
+# Sessions are shared by the workers through their files, the version
+# (inode, mtime, size) tells if another worker has changed the file since.
+# The data is kept serialized but not signed, deserializing it is cheap and
+# gives every request its own copy to change.
+session_cache = LRUCache(max_entries=1000)
+
+_cleared_at = 0
+_cleared_at_lock = threading.Lock()
+
+
+def get_default_storage_path():
+    """
+    Returns the folder of the session files: in shared memory if available,
+    so that reading them doesn't touch the disk, the temp folder otherwise.
+    """
+    base_path = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base_path, 'verba-sessions')
+
+
+class SessionStore(FileSessionStore):
+    """
+    Sessions kept in files on the server so that the cookie is only the
+    session key instead of the signed session data.
+
+    Each worker keeps the sessions it has read in memory and only checks
+    that their files haven't changed, so that a request doesn't read and
+    verify the session file again.
+
+    The files of expired sessions are removed in the background when new
+    sessions are created, at most every CLEAR_EXPIRED_INTERVAL seconds.
+    """
+    @classmethod
+    def _get_storage_path(cls):
+        try:
+            return cls._storage_path
+        except AttributeError:
+            storage_path = getattr(settings, 'SESSION_FILE_PATH', None) or get_default_storage_path()
+            os.makedirs(storage_path, mode=0o700, exist_ok=True)
+            cls._storage_path = storage_path
+            return storage_path
+
+    def _get_version(self):
+        try:
+            stat = os.stat(self._key_to_file())
+        except (OSError, SuspiciousOperation):
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _get_expiry_time(self, version, session_data):
+        """
+        Returns the timestamp the session expires at.
+        """
+        expiry = session_data.get('_session_expiry')
+        if not expiry:
+            modification = datetime.datetime.fromtimestamp(version[1] / 1e9, tz=timezone.utc)
+            expiry = modification + datetime.timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        return time.time() + self.get_expiry_age(expiry=expiry)
+
+    def load(self):
+        version = self._get_version() if self.session_key else None
+        if version:
+            cached = session_cache.get(self.session_key)
+            if cached and cached[0] == version and cached[1] > time.time():
+                return self.serializer().loads(cached[2])
+
+        # if the file changes while being read the newer data is cached with
+        # the older version and simply read again by the next request
+        session_data = super(SessionStore, self).load()
+        if version and session_data and self.session_key:
+            session_cache.set(self.session_key, (
+                version, self._get_expiry_time(version, session_data), self.serializer().dumps(session_data)
+            ))
+        return session_data
+
+    def delete(self, session_key=None):
+        session_cache.delete(session_key or self.session_key)
+        super(SessionStore, self).delete(session_key=session_key)
+
+    def create(self):
+        super(SessionStore, self).create()
+        self.clear_expired_periodically()
+
+    @classmethod
+    def clear_expired(cls):
+        """
+        Removes the files of the expired sessions, the ones never used again
+        would otherwise be kept forever. They are read without going through
+        the cache of this worker.
+        """
+        storage_path = cls._get_storage_path()
+        file_prefix = settings.SESSION_COOKIE_NAME
+        for session_file in os.listdir(storage_path):
+            if not session_file.startswith(file_prefix):
+                continue
+            session = cls(session_file[len(file_prefix):])
+            # loading an expired session removes its file and creates a new one
+            session.create = lambda: None
+            super(SessionStore, session).load()
+
+    @classmethod
+    def clear_expired_periodically(cls):
+        """
+        Starts removing the expired session files in the background unless
+        already done in the last CLEAR_EXPIRED_INTERVAL seconds and returns
+        the thread doing it or None.
+        """
+        global _cleared_at
+        with _cleared_at_lock:
+            if time.time() - _cleared_at < CLEAR_EXPIRED_INTERVAL:
+                return None
+            _cleared_at = time.time()
+
+        def clear_expired():
+            try:
+                cls.clear_expired()
+            except Exception:
+                logger.exception('Could not remove the expired sessions')
+
+        thread = threading.Thread(target=clear_expired, name='sessions-cleaner', daemon=True)
+        thread.start()
+        return thread
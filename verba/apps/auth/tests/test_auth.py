@@ -1,6 +1,7 @@
 from unittest import mock
 
 from django.test import SimpleTestCase
+from django.utils.crypto import salted_hmac
 
 from auth import login, logout, get_user, \
     SESSION_KEY, BACKEND_SESSION_KEY, USER_DATA_SESSION_KEY, HASH_SESSION_KEY, AUTH_TOKEN_SESSION_KEY
@@ -95,6 +96,21 @@ class GetUserTestCase(SimpleTestCase):
         self.assertEqual(user.token, expected_user.token)
         self.assertDictEqual(user.user_data, expected_user.user_data)
 
+    @mock.patch('auth.models.salted_hmac', wraps=salted_hmac)
+    def test_hash_computed_once(self, mocked_salted_hmac):
+        session = self.client.session
+
+        user = VerbaUser(pk=1, token='other user token', user_data={'username': 'verbauser'})
+        session[SESSION_KEY] = user.pk
+        session[AUTH_TOKEN_SESSION_KEY] = user.token
+        session[USER_DATA_SESSION_KEY] = user.user_data
+        session[BACKEND_SESSION_KEY] = 'auth.backends.VerbaBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+
+        for _ in range(3):
+            self.assertEqual(get_user(mock.MagicMock(session=session)).pk, user.pk)
+        self.assertEqual(mocked_salted_hmac.call_count, 1)
+
     def test_with_invalid_hash_returns_anonymous(self):
         """
         When the values in the session are set up properly APART FROM the HASH SESSION KEY,
@@ -1,7 +1,10 @@
 from unittest import mock
 
+from django.test import override_settings
+
 from github.exceptions import AuthValidationError
 from github import User as GitHubUser
+from github.auth import SharedReadToken
 
 from auth.backends import VerbaBackend
 
@@ -27,3 +30,10 @@ class VerbaBackendTestCase(AuthTestCase):
         user = backend.authenticate(code='code')
         self.assertEqual(user.pk, user_data['login'])
         self.assertEqual(user.user_data['name'], user_data['name'])
+
+    @override_settings(VERBA_GITHUB_TOKEN='service-token')
+    def test_get_user_shares_reads(self, mocked_get_token):
+        user = VerbaBackend().get_user('test-owner', 'token', self.get_user_data())
+
+        self.assertEqual(user.token, 'token')
+        self.assertTrue(isinstance(user.token, SharedReadToken))
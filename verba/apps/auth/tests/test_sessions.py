@@ -0,0 +1,82 @@
+import os
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from auth import SESSION_KEY
+from auth.sessions import SessionStore, session_cache
+
+from .test_base import AuthTestCase
+
+
+class SessionStoreTestCase(SimpleTestCase):
+    def setUp(self):
+        super(SessionStoreTestCase, self).setUp()
+        session_cache.clear()
+
+        self.session = SessionStore()
+        self.session['key'] = {'nested': 'value'}
+        self.session.save()
+        self.addCleanup(self.session.delete)
+
+    def test_load(self):
+        session = SessionStore(self.session.session_key)
+        self.assertEqual(session['key'], {'nested': 'value'})
+
+    def test_load_from_cache(self):
+        SessionStore(self.session.session_key).load()
+
+        with mock.patch.object(SessionStore, 'decode') as mocked_decode:
+            session = SessionStore(self.session.session_key)
+            self.assertEqual(session['key'], {'nested': 'value'})
+        self.assertFalse(mocked_decode.called)
+
+    def test_cached_copy_not_changed(self):
+        session = SessionStore(self.session.session_key)
+        session['key']['nested'] = 'changed in place'
+
+        self.assertEqual(SessionStore(self.session.session_key)['key'], {'nested': 'value'})
+
+    def test_changed_by_other_worker(self):
+        SessionStore(self.session.session_key).load()
+
+        # as if saved by another worker
+        session = SessionStore(self.session.session_key)
+        session['key'] = 'new value'
+        session.save()
+
+        self.assertEqual(SessionStore(self.session.session_key)['key'], 'new value')
+
+    def test_deleted(self):
+        SessionStore(self.session.session_key).load()
+        os.remove(self.session._key_to_file())
+
+        session = SessionStore(self.session.session_key)
+        self.assertEqual(session.load(), {})
+        self.assertEqual(session.session_key, None)
+
+    def test_expired_files_removed(self):
+        expired = SessionStore()
+        expired['key'] = 'expired'
+        expired.save()
+        self.addCleanup(expired.delete)
+        modified_at = os.stat(expired._key_to_file()).st_mtime - settings.SESSION_COOKIE_AGE - 1
+        os.utime(expired._key_to_file(), (modified_at, modified_at))
+
+        with mock.patch('auth.sessions._cleared_at', 0):
+            SessionStore.clear_expired_periodically().join()
+            # not again before the interval
+            self.assertEqual(SessionStore.clear_expired_periodically(), None)
+
+        self.assertFalse(os.path.exists(expired._key_to_file()))
+        self.assertTrue(os.path.exists(self.session._key_to_file()))
+
+
+class SessionCookieTestCase(AuthTestCase):
+    def test_cookie_is_session_key(self):
+        self.login()
+
+        cookie = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.assertEqual(len(cookie), 32)
+        self.assertEqual(SessionStore(cookie)[SESSION_KEY], 'test-owner')
@@ -1,2 +1,3 @@
 # flake8: noqa
-from .api import User, Repo, Issue, PullRequest, Branch, File, Comment
+from .api import User, Repo, Issue, PullRequest, Branch, File, Comment, Event, TreeEntry, ChangedFile, \
+    Comparison, PullData, IssueData, CommentData, FileData, UserData, EventData
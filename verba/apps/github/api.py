@@ -1,26 +1,260 @@
+import sys
 import json
 import requests
 import base64
 import logging
+import threading
+from collections import namedtuple
 
 from django.utils.dateparse import parse_datetime
 
 from verba_settings import config
 
-from .exceptions import InvalidResponseException, NotFoundException
+from .cache import response_cache, blob_cache, pull_files_cache, tree_cache, compare_cache
+from .exceptions import InvalidResponseException, NotFoundException, FileTooLargeException, ConflictException
 
 
 logger = logging.getLogger('github.api')
 
+# entry of a git tree, `type` is 'blob', 'tree' or 'commit' and `name` the
+# path relative to the tree if read recursively
+TreeEntry = namedtuple('TreeEntry', ['name', 'type', 'sha'])
+
+# file changed between two commits, `status` is 'added', 'modified', 'removed' or 'renamed'
+ChangedFile = namedtuple('ChangedFile', ['path', 'status', 'additions', 'deletions'])
+Comparison = namedtuple('Comparison', ['ahead_by', 'behind_by', 'files'])
+
+
+def parse_optional_datetime(value):
+    return parse_datetime(value) if value else None
+
+
+class Record(object):
+    """
+    Mixin of the compact records GitHub payloads are projected to.
+
+    The payloads are mostly URLs and nested objects Verba never reads so
+    only the fields used are kept. Records are immutable so the same one can
+    be shared by every request through the response cache.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, data):
+        raise NotImplementedError()
+
+    @classmethod
+    def from_json_list(cls, data_list):
+        return tuple(cls.from_json(data) for data in data_list)
+
+
+class PullData(Record, namedtuple('PullData', [
+    'number', 'title', 'body', 'created_at', 'updated_at', 'head_ref', 'head_sha', 'base_ref', 'base_sha', 'comments',
+    'url', 'issue_url', 'diff_url'
+])):
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, data):
+        head = data.get('head') or {}
+        base = data.get('base') or {}
+        return cls(
+            number=data.get('number'),
+            title=data.get('title'),
+            body=data.get('body'),
+            created_at=parse_optional_datetime(data.get('created_at')),
+            updated_at=parse_optional_datetime(data.get('updated_at')),
+            head_ref=head.get('ref'),
+            head_sha=head.get('sha'),
+            base_ref=base.get('ref'),
+            base_sha=base.get('sha'),
+            comments=data.get('comments'),
+            url=data.get('url'),
+            issue_url=data.get('issue_url'),
+            diff_url=data.get('diff_url')
+        )
+
+
+class IssueData(Record, namedtuple('IssueData', [
+    'number', 'title', 'updated_at', 'labels', 'assignees', 'url', 'comments_url'
+])):
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, data):
+        # the same few labels and users are on every issue
+        return cls(
+            number=data.get('number'),
+            title=data.get('title'),
+            updated_at=parse_optional_datetime(data.get('updated_at')),
+            labels=tuple(sys.intern(label['name']) for label in data.get('labels', [])),
+            assignees=tuple(sys.intern(assignee['login']) for assignee in data.get('assignees', [])),
+            url=data.get('url'),
+            comments_url=data.get('comments_url')
+        )
+
+
+class CommentData(Record, namedtuple('CommentData', ['body', 'created_at', 'created_by'])):
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            body=data.get('body'),
+            created_at=parse_optional_datetime(data.get('created_at')),
+            created_by=(data.get('user') or {}).get('login')
+        )
+
+
+class FileData(Record, namedtuple('FileData', ['name', 'sha', 'size'])):
+    """
+    The content of the file is only kept in the blob cache, see `project_file`.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            name=data.get('name'),
+            sha=data.get('sha'),
+            size=data.get('size', 0)
+        )
+
+
+class UserData(Record, namedtuple('UserData', ['login', 'name', 'email', 'avatar_url'])):
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            login=data.get('login'),
+            name=data.get('name'),
+            email=data.get('email'),
+            avatar_url=data.get('avatar_url')
+        )
+
+
+class EventData(Record, namedtuple('EventData', ['id', 'type', 'ref'])):
+    """
+    `ref` is the ref pushed to by push events, None for other events.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            id=int(data['id']),
+            type=data.get('type'),
+            ref=(data.get('payload') or {}).get('ref')
+        )
+
+
+def project_file(file_data):
+    """
+    Returns the FileData of a response of the contents API and puts the
+    content of the file, if included, in the blob cache by sha so that it's
+    held only once however the file is read. The contents API doesn't
+    include the content of files larger than 1MB.
+    """
+    if file_data.get('sha') and file_data.get('content') is not None and file_data.get('encoding') != 'none':
+        blob_cache.set(file_data['sha'], base64.b64decode(file_data['content']).decode('utf-8'))
+    return FileData.from_json(file_data)
+
+
+def project_pull_files(files_data):
+    """
+    Returns a tuple of (path, previous path or None) of the files of a page
+    of the files of a pull request.
+    """
+    return tuple(
+        (file_data['filename'], file_data.get('previous_filename'))
+        for file_data in files_data
+    )
+
+
+def project_ref(ref_data):
+    return ref_data['object']['sha']
+
+
+def project_branch(branch_data):
+    return branch_data['commit']['sha']
+
+
+def project_commit_tree(commit_data):
+    return commit_data['tree']['sha']
+
+
+def project_can_pull(repo_data):
+    return (repo_data.get('permissions') or {}).get('pull', False)
+
+
+def project_tree(tree_data):
+    return (
+        tree_data['sha'],
+        tuple(
+            TreeEntry(name=tree_el['path'], type=tree_el['type'], sha=tree_el['sha'])
+            for tree_el in tree_data['tree']
+        )
+    )
+
+
+def project_comparison(compare_data):
+    return Comparison(
+        ahead_by=compare_data['ahead_by'],
+        behind_by=compare_data['behind_by'],
+        files=tuple(
+            ChangedFile(
+                path=file_data['filename'],
+                status=file_data['status'],
+                additions=file_data['additions'],
+                deletions=file_data['deletions']
+            )
+            for file_data in compare_data.get('files', [])
+        )
+    )
+
+
+def project_search(search_data):
+    return IssueData.from_json_list(search_data['items'])
+
+
+_local = threading.local()
+
+
+def get_session():
+    """
+    Returns the `requests.Session` of the current thread so that connections
+    to GitHub are pooled and kept alive between requests.
+    Sessions are not thread-safe so each thread gets its own.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def reset_connections():
+    """
+    Drops all pooled connections. Needed after forking as sockets opened by
+    the parent process must not be shared with the child.
+    """
+    global _local
+    _local = threading.local()
+
 
 class Request(object):
     base_url = None
     default_json = True
+    shared_reads = False  # if GETs can be made with the service token of a SharedReadToken
 
     def __init__(self, token):
         self.token = token
         self.url = None
         self.in_json = self.default_json
+        self.max_size = None
+        self.immutable = False
+        self.projection = None
+        self.response_headers = {}
 
     def _build_url(self, url_part):
         return '{}/{}'.format(self.base_url, url_part)
@@ -36,6 +270,32 @@ class Request(object):
         self.in_json = in_json
         return self
 
+    def set_max_size(self, max_size):
+        """
+        The response body is downloaded in chunks and FileTooLargeException
+        raised as soon as it gets bigger than `max_size` bytes.
+        """
+        self.max_size = max_size
+        return self
+
+    def set_immutable(self, immutable):
+        """
+        Responses of immutable resources, e.g. read at a commit sha, are
+        returned from the cache without being revalidated with GitHub.
+        """
+        self.immutable = immutable
+        return self
+
+    def set_projection(self, projection):
+        """
+        `projection` is called with the parsed response and its result is
+        returned instead, e.g. a Record with only the fields used.
+        Cached responses keep the result of the projection rather than the raw
+        body so it has to be immutable.
+        """
+        self.projection = projection
+        return self
+
     def _build_data(self, data):
         if self.in_json:
             return json.dumps(data)
@@ -46,10 +306,22 @@ class Request(object):
             return 'application/json'
         return 'text/plain'
 
-    def _build_response(self, response):
+    def _build_response(self, content):
         if self.in_json:
-            return response.json()
-        return response.content
+            return json.loads(content.decode('utf-8'))
+        return content
+
+    def _build_cache_key(self, params):
+        key = (self.url, tuple(sorted(params.items())), self._build_accept())
+        if self.projection:
+            # projections of the same response are cached separately
+            key += (self.projection.__qualname__,)
+        return key
+
+    def _load_cached(self, cached_content):
+        if self.projection:
+            return cached_content
+        return self._build_response(cached_content)
 
     def get(self, params={}):
         return self._make('get', params=params)
@@ -63,22 +335,93 @@ class Request(object):
     def post(self, data={}):
         return self._make('post', data=self._build_data(data))
 
-    def _make(self, verb, **kwargs):
-        kwargs['headers'] = {
-            'Authorization': 'token {}'.format(self.token),
+    def post_stream(self, chunks):
+        """
+        Like `post` but sends the already encoded body from the iterable `chunks`
+        without building it in memory first.
+        """
+        return self._make('post', data=chunks)
+
+    def get_stream(self, params={}, chunk_size=64 * 1024):
+        """
+        Like `get` but returns an iterator over the chunks of the raw body as
+        they are downloaded so that large responses can be passed on without
+        being held in memory. Streamed responses are not cached.
+        """
+        logger.debug('get stream with URL: {}'.format(self.url))
+        response = get_session().get(self.url, params=params, headers=self._build_headers('get'), stream=True)
+        self.response_headers = response.headers
+        self._check_response(response)
+        return response.iter_content(chunk_size=chunk_size)
+
+    def _check_response(self, response):
+        if not response.ok:
+            if response.status_code == 404:
+                raise NotFoundException.from_response(response)
+            if response.status_code == 409:
+                raise ConflictException.from_response(response)
+            raise InvalidResponseException.from_response(response)
+
+    def _build_headers(self, verb):
+        token = self.token
+        if verb == 'get' and self.shared_reads:
+            token = getattr(token, 'read_token', token)
+        return {
+            'Authorization': 'token {}'.format(token),
             'Accept': self._build_accept()
         }
 
-        verb_func = getattr(requests, verb)
+    def _make(self, verb, **kwargs):
+        headers = self._build_headers(verb)
+
+        # conditional GET if we have seen this response already
+        cache_key = None
+        cached = None
+        if verb == 'get':
+            cache_key = self._build_cache_key(kwargs.get('params', {}))
+            cached = response_cache.get(cache_key)
+            if cached and self.immutable:
+                return self._load_cached(cached[1])
+            if cached and cached[0]:
+                headers['If-None-Match'] = cached[0]
+        kwargs['headers'] = headers
+        if self.max_size:
+            kwargs['stream'] = True
+
+        verb_func = getattr(get_session(), verb)
         logger.debug('{} with URL: {}'.format(verb, self.url))
         response = verb_func(self.url, **kwargs)
+        self.response_headers = response.headers
+        self._check_response(response)
 
-        if not response.ok:
-            if response.status_code == 404:
-                raise NotFoundException.from_response(response)
-            raise InvalidResponseException.from_response(response)
+        if cached and response.status_code == 304:
+            return self._load_cached(cached[1])
+
+        content = self._read_content(response)
+        data = self._build_response(content)
+        if self.projection:
+            data = self.projection(data)
 
-        return self._build_response(response)
+        etag = response.headers.get('ETag')
+        if cache_key and (etag or self.immutable):
+            response_cache.set(cache_key, (etag, data if self.projection else content))
+        return data
+
+    def _read_content(self, response):
+        if not self.max_size:
+            return response.content
+
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_size:
+                response.close()
+                raise FileTooLargeException(
+                    'Response from {} is larger than {} bytes'.format(self.url, self.max_size)
+                )
+            chunks.append(chunk)
+        return b''.join(chunks)
 
 
 class HTTPRequest(Request):
@@ -93,11 +436,52 @@ class APIRequest(Request):
 class RepoRequest(APIRequest):
     """
     Like Request but used for actions on a repo.
+
+    The content of the repo is the same for everybody who can read it so
+    reads can be shared.
     """
+    shared_reads = True
+
     def _build_url(self, url_part):
         return '{}/repos/{}/{}'.format(config.GITHUB_API_HOST, config.REPO, url_part)
 
 
+class RawRepoRequest(RepoRequest):
+    """
+    Like RepoRequest but gets the raw content of files and blobs,
+    which works for files of up to 100MB.
+    """
+    default_json = False
+
+    def _build_accept(self):
+        return 'application/vnd.github.v3.raw'
+
+
+def iter_base64_json(field, content, chunk_size=3 * 64 * 1024):
+    """
+    Yields the JSON object {`field`: <base64 of `content`>, "encoding": "base64"}
+    in chunks so that the whole encoded `content` is never in memory.
+    `chunk_size` has to be a multiple of 3 so that chunks can be encoded separately.
+    """
+    view = memoryview(content)
+    yield '{{"encoding": "base64", "{}": "'.format(field).encode('utf-8')
+    for start in range(0, len(view), chunk_size):
+        yield base64.b64encode(view[start:start + chunk_size])
+    yield b'"}'
+
+
+def has_next_page(response_headers, page_length, per_page):
+    """
+    Returns True if there is a page after the one `response_headers` are of.
+    That's what the Link header says or, as a 304 may not have one, if the
+    page is full.
+    """
+    link = response_headers.get('Link')
+    if link:
+        return 'rel="next"' in link
+    return page_length >= per_page
+
+
 def abs_path(path):
     if path.startswith('/'):
         return path
@@ -106,50 +490,114 @@ def abs_path(path):
 
 class Comment(object):
     def __init__(self, token, data):
+        """
+        `data` is the CommentData or the JSON of the comment.
+        """
         self.token = token
-        self._data = data
+        self._data = data if isinstance(data, CommentData) else CommentData.from_json(data)
 
     @property
     def body(self):
-        return self._data['body']
+        return self._data.body
 
     @property
     def created_at(self):
-        return parse_datetime(self._data['created_at'])
+        return self._data.created_at
 
     @property
     def created_by(self):
-        return self._data['user']['login']
+        return self._data.created_by
 
 
 class File(object):
-    def __init__(self, token, path, branch_name):
+    def __init__(self, token, path, branch_name, sha=None, ref=None):
+        """
+        `sha` is the blob sha of the file if already known e.g. from a git tree,
+        it allows getting the content from the blob cache without any request.
+
+        `ref` is the commit sha the file is read at, the head of the branch if
+        not given. Files read at a commit sha are cached forever.
+        """
         self.token = token
         self.path = path
         self.branch_name = branch_name
+        self.ref = ref
+        self._sha = sha
+        self._lock = threading.RLock()
 
     @property
     def _data(self):
         if not hasattr(self, '_cached_data'):
-            url = 'contents/{}'.format(self.path)
-            params = {
-                'path': self.path,
-                'ref': self.branch_name
-            }
-            self._cached_data = RepoRequest(self.token).set_url(url).get(params=params)
+            with self._lock:
+                if not hasattr(self, '_cached_data'):
+                    url = 'contents/{}'.format(self.path)
+                    params = {
+                        'path': self.path,
+                        'ref': self.ref or self.branch_name
+                    }
+                    self._cached_data = RepoRequest(self.token).set_url(url).set_immutable(
+                        self.ref is not None
+                    ).set_projection(project_file).get(params=params)
         return self._cached_data
 
     @property
     def name(self):
-        return self._data['name']
+        return self._data.name
+
+    @property
+    def sha(self):
+        if self._sha:
+            return self._sha
+        return self._data.sha
 
     @property
     def content(self):
-        return base64.b64decode(self._data['content']).decode("utf-8")
+        sha = self._sha
+        if not sha:
+            data = self._data
+            self._check_size(data.size)
+            sha = data.sha
+
+        # the contents API puts the content in the blob cache unless the file
+        # is too large for it to include it
+        content = blob_cache.get(sha)
+        if content is None:
+            content = self._get_blob_content(sha)
+            blob_cache.set(sha, content)
+        return content
+
+    def _get_blob_content(self, sha):
+        url = 'git/blobs/{}'.format(sha)
+        content = RawRepoRequest(self.token).set_url(url).set_max_size(config.FILES.MAX_SIZE).get()
+        return content.decode("utf-8")
 
     @classmethod
-    def create_or_update(cls, token, path, branch_name, content, message, update_sha=None):
-        encoded_content = base64.b64encode(content.encode('utf-8')).decode("utf-8")
+    def _check_size(cls, size):
+        if size > config.FILES.MAX_SIZE:
+            raise FileTooLargeException(
+                'The file is {} bytes, larger than the {} bytes limit'.format(size, config.FILES.MAX_SIZE)
+            )
+
+    @classmethod
+    def create_or_update(cls, token, path, branch_name, content, message, update_sha=None, ref=None):
+        """
+        Creates or updates the file and returns a tuple of
+        (API response data, base64 encoded content).
+
+        Files larger than `config.FILES.LARGE_SIZE` are written through the
+        git data API in which case the encoded content is None as it's never
+        built in memory. They are committed on top of `ref` if given and fail
+        with ConflictException if the branch has moved since.
+        """
+        content_bytes = content.encode('utf-8')
+        cls._check_size(len(content_bytes))
+
+        if len(content_bytes) > config.FILES.LARGE_SIZE:
+            data = cls._create_or_update_large(token, path, branch_name, content_bytes, message, ref=ref)
+            blob_cache.set(data['content']['sha'], content)
+            return (data, None)
+
+        encoded_content = base64.b64encode(content_bytes).decode("utf-8")
         url = 'contents/{}'.format(path)
         params = {
             'path': path,
@@ -162,34 +610,74 @@ class File(object):
             params['sha'] = update_sha
 
         data = RepoRequest(token).set_url(url).put(data=params)
+        blob_cache.set(data['content']['sha'], content)
         return (data, encoded_content)
 
+    @classmethod
+    def _create_or_update_large(cls, token, path, branch_name, content_bytes, message, ref=None):
+        """
+        Writes the file by creating a blob and committing it to the branch.
+        Returns data in the same format as the contents API.
+        """
+        branch = Branch(token, branch_name, sha=ref)
+        blob_sha = branch.create_blob(content_bytes)
+        commit_sha = branch.commit_blobs({path: blob_sha}, message)
+        return {
+            'content': {
+                'name': path.split('/')[-1],
+                'path': path,
+                'sha': blob_sha,
+                'size': len(content_bytes)
+            },
+            'commit': {
+                'sha': commit_sha
+            }
+        }
+
+    @classmethod
+    def _build_cached_data(cls, response_data):
+        # the api doesn't return the content when creating/updating, it's
+        # already in the blob cache
+        return FileData.from_json(response_data['content'])
+
     def change_content(self, new_content, message):
-        content_data, _ = self.create_or_update(
-            self.token, self.path, self.branch_name, new_content, message,
-            update_sha=self._data['sha']
-        )
-        setattr(self, '_cached_data', content_data)
+        with self._lock:
+            response_data, _ = self.create_or_update(
+                self.token, self.path, self.branch_name, new_content, message,
+                update_sha=self.sha, ref=self.ref
+            )
+            setattr(self, '_cached_data', self._build_cached_data(response_data))
+            self._sha = None
+            if self.ref is not None:
+                # read at the commit just made from now on
+                self.ref = response_data['commit']['sha']
 
     @classmethod
     def create(cls, token, path, branch_name, content, message):
-        response_data, encoded_content = cls.create_or_update(
+        response_data, _ = cls.create_or_update(
             token, path, branch_name, content, message
         )
 
         # constructing file / content
         git_file = cls(token=token, path=path, branch_name=branch_name)
-
-        content_data = response_data['content']
-        content_data['content'] = encoded_content  # the api don't return this field when creating/updating
-        setattr(git_file, '_cached_data', content_data)
+        setattr(git_file, '_cached_data', cls._build_cached_data(response_data))
         return git_file
 
 
 class Branch(object):
-    def __init__(self, token, name):
+    def __init__(self, token, name, sha=None):
+        """
+        `sha` pins the branch to a commit: trees and files are read at it and
+        cached forever, and commits are created on top of it and fail with
+        ConflictException if the branch has moved in the meantime.
+        """
         self.token = token
         self.name = name
+        self.sha = sha
+
+    @property
+    def ref(self):
+        return self.sha or self.name
 
     def create_new_file(self, path, message, content):
         return File.create(
@@ -198,31 +686,108 @@ class Branch(object):
             content=content, message=message
         )
 
+    def create_blob(self, content):
+        """
+        Creates a blob with `content` (bytes) and returns its sha.
+        """
+        data = RepoRequest(self.token).set_url('git/blobs').post_stream(
+            iter_base64_json('content', content)
+        )
+        return data['sha']
+
+    def commit_blobs(self, blobs, message):
+        """
+        Creates a single commit on top of the branch which sets each path in the
+        dict `blobs` to the blob sha it maps to and moves the branch to it.
+        Returns the sha of the new commit.
+        """
+        ref_url = 'git/refs/heads/{}'.format(self.name)
+        head_sha = self.sha or self.get_sha(self.token, self.name)
+        head_tree_sha = RepoRequest(self.token).set_url('git/commits/{}'.format(head_sha)).set_immutable(
+            True
+        ).set_projection(project_commit_tree).get()
+
+        tree_data = RepoRequest(self.token).set_url('git/trees').post({
+            'base_tree': head_tree_sha,
+            'tree': [
+                {'path': path, 'mode': '100644', 'type': 'blob', 'sha': sha}
+                for path, sha in sorted(blobs.items())
+            ]
+        })
+        commit_data = RepoRequest(self.token).set_url('git/commits').post({
+            'message': message,
+            'tree': tree_data['sha'],
+            'parents': [head_sha]
+        })
+        try:
+            # not forced so it fails if the branch isn't at `head_sha` any more
+            RepoRequest(self.token).set_url(ref_url).patch({'sha': commit_data['sha']})
+        except InvalidResponseException as e:
+            # GitHub answers 422 when the update isn't a fast forward
+            if e.status_code == 422:
+                raise ConflictException(
+                    'The branch {} has changed since {}'.format(self.name, head_sha), e.reason, e.status_code
+                )
+            raise
+
+        if self.sha:
+            self.sha = commit_data['sha']
+        return commit_data['sha']
+
+    def commit_files(self, files, message):
+        """
+        Creates a single commit on top of the branch which sets each path in the
+        dict `files` to the content (str) it maps to, whatever its size.
+        Returns the sha of the new commit.
+        """
+        blobs = {}
+        for path, content in files.items():
+            content_bytes = content.encode('utf-8')
+            File._check_size(len(content_bytes))
+            blobs[path] = self.create_blob(content_bytes)
+            blob_cache.set(blobs[path], content)
+        return self.commit_blobs(blobs, message)
+
     def get_git_tree(self, path, recursive=False):
-        sha = '{}:{}'.format(self.name, path)
+        """
+        Returns a tuple of (tree sha, tuple of TreeEntry) of the folder `path`.
+        """
+        sha = '{}:{}'.format(self.ref, path)
 
         url = 'git/trees/{}?recursive={}'.format(
             sha, '1' if recursive else '0'
         )
-        return RepoRequest(self.token).set_url(url).get()
+        return RepoRequest(self.token).set_url(url).set_immutable(self.sha is not None).set_projection(
+            project_tree
+        ).get()
 
     def get_dir_files(self, path):
-        tree_data = self.get_git_tree(path, recursive=True)
+        _, entries = self.get_git_tree(path, recursive=True)
         return [
-            File(self.token, '{}{}'.format(path, tree_el['path']), self.name)
-            for tree_el in tree_data['tree']
+            File(self.token, '{}{}'.format(path, entry.name), self.name, sha=entry.sha, ref=self.sha)
+            for entry in entries
         ]
 
-    def get_file(self, path):
+    def get_file(self, path, sha=None):
         # it does not check if the file exists => it's being optimistic to avoid
         # performance penalties.
         # It not ideal, change
-        return File(self.token, path, self.name)
+        return File(self.token, path, self.name, sha=sha, ref=self.sha)
+
+    @classmethod
+    def get_sha(cls, token, name):
+        """
+        Returns the sha of the commit the branch `name` is at now. The ref is
+        revalidated with its ETag so that an unchanged branch doesn't count
+        against the rate limit.
+        """
+        return RepoRequest(token).set_url('git/refs/heads/{}'.format(name)).set_projection(project_ref).get()
 
     @classmethod
     def create(cls, token, new_branch, from_branch):
-        from_branch_data = RepoRequest(token).set_url('branches/{}'.format(from_branch)).get()
-        from_branch_sha = from_branch_data['commit']['sha']
+        from_branch_sha = RepoRequest(token).set_url('branches/{}'.format(from_branch)).set_projection(
+            project_branch
+        ).get()
 
         new_branch_ref = 'refs/heads/{}'.format(new_branch)
 
@@ -235,55 +800,92 @@ class Branch(object):
 
 
 class PullRequest(object):
+    FILES_PER_PAGE = 100
+    PULLS_PER_PAGE = 100
+
     def __init__(self, token, data):
+        """
+        `data` is the PullData or the JSON of the pull request.
+        """
         self.token = token
-        self._data = data
+        self._data = data if isinstance(data, PullData) else PullData.from_json(data)
+        self._lock = threading.RLock()
 
     @property
     def branch(self):
-        return Branch(self.token, self.head_ref)
+        # pinned to the head the pull request was read with, see `refresh_shas`
+        return Branch(self.token, self.head_ref, sha=self.head_sha)
+
+    def refresh_shas(self):
+        """
+        Brings the head and base sha up to date with their branches as the
+        pull request data can lag behind the latest pushes.
+        """
+        head_sha = Branch.get_sha(self.token, self.head_ref)
+        base_sha = Branch.get_sha(self.token, self._data.base_ref)
+        self._data = self._data._replace(head_sha=head_sha, base_sha=base_sha)
 
     @property
     def issue_nr(self):
-        return self._data['number']
+        return self._data.number
 
     @property
     def issue(self):
         if not hasattr(self, '_issue'):
-            issue_data = RepoRequest(self.token).set_url(self._data['issue_url']).get()
-            self._issue = Issue(self.token, issue_data)
+            with self._lock:
+                if not hasattr(self, '_issue'):
+                    issue_data = RepoRequest(self.token).set_url(self._data.issue_url).set_projection(
+                        IssueData.from_json
+                    ).get()
+                    self._issue = Issue(self.token, issue_data)
         return self._issue
 
     @property
     def title(self):
-        return self._data['title']
+        return self._data.title
 
     @property
     def description(self):
-        return self._data['body']
+        return self._data.body
 
     @property
     def created_at(self):
-        return parse_datetime(self._data['created_at'])
+        return self._data.created_at
+
+    @property
+    def updated_at(self):
+        return self._data.updated_at
 
     def edit(self, title, description):
         data = {
             'title': title,
             'body': description
         }
-        RepoRequest(self.token).set_url(self._data['url']).patch(data)
-        self._data['title'] = title
-        self._data['body'] = description
+        RepoRequest(self.token).set_url(self._data.url).patch(data)
+        self._data = self._data._replace(title=title, body=description)
 
     def close(self):
         data = {
             'state': 'closed'
         }
-        RepoRequest(self.token).set_url(self._data['url']).patch(data)
+        RepoRequest(self.token).set_url(self._data.url).patch(data)
 
     @property
     def head_ref(self):
-        return self._data['head']['ref']
+        return self._data.head_ref
+
+    @property
+    def head_sha(self):
+        return self._data.head_sha
+
+    @head_sha.setter
+    def head_sha(self, head_sha):
+        # after a commit to the head branch
+        self._data = self._data._replace(head_sha=head_sha)
+
+    @property
+    def base_sha(self):
+        return self._data.base_sha
 
     @property
     def labels(self):
@@ -310,13 +912,54 @@ class PullRequest(object):
 
     @property
     def tot_comments(self):
-        return self._data['comments']
+        return self._data.comments
+
+    @property
+    def files(self):
+        """
+        Returns the paths of the files changed by this pull request, renamed
+        files with both their old and new path.
+        """
+        cache_key = (self._data.url, self.head_sha)
+        files = pull_files_cache.get(cache_key)
+        if files is None:
+            files = []
+            page = 1
+            while True:
+                files_data = RepoRequest(self.token).set_url('{}/files'.format(self._data.url)).set_projection(
+                    project_pull_files
+                ).get(params={'per_page': self.FILES_PER_PAGE, 'page': page})
+                for path, previous_path in files_data:
+                    files.append(path)
+                    if previous_path:
+                        files.append(previous_path)
+
+                if len(files_data) < self.FILES_PER_PAGE:
+                    break
+                page += 1
+
+            files = tuple(files)
+            pull_files_cache.set(cache_key, files)
+        return list(files)
+
+    @property
+    def comparison(self):
+        """
+        Returns the Comparison of the base and the head of this pull request.
+        """
+        return Repo(self.token).compare(self.base_sha, self.head_sha)
 
     @property
     def diff(self):
-        content = HTTPRequest(self.token).set_url(self._data['diff_url']).get()
+        content = HTTPRequest(self.token).set_url(self._data.diff_url).get()
         return content.decode("utf-8")
 
+    def iter_diff(self):
+        """
+        Returns an iterator over the chunks of bytes of the diff.
+        """
+        return HTTPRequest(self.token).set_url(self._data.diff_url).get_stream()
+
     @classmethod
     def create(cls, token, title, body, base, head):
         data = {
@@ -325,65 +968,154 @@ class PullRequest(object):
             'head': head,
             'base': base
         }
-        pull_data = RepoRequest(token).set_url('pulls').post(data)
+        pull_data = RepoRequest(token).set_url('pulls').set_projection(PullData.from_json).post(data)
         return cls(token, pull_data)
 
     @classmethod
     def all(cls, token):
+        """
+        Returns all the open pull requests, reading them page by page.
+        Each page is cached and revalidated on its own.
+        """
         pulls = []
-        for pull_data in RepoRequest(token).set_url('pulls').get():
-            pulls.append(PullRequest(token, pull_data))
+        page = 1
+        while True:
+            request = RepoRequest(token).set_url('pulls').set_projection(PullData.from_json_list)
+            pulls_data = request.get(params={'per_page': cls.PULLS_PER_PAGE, 'page': page})
+            pulls += [cls(token, pull_data) for pull_data in pulls_data]
+
+            if not has_next_page(request.response_headers, len(pulls_data), cls.PULLS_PER_PAGE):
+                break
+            page += 1
         return pulls
 
     @classmethod
     def get(cls, token, number):
-        pull_data = RepoRequest(token).set_url('pulls/{}'.format(number)).get()
+        pull_data = RepoRequest(token).set_url('pulls/{}'.format(number)).set_projection(PullData.from_json).get()
         return cls(token, pull_data)
 
 
 class Issue(object):
+    SEARCH_PER_PAGE = 100
+
     def __init__(self, token, data):
+        """
+        `data` is the IssueData or the JSON of the issue.
+        """
         self.token = token
-        self._data = data
+        self._data = data if isinstance(data, IssueData) else IssueData.from_json(data)
+
+    @property
+    def number(self):
+        return self._data.number
+
+    @property
+    def title(self):
+        return self._data.title
+
+    @property
+    def updated_at(self):
+        return self._data.updated_at
 
     @property
     def labels(self):
-        return [label['name'] for label in self._data['labels']]
+        return list(self._data.labels)
 
     @labels.setter
     def labels(self, labels):
         data = {
             'labels': labels
         }
-        pull_data = RepoRequest(self.token).set_url(self._data['url']).patch(data)
-        self._data = pull_data
+        self._data = RepoRequest(self.token).set_url(self._data.url).set_projection(IssueData.from_json).patch(data)
 
     @property
     def assignees(self):
-        return [label['login'] for label in self._data['assignees']]
+        return list(self._data.assignees)
 
     @assignees.setter
     def assignees(self, assignees):
         data = {
             'assignees': assignees
         }
-        pull_data = RepoRequest(self.token).set_url(self._data['url']).patch(data)
-        self._data = pull_data
+        self._data = RepoRequest(self.token).set_url(self._data.url).set_projection(IssueData.from_json).patch(data)
 
     def add_comment(self, comment):
         data = {
             'body': comment
         }
-        RepoRequest(self.token).set_url(self._data['comments_url']).post(data)
+        RepoRequest(self.token).set_url(self._data.comments_url).post(data)
 
     @property
     def comments(self):
-        comments_data = RepoRequest(self.token).set_url(self._data['comments_url']).get()
+        comments_data = RepoRequest(self.token).set_url(self._data.comments_url).set_projection(
+            CommentData.from_json_list
+        ).get()
         return [
             Comment(self.token, data)
             for data in comments_data
         ]
 
+    @classmethod
+    def search(cls, token, qualifiers):
+        """
+        Returns the first page of issues and pull requests matching all
+        `qualifiers` (e.g. ['is:pr', 'assignee:octocat']) in the repo,
+        most recently updated first.
+        """
+        params = {
+            'q': ' '.join(['repo:{}'.format(config.REPO)] + list(qualifiers)),
+            'sort': 'updated',
+            'order': 'desc',
+            'per_page': cls.SEARCH_PER_PAGE
+        }
+        issues_data = APIRequest(token).set_url('search/issues').set_projection(project_search).get(params=params)
+        return [
+            cls(token, data)
+            for data in issues_data
+        ]
+
+
+class Event(object):
+    # seconds GitHub asks to wait between polls if it doesn't say otherwise
+    DEFAULT_POLL_INTERVAL = 60
+
+    def __init__(self, token, data):
+        """
+        `data` is the EventData or the JSON of the event.
+        """
+        self.token = token
+        self._data = data if isinstance(data, EventData) else EventData.from_json(data)
+
+    @property
+    def id(self):
+        return self._data.id
+
+    @property
+    def type(self):
+        return self._data.type
+
+    @property
+    def ref(self):
+        return self._data.ref
+
+    @classmethod
+    def poll(cls, token):
+        """
+        Returns a tuple of (list of the latest events of the repo, newest first,
+        seconds to wait before polling again).
+
+        The events are revalidated with If-None-Match so polling doesn't count
+        against the rate limit when nothing happened.
+        """
+        request = RepoRequest(token).set_url('events').set_projection(EventData.from_json_list)
+        events_data = request.get()
+        poll_interval = int(request.response_headers.get('X-Poll-Interval', cls.DEFAULT_POLL_INTERVAL))
+        events = [
+            cls(token, data)
+            for data in events_data
+        ]
+        return events, poll_interval
+
 
 class Repo(object):
     def __init__(self, token):
@@ -395,6 +1127,45 @@ class Repo(object):
     def get_pull(self, number):
         return PullRequest.get(self.token, number=number)
 
+    def search_pulls(self, qualifiers):
+        return Issue.search(self.token, ['is:pr'] + list(qualifiers))
+
+    def poll_events(self):
+        return Event.poll(self.token)
+
+    def get_tree(self, tree_ish):
+        """
+        Returns a tuple of (tree sha, tuple of TreeEntry) of the direct
+        entries of the git tree `tree_ish`.
+
+        `tree_ish` has to be a tree sha or `<commit sha>:<path>` as trees are
+        immutable and cached forever by it.
+        """
+        tree = tree_cache.get(tree_ish)
+        if tree is None:
+            tree = RepoRequest(self.token).set_url('git/trees/{}'.format(tree_ish)).set_projection(project_tree).get()
+            tree_cache.set(tree_ish, tree)
+            tree_cache.set(tree[0], tree)
+        return tree
+
+    def compare(self, base, head):
+        """
+        Returns the Comparison of the commits `base` and `head`: how many
+        commits `head` is ahead and behind `base` and the ChangedFile list of
+        the files changed since they diverged, up to 300 files.
+
+        `base` and `head` have to be commit shas as comparisons are cached
+        forever by them.
+        """
+        cache_key = (base, head)
+        comparison = compare_cache.get(cache_key)
+        if comparison is None:
+            comparison = RepoRequest(self.token).set_url('compare/{}...{}'.format(base, head)).set_projection(
+                project_comparison
+            ).get()
+            compare_cache.set(cache_key, comparison)
+        return comparison
+
     def create_pull(self, title, body, base, head):
         return PullRequest.create(self.token, title, body, base, head)
 
@@ -404,26 +1175,45 @@ class Repo(object):
 
 class User(object):
     def __init__(self, token, data):
+        """
+        `data` is the UserData or the JSON of the user.
+        """
         self.token = token
-        self._data = data
+        self._data = data if isinstance(data, UserData) else UserData.from_json(data)
 
     @property
     def username(self):
-        return self._data['login']
+        return self._data.login
 
     @property
     def name(self):
-        return self._data['name']
+        return self._data.name
 
     @property
     def email(self):
-        return self._data['email']
+        return self._data.email
 
     @property
     def avatar_url(self):
-        return self._data['avatar_url']
+        return self._data.avatar_url
 
     @classmethod
     def get_logged_in(cls, token):
-        user_data = APIRequest(token).set_url('user').get()
+        user_data = APIRequest(token).set_url('user').set_projection(UserData.from_json).get()
         return cls(token, user_data)
+
+    @classmethod
+    def can_read_repo(cls, token):
+        """
+        Returns True if the user of `token` can read the repo.
+        """
+        return APIRequest(token).set_url('repos/{}'.format(config.REPO)).set_projection(project_can_pull).get()
+
+    @classmethod
+    def get_remaining_requests(cls, token):
+        """
+        Returns how many requests `token` can still make before hitting the
+        rate limit. Checking it doesn't count against the rate limit.
+        """
+        rate_limit_data = APIRequest(token).set_url('rate_limit').get()
+        return rate_limit_data['resources']['core']['remaining']
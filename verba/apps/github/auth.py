@@ -1,9 +1,18 @@
+import hashlib
+import logging
 import requests
 from urllib.parse import urlencode
 
+from django.conf import settings
+from django.core.cache import cache
+
 from verba_settings import config
 
-from .exceptions import AuthValidationError
+from .api import User
+from .exceptions import AuthValidationError, GitHubException
+
+
+logger = logging.getLogger('github.auth')
 
 
 def get_login_url(callback_url=None):
@@ -41,3 +50,54 @@ def get_token(code):
         raise AuthValidationError.from_response(response)
 
     return response.json()['access_token']
+
+
+def has_repo_access(token):
+    """
+    Returns True if the user of `token` can read the repo, checked with
+    GitHub at most every GITHUB_AUTH.ACCESS_CACHE_TIMEOUT seconds.
+    """
+    cache_key = 'repo-access:{}'.format(hashlib.sha256(token.encode('utf-8')).hexdigest())
+    access = cache.get(cache_key)
+    if access is None:
+        try:
+            access = User.can_read_repo(str(token))
+        except GitHubException:
+            # e.g. revoked token, reads go on with it and fail as they would
+            logger.warning('Could not check the access to the repo', exc_info=True)
+            return False
+        cache.set(cache_key, access, timeout=config.GITHUB_AUTH.ACCESS_CACHE_TIMEOUT)
+    return access
+
+
+class SharedReadToken(str):
+    """
+    GitHub token of a user, equal to it as a string, whose reads of the repo
+    are made with the service token instead.
+
+    Every user then gets the same responses, which are shared by the caches,
+    and doesn't spend their own rate limit while writes are still made with,
+    and attributed to, the user's token. Reads only go through the service
+    token if the user can read the repo themselves.
+    """
+    def __new__(cls, token, service_token):
+        shared_token = super(SharedReadToken, cls).__new__(cls, token)
+        shared_token.service_token = service_token
+        return shared_token
+
+    @property
+    def read_token(self):
+        if not hasattr(self, '_read_token'):
+            self._read_token = self.service_token if has_repo_access(self) else str(self)
+        return self._read_token
+
+
+def get_shared_read_token(token):
+    """
+    Returns `token` as a SharedReadToken if Verba has a service token,
+    `settings.VERBA_GITHUB_TOKEN`, or as it is otherwise.
+    """
+    service_token = getattr(settings, 'VERBA_GITHUB_TOKEN', None)
+    if not service_token or not token or token == service_token:
+        return token
+    return SharedReadToken(token, service_token)
@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Thread-safe in-process cache which evicts the least recently used entries
+    when it grows over `max_entries`.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.writes = 0  # number of changes, to tell if the cache has changed
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            self.writes += 1
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self.writes += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.writes += 1
+
+    def items(self):
+        """
+        Returns a list of the (key, value) entries, least recently used first.
+        """
+        with self._lock:
+            return list(self._data.items())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# (url, params, accept[, projection]) => (etag, content) of GET responses.
+# Requests with a projection keep its result, e.g. a PullData, instead of
+# the raw body.
+# Entries are always revalidated with `If-None-Match` using the token of the
+# caller so GitHub still checks that the caller can see the resource, a 304
+# just doesn't count against the rate limit and doesn't transfer the body again.
+# Reads of the repo with a SharedReadToken are made with the service token,
+# the user having been checked to be able to read the repo.
+response_cache = LRUCache(max_entries=2000)
+
+# blob sha => decoded content of the blob.
+# Blobs are immutable and the content is a string so entries can be shared.
+blob_cache = LRUCache(max_entries=1000)
+
+# (pull request url, head sha) => tuple of paths changed by the pull request.
+# The files only change with new commits on the head branch.
+pull_files_cache = LRUCache(max_entries=500)
+
+# (base commit sha, head commit sha) => Comparison of the two commits.
+# Only the counts and the list of files are kept, not the commits and patches.
+compare_cache = LRUCache(max_entries=1000)
+
+# tree-ish => (tree sha, tuple of TreeEntry) of a git tree.
+# Only immutable tree-ishes are cached: tree shas and `<commit sha>:<path>`.
+tree_cache = LRUCache(max_entries=2000)
@@ -6,9 +6,10 @@ class GitHubException(Exception):
 
 
 class InvalidResponseException(GitHubException):
-    def __init__(self, message, reason=None):
+    def __init__(self, message, reason=None, status_code=None):
         super(InvalidResponseException, self).__init__(message)
         self.reason = reason
+        self.status_code = status_code
 
     @classmethod
     def from_response(cls, response):
@@ -17,12 +18,24 @@ class InvalidResponseException(GitHubException):
             reason = response.json()
         except json.decoder.JSONDecodeError:
             reason = ''
-        return cls(message, reason)
+        return cls(message, reason, response.status_code)
 
 
 class NotFoundException(InvalidResponseException):
     pass
 
 
+class ConflictException(InvalidResponseException):
+    """
+    Raised when a write is based on a version of the branch or of the file
+    that isn't the latest one any more.
+    """
+    pass
+
+
 class AuthValidationError(InvalidResponseException):
     pass
+
+
+class FileTooLargeException(GitHubException):
+    pass
@@ -0,0 +1,160 @@
+import os
+import time
+import pickle
+import logging
+import threading
+
+from verba_settings import config
+
+from .cache import response_cache, blob_cache, pull_files_cache, tree_cache, compare_cache
+
+
+logger = logging.getLogger('github.snapshot')
+
+# bumped when what is cached changes so that old snapshots are ignored
+SNAPSHOT_VERSION = 3
+
+# name => cache saved in the snapshots.
+# Entries are safe to reload as they are either immutable, keyed by sha, or
+# revalidated with If-None-Match by the token of whoever reads them next.
+SNAPSHOT_CACHES = {
+    'response': response_cache,
+    'blob': blob_cache,
+    'pull_files': pull_files_cache,
+    'tree': tree_cache,
+    'compare': compare_cache,
+}
+
+
+def get_writes():
+    return sum(cache.writes for cache in SNAPSHOT_CACHES.values())
+
+
+def save_snapshot(path=None):
+    """
+    Saves the entries of the caches to the file `path`, CACHE_SNAPSHOT.PATH
+    by default. The file is replaced atomically so that a process starting
+    at the same time never reads half a snapshot.
+    """
+    path = path or config.CACHE_SNAPSHOT.PATH
+    start = time.time()
+
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'caches': {name: cache.items() for name, cache in SNAPSHOT_CACHES.items()},
+    }
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(temp_path, 'wb') as snapshot_file:
+            pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    logger.info('Saved the caches to {} in {:.1f}s'.format(path, time.time() - start))
+
+
+def load_snapshot(path=None):
+    """
+    Fills the caches with the entries saved in the file `path`,
+    CACHE_SNAPSHOT.PATH by default, and returns how many were loaded.
+
+    Entries already in the caches are kept. A missing or unreadable snapshot
+    just leaves the caches as they are. Snapshots are pickles so `path` must
+    only be writable by Verba.
+    """
+    path = path or config.CACHE_SNAPSHOT.PATH
+    start = time.time()
+    try:
+        with open(path, 'rb') as snapshot_file:
+            snapshot = pickle.load(snapshot_file)
+    except FileNotFoundError:
+        return 0
+    except Exception:
+        logger.exception('Could not read the cache snapshot {}'.format(path))
+        return 0
+
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        logger.warning('Ignoring the cache snapshot {} of another version'.format(path))
+        return 0
+
+    loaded = 0
+    for name, items in snapshot['caches'].items():
+        cache = SNAPSHOT_CACHES.get(name)
+        if cache is None:
+            continue
+        # least recently used first so that the order is kept
+        for key, value in items:
+            if key not in cache:
+                cache.set(key, value)
+                loaded += 1
+
+    logger.info('Loaded {} entries from {} in {:.1f}s'.format(loaded, path, time.time() - start))
+    return loaded
+
+
+class CacheSnapshotter(object):
+    """
+    Saves the caches of this process every CACHE_SNAPSHOT.INTERVAL seconds
+    if they have changed since the last snapshot.
+    """
+    def __init__(self, path=None):
+        self.path = path or config.CACHE_SNAPSHOT.PATH
+        self._last_writes = get_writes()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def save_if_changed(self):
+        writes = get_writes()
+        if writes == self._last_writes:
+            return False
+        save_snapshot(self.path)
+        self._last_writes = writes
+        return True
+
+    def run(self):
+        while not self._stop.wait(config.CACHE_SNAPSHOT.INTERVAL):
+            try:
+                self.save_if_changed()
+            except Exception:
+                logger.exception('Could not save the cache snapshot')
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='cache-snapshotter', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+_snapshotter = None
+_snapshotter_lock = threading.Lock()
+
+
+def start_snapshots():
+    """
+    Starts the cache snapshotter of this process if not already running.
+    """
+    global _snapshotter
+    with _snapshotter_lock:
+        if _snapshotter is None:
+            _snapshotter = CacheSnapshotter()
+            _snapshotter.start()
+        return _snapshotter
+
+
+def stop_snapshots():
+    """
+    Stops the cache snapshotter of this process, if running, and saves the
+    caches one last time if they have changed.
+    """
+    global _snapshotter
+    with _snapshotter_lock:
+        if _snapshotter is not None:
+            _snapshotter.stop()
+            try:
+                _snapshotter.save_if_changed()
+            except Exception:
+                logger.exception('Could not save the cache snapshot')
+            _snapshotter = None
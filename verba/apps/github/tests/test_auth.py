@@ -1,8 +1,11 @@
 import json
 import responses
 
+from django.core.cache import cache
+from django.test import override_settings
 
-from github.auth import get_token
+from github.api import RepoRequest, APIRequest
+from github.auth import get_token, get_shared_read_token, SharedReadToken
 from github.exceptions import AuthValidationError
 
 from github.tests.test_base import BaseGithubTestCase
@@ -48,3 +51,81 @@ class GetTokenTestCase(BaseGithubTestCase):
         )
 
         self.assertRaises(AuthValidationError, get_token, code='code')
+
+
+@override_settings(VERBA_GITHUB_TOKEN='service-token')
+class SharedReadTokenTestCase(BaseGithubTestCase):
+    def setUp(self):
+        super(SharedReadTokenTestCase, self).setUp()
+        cache.clear()
+        self.repo_url = self.get_github_api_repo_url('')[:-1]
+        self.pulls_url = self.get_github_api_repo_url('pulls')
+
+    def add_repo_response(self, status=200, pull=True):
+        responses.add(
+            responses.GET, self.repo_url,
+            body=json.dumps({'permissions': {'pull': pull}}), status=status,
+            content_type='application/json'
+        )
+
+    def get_authorization(self, call):
+        return call.request.headers['Authorization']
+
+    def test_without_service_token(self):
+        with self.settings(VERBA_GITHUB_TOKEN=None):
+            self.assertFalse(isinstance(get_shared_read_token(self.TOKEN), SharedReadToken))
+
+    @responses.activate
+    def test_reads_with_service_token(self):
+        self.add_repo_response()
+        responses.add(
+            responses.GET, self.pulls_url,
+            body=json.dumps([]), status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.pulls_url,
+            body=json.dumps({}), status=201, content_type='application/json'
+        )
+
+        token = get_shared_read_token(self.TOKEN)
+        self.assertEqual(token, self.TOKEN)
+
+        RepoRequest(token).set_url('pulls').get()
+        RepoRequest(token).set_url('pulls').post({})
+
+        # access checked with the user token, read with the service one, written with the user one
+        self.assertEqual(self.get_authorization(responses.calls[0]), 'token {}'.format(self.TOKEN))
+        self.assertEqual(self.get_authorization(responses.calls[1]), 'token service-token')
+        self.assertEqual(self.get_authorization(responses.calls[2]), 'token {}'.format(self.TOKEN))
+
+    @responses.activate
+    def test_access_cached(self):
+        self.add_repo_response()
+
+        for _ in range(2):
+            self.assertEqual(get_shared_read_token(self.TOKEN).read_token, 'service-token')
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_user_reads_not_shared(self):
+        responses.add(
+            responses.GET, self.get_github_api_url('user'),
+            body=json.dumps({}), status=200, content_type='application/json'
+        )
+
+        APIRequest(get_shared_read_token(self.TOKEN)).set_url('user').get()
+
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(self.get_authorization(responses.calls[0]), 'token {}'.format(self.TOKEN))
+
+    @responses.activate
+    def test_no_access(self):
+        self.add_repo_response(pull=False)
+
+        self.assertEqual(get_shared_read_token(self.TOKEN).read_token, self.TOKEN)
+
+    @responses.activate
+    def test_invalid_token(self):
+        self.add_repo_response(status=401)
+
+        self.assertEqual(get_shared_read_token(self.TOKEN).read_token, self.TOKEN)
@@ -4,10 +4,20 @@ from verba_settings import config
 
 from django.test import SimpleTestCase
 
+from github.cache import response_cache, blob_cache, pull_files_cache, tree_cache, compare_cache
+
 
 class BaseGithubTestCase(SimpleTestCase):
     TOKEN = '123abc'
 
+    def setUp(self):
+        super(BaseGithubTestCase, self).setUp()
+        response_cache.clear()
+        blob_cache.clear()
+        pull_files_cache.clear()
+        tree_cache.clear()
+        compare_cache.clear()
+
     def get_github_http_url(self, url_part):
         return '{}/{}'.format(
             config.GITHUB_HTTP_HOST,
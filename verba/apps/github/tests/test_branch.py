@@ -2,7 +2,7 @@ import json
 import responses
 
 import github
-from github.exceptions import InvalidResponseException
+from github.exceptions import InvalidResponseException, NotFoundException, ConflictException
 
 from github.tests.test_base import BaseGithubTestCase
 
@@ -94,9 +94,10 @@ class GetGitTreeTestCase(BaseBranchTestCase):
             content_type='application/json'
         )
 
-        response = self.branch.get_git_tree(path=self.path, recursive=True)
-        self.assertTrue('tree' in response)
-        self.assertEqual(len(response['tree']), 4)
+        tree_sha, entries = self.branch.get_git_tree(path=self.path, recursive=True)
+        self.assertEqual(tree_sha, json.loads(self.get_fixture('git_tree.json'))['sha'])
+        self.assertEqual(len(entries), 4)
+        self.assertTrue(all(isinstance(entry, github.TreeEntry) for entry in entries))
 
     @responses.activate
     def test_invalid_path(self):
@@ -116,6 +117,116 @@ class GetGitTreeTestCase(BaseBranchTestCase):
         )
 
 
+class PinnedBranchTestCase(BaseBranchTestCase):
+    def setUp(self):
+        super(PinnedBranchTestCase, self).setUp()
+        self.branch = github.Branch(self.TOKEN, self.branch_name, sha='head-sha')
+        self.ref_url = self.get_github_api_repo_url('git/refs/heads/{}'.format(self.branch_name))
+
+    def add_commit_responses(self, ref_status=200):
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/commits/head-sha'),
+            body=json.dumps({'tree': {'sha': 'head-tree-sha'}}), status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/trees'),
+            body=json.dumps({'sha': 'new-tree-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/commits'),
+            body=json.dumps({'sha': 'new-commit-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.PATCH, self.ref_url,
+            body=json.dumps({'message': 'Update is not a fast forward'}), status=ref_status,
+            content_type='application/json'
+        )
+
+    @responses.activate
+    def test_reads_at_sha(self):
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/trees/head-sha:{}'.format(self.path)),
+            body=self.get_fixture('git_tree.json'), status=200,
+            content_type='application/json'
+        )
+
+        files = self.branch.get_dir_files(path=self.path)
+        self.branch.get_git_tree(path=self.path, recursive=True)
+
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual({_file.ref for _file in files}, {'head-sha'})
+        self.assertEqual(self.branch.get_file('some-path').ref, 'head-sha')
+
+    @responses.activate
+    def test_commit_on_top_of_sha(self):
+        self.add_commit_responses()
+
+        commit_sha = self.branch.commit_blobs({'pages/page1/manifest.json': 'blob-sha'}, message='some message')
+
+        self.assertEqual(commit_sha, 'new-commit-sha')
+        # the ref isn't looked up
+        self.assertEqual(len(responses.calls), 4)
+        self.assertEqual(json.loads(responses.calls[2].request.body)['parents'], ['head-sha'])
+        self.assertEqual(self.branch.sha, 'new-commit-sha')
+
+    @responses.activate
+    def test_commit_conflict(self):
+        self.add_commit_responses(ref_status=422)
+
+        self.assertRaises(
+            ConflictException,
+            self.branch.commit_blobs, {'pages/page1/manifest.json': 'blob-sha'}, message='some message'
+        )
+        self.assertEqual(self.branch.sha, 'head-sha')
+
+    @responses.activate
+    def test_commit_error(self):
+        self.add_commit_responses(ref_status=500)
+
+        with self.assertRaises(InvalidResponseException) as context:
+            self.branch.commit_blobs({'pages/page1/manifest.json': 'blob-sha'}, message='some message')
+        self.assertNotIsInstance(context.exception, ConflictException)
+
+
+class GetTreeTestCase(BaseGithubTestCase):
+    @responses.activate
+    def test_cached_by_sha(self):
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/trees/head-sha:pages'),
+            body=json.dumps({
+                'sha': 'tree-sha',
+                'tree': [
+                    {'path': 'page1', 'type': 'tree', 'sha': 'page1-sha'},
+                    {'path': 'README.md', 'type': 'blob', 'sha': 'readme-sha'},
+                ]
+            }), status=200,
+            content_type='application/json'
+        )
+
+        repo = github.Repo(self.TOKEN)
+        sha, entries = repo.get_tree('head-sha:pages')
+        self.assertEqual(sha, 'tree-sha')
+        self.assertEqual(entries, (
+            github.TreeEntry(name='page1', type='tree', sha='page1-sha'),
+            github.TreeEntry(name='README.md', type='blob', sha='readme-sha'),
+        ))
+
+        # no more requests, by tree-ish or by sha
+        self.assertEqual(repo.get_tree('head-sha:pages'), (sha, entries))
+        self.assertEqual(repo.get_tree('tree-sha'), (sha, entries))
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_not_found(self):
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/trees/head-sha:pages/missing'),
+            body=json.dumps({'message': 'Not Found'}),
+            status=404, content_type='application/json'
+        )
+
+        self.assertRaises(NotFoundException, github.Repo(self.TOKEN).get_tree, 'head-sha:pages/missing')
+
+
 class GetDirFilesTestCase(BaseBranchTestCase):
     @responses.activate
     def test_valid(self):
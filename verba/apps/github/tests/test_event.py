@@ -0,0 +1,49 @@
+import json
+import responses
+
+import github
+
+from github.tests.test_base import BaseGithubTestCase
+
+
+class EventPollTestCase(BaseGithubTestCase):
+    def setUp(self):
+        super(EventPollTestCase, self).setUp()
+        self.url = self.get_github_api_repo_url('events')
+        self.events_data = [
+            {'id': '2', 'type': 'PushEvent', 'payload': {'ref': 'refs/heads/develop'}},
+            {'id': '1', 'type': 'PullRequestEvent', 'payload': {}},
+        ]
+
+    @responses.activate
+    def test_poll(self):
+        responses.add(
+            responses.GET, self.url,
+            body=json.dumps(self.events_data), status=200,
+            content_type='application/json',
+            adding_headers={'X-Poll-Interval': '120'}
+        )
+
+        events, poll_interval = github.Repo(self.TOKEN).poll_events()
+
+        self.assertEqual(poll_interval, 120)
+        self.assertEqual([event.id for event in events], [2, 1])
+        self.assertEqual(events[0].type, 'PushEvent')
+        self.assertEqual(events[0].ref, 'refs/heads/develop')
+        self.assertEqual(events[1].ref, None)
+
+    @responses.activate
+    def test_not_modified(self):
+        def callback(request):
+            if request.headers.get('If-None-Match') == '"etag"':
+                return (304, {'X-Poll-Interval': '90'}, '')
+            return (200, {'ETag': '"etag"'}, json.dumps(self.events_data))
+
+        responses.add_callback(responses.GET, self.url, callback=callback, content_type='application/json')
+
+        _, poll_interval = github.Event.poll(self.TOKEN)
+        self.assertEqual(poll_interval, github.Event.DEFAULT_POLL_INTERVAL)
+
+        events, poll_interval = github.Event.poll(self.TOKEN)
+        self.assertEqual(poll_interval, 90)
+        self.assertEqual([event.id for event in events], [2, 1])
@@ -1,8 +1,14 @@
 import json
+import base64
+import threading
 import responses
+from unittest import mock
+
+from django.conf import settings
 
 import github
-from github.exceptions import InvalidResponseException
+from github.cache import blob_cache
+from github.exceptions import InvalidResponseException, FileTooLargeException, ConflictException
 
 from github.tests.test_base import BaseGithubTestCase
 
@@ -22,9 +28,9 @@ class BaseFileTestCase(BaseGithubTestCase):
 
 class FileDataTestCase(BaseFileTestCase):
     def test_name(self):
-        setattr(self.file, '_cached_data', {
+        setattr(self.file, '_cached_data', github.FileData.from_json({
             'name': self.file_name
-        })
+        }))
         self.assertEqual(self.file.name, self.file_name)
 
     @responses.activate
@@ -39,6 +45,42 @@ class FileDataTestCase(BaseFileTestCase):
         self.assertEqual(self.file.name, self.file_name)  # intentional
         self.assertEqual(len(responses.calls), 1)  # should be 1 not 2
 
+    @responses.activate
+    def test_get_data_from_many_threads(self):
+        responses.add(
+            responses.GET, self.file_content_github_url,
+            body=self.get_fixture('file_contents.json'),
+            status=200, content_type='application/json'
+        )
+
+        names = []
+        threads = [
+            threading.Thread(target=lambda: names.append(self.file.name))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(names, [self.file_name] * 10)
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_get_data_at_ref(self):
+        responses.add(
+            responses.GET, self.file_content_github_url,
+            body=self.get_fixture('file_contents.json'),
+            status=200, content_type='application/json'
+        )
+
+        # read at a commit => cached forever, also by other instances
+        for _ in range(2):
+            git_file = github.File(self.TOKEN, self.path, self.branch_name, ref='head-sha')
+            self.assertEqual(git_file.name, self.file_name)
+        self.assertEqual(len(responses.calls), 1)
+        self.assertTrue('ref=head-sha' in responses.calls[0].request.url)
+
 
 class CreateFileTestCase(BaseFileTestCase):
     @responses.activate
@@ -96,22 +138,45 @@ class CreateFileTestCase(BaseFileTestCase):
 
 
 class ContentFileTestCase(BaseFileTestCase):
+    @responses.activate
     def test_get(self):
-        setattr(self.file, '_cached_data', {
-            'content': 'SW5kZXgKLS0tLS0KdGhpcyBpcyBhIHRlc3QK\n'
+        responses.add(
+            responses.GET, self.file_content_github_url,
+            body=self.get_fixture('file_contents.json'),
+            status=200, content_type='application/json'
+        )
+        self.assertEqual(self.file.content, "Index\n-----\nthis is a test\n")
+        self.assertEqual(len(responses.calls), 1)
+
+    def test_content_kept_once_by_sha(self):
+        data = github.api.project_file({
+            'name': self.file_name,
+            'content': 'SW5kZXgKLS0tLS0KdGhpcyBpcyBhIHRlc3QK\n',
+            'sha': 'abcdf'
         })
+        setattr(self.file, '_cached_data', data)
+
+        self.assertEqual(data, github.FileData(name=self.file_name, sha='abcdf', size=0))
+        self.assertEqual(blob_cache.get('abcdf'), "Index\n-----\nthis is a test\n")
         self.assertEqual(self.file.content, "Index\n-----\nthis is a test\n")
 
+    def test_get_with_known_sha_from_cache(self):
+        blob_cache.set('abcdf', 'cached content')
+
+        # no request expected
+        git_file = github.File(self.TOKEN, self.path, self.branch_name, sha='abcdf')
+        self.assertEqual(git_file.content, 'cached content')
+        self.assertEqual(git_file.sha, 'abcdf')
+
     @responses.activate
     def test_change_success(self):
         # setting content just to check that it gets overridden
-        setattr(self.file, '_cached_data', {
-            'content': 'old content',
-            'sha': 'abcdf'
-        })
+        setattr(self.file, '_cached_data', github.FileData(
+            name=self.file_name, sha='abcdf', size=11
+        ))
         responses.add(
             responses.PUT, self.file_content_github_url,
-            body=self.get_fixture('file_contents.json'),
+            body=self.get_fixture('new_file.json'),
             status=200, content_type='application/json'
         )
 
@@ -119,4 +184,211 @@ class ContentFileTestCase(BaseFileTestCase):
             new_content='some content',
             message='new message'
         )
-        self.assertEqual(self.file.content, "Index\n-----\nthis is a test\n")
+        self.assertEqual(self.file.content, 'some content')
+        self.assertEqual(json.loads(responses.calls[0].request.body)['sha'], 'abcdf')
+
+    @responses.activate
+    def test_change_at_ref_moves_ref(self):
+        git_file = github.File(self.TOKEN, self.path, self.branch_name, sha='abcdf', ref='head-sha')
+        responses.add(
+            responses.PUT, self.file_content_github_url,
+            body=self.get_fixture('new_file.json'),
+            status=200, content_type='application/json'
+        )
+
+        git_file.change_content(new_content='some content', message='new message')
+
+        self.assertEqual(git_file.ref, 'ad2367e783cf6ae1b0c57e4a2d37135799176825')
+
+    @responses.activate
+    def test_change_conflict(self):
+        setattr(self.file, '_cached_data', github.FileData(
+            name=self.file_name, sha='abcdf', size=11
+        ))
+        responses.add(
+            responses.PUT, self.file_content_github_url,
+            body=json.dumps({'message': 'pages/index/manifest.json does not match abcdf'}),
+            status=409, content_type='application/json'
+        )
+
+        self.assertRaises(
+            ConflictException,
+            self.file.change_content, new_content='some content', message='new message'
+        )
+
+
+class LargeFileTestCase(BaseFileTestCase):
+    def setUp(self):
+        super(LargeFileTestCase, self).setUp()
+        self.blob_url = self.get_github_api_repo_url('git/blobs/abcdf')
+
+    @responses.activate
+    def test_get_content_through_blob(self):
+        # the contents API doesn't return the content of files > 1MB
+        responses.add(
+            responses.GET, self.file_content_github_url,
+            body=json.dumps({'name': self.file_name, 'sha': 'abcdf', 'size': 2000, 'encoding': 'none', 'content': ''}),
+            status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.GET, self.blob_url,
+            body='large content', status=200, content_type='application/vnd.github.v3.raw'
+        )
+
+        self.assertEqual(self.file.content, 'large content')
+        self.assertEqual(
+            responses.calls[1].request.headers['Accept'], 'application/vnd.github.v3.raw'
+        )
+
+    @mock.patch.dict(settings.VERBA_CONFIG['FILES'], {'MAX_SIZE': 10})
+    def test_get_content_too_large(self):
+        setattr(self.file, '_cached_data', github.FileData.from_json(
+            {'sha': 'abcdf', 'size': 2000, 'encoding': 'none', 'content': ''}
+        ))
+
+        self.assertRaises(
+            FileTooLargeException,
+            getattr, self.file, 'content'
+        )
+
+    @responses.activate
+    @mock.patch.dict(settings.VERBA_CONFIG['FILES'], {'MAX_SIZE': 10})
+    def test_get_blob_too_large(self):
+        responses.add(
+            responses.GET, self.blob_url,
+            body='content larger than 10 bytes', status=200, content_type='application/vnd.github.v3.raw'
+        )
+
+        git_file = github.File(self.TOKEN, self.path, self.branch_name, sha='abcdf')
+        self.assertRaises(
+            FileTooLargeException,
+            getattr, git_file, 'content'
+        )
+
+    @mock.patch.dict(settings.VERBA_CONFIG['FILES'], {'MAX_SIZE': 10})
+    def test_save_too_large(self):
+        self.assertRaises(
+            FileTooLargeException,
+            github.File.create,
+            self.TOKEN, path=self.path, branch_name=self.branch_name,
+            content='content larger than 10 bytes', message='some message'
+        )
+
+    @responses.activate
+    @mock.patch.dict(settings.VERBA_CONFIG['FILES'], {'LARGE_SIZE': 10})
+    def test_save_through_git_data_api(self):
+        content = 'content larger than 10 bytes'
+        ref_url = self.get_github_api_repo_url('git/refs/heads/{}'.format(self.branch_name))
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/blobs'),
+            body=json.dumps({'sha': 'new-blob-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.GET, ref_url,
+            body=json.dumps({'object': {'sha': 'head-sha'}}), status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/commits/head-sha'),
+            body=json.dumps({'tree': {'sha': 'head-tree-sha'}}), status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/trees'),
+            body=json.dumps({'sha': 'new-tree-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/commits'),
+            body=json.dumps({'sha': 'new-commit-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.PATCH, ref_url,
+            body=json.dumps({'object': {'sha': 'new-commit-sha'}}), status=200, content_type='application/json'
+        )
+
+        git_file = github.File.create(
+            self.TOKEN, path=self.path, branch_name=self.branch_name,
+            content=content, message='some message'
+        )
+
+        # blob sent base64 encoded
+        blob_data = json.loads(b''.join(responses.calls[0].request.body).decode('utf-8'))
+        self.assertEqual(blob_data['encoding'], 'base64')
+        self.assertEqual(base64.b64decode(blob_data['content']).decode('utf-8'), content)
+
+        # single commit on top of the branch
+        tree_data = json.loads(responses.calls[3].request.body)
+        self.assertEqual(tree_data['base_tree'], 'head-tree-sha')
+        self.assertEqual(tree_data['tree'][0]['path'], self.path)
+        self.assertEqual(tree_data['tree'][0]['sha'], 'new-blob-sha')
+        commit_data = json.loads(responses.calls[4].request.body)
+        self.assertEqual(commit_data['parents'], ['head-sha'])
+        self.assertEqual(json.loads(responses.calls[5].request.body), {'sha': 'new-commit-sha'})
+
+        self.assertEqual(git_file.name, self.file_name)
+        self.assertEqual(git_file.content, content)
+
+    @responses.activate
+    @mock.patch.dict(settings.VERBA_CONFIG['FILES'], {'LARGE_SIZE': 10})
+    def test_change_through_git_data_api_at_ref(self):
+        git_file = github.File(self.TOKEN, self.path, self.branch_name, sha='abcdf', ref='head-sha')
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/blobs'),
+            body=json.dumps({'sha': 'new-blob-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/commits/head-sha'),
+            body=json.dumps({'tree': {'sha': 'head-tree-sha'}}), status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/trees'),
+            body=json.dumps({'sha': 'new-tree-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/commits'),
+            body=json.dumps({'sha': 'new-commit-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.PATCH, self.get_github_api_repo_url('git/refs/heads/{}'.format(self.branch_name)),
+            body=json.dumps({'object': {'sha': 'new-commit-sha'}}), status=200, content_type='application/json'
+        )
+
+        git_file.change_content(new_content='content larger than 10 bytes', message='some message')
+
+        # committed on top of the ref the file was read at, without looking the branch up
+        self.assertEqual(json.loads(responses.calls[3].request.body)['parents'], ['head-sha'])
+        self.assertEqual(git_file.ref, 'new-commit-sha')
+
+    @responses.activate
+    @mock.patch.dict(settings.VERBA_CONFIG['FILES'], {'LARGE_SIZE': 10})
+    def test_change_through_git_data_api_conflict(self):
+        git_file = github.File(self.TOKEN, self.path, self.branch_name, sha='abcdf')
+        ref_url = self.get_github_api_repo_url('git/refs/heads/{}'.format(self.branch_name))
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/blobs'),
+            body=json.dumps({'sha': 'new-blob-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.GET, ref_url,
+            body=json.dumps({'object': {'sha': 'head-sha'}}), status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/commits/head-sha'),
+            body=json.dumps({'tree': {'sha': 'head-tree-sha'}}), status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/trees'),
+            body=json.dumps({'sha': 'new-tree-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/commits'),
+            body=json.dumps({'sha': 'new-commit-sha'}), status=201, content_type='application/json'
+        )
+        # the branch moved after it was looked up
+        responses.add(
+            responses.PATCH, ref_url,
+            body=json.dumps({'message': 'Update is not a fast forward'}), status=422, content_type='application/json'
+        )
+
+        self.assertRaises(
+            ConflictException,
+            git_file.change_content, new_content='content larger than 10 bytes', message='some message'
+        )
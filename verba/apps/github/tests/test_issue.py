@@ -1,6 +1,8 @@
 import json
 import responses
 
+from verba_settings import config
+
 import github
 from github.exceptions import InvalidResponseException
 
@@ -174,3 +176,58 @@ class IssueCommentsTestCase(BaseIssueTestCase):
             InvalidResponseException,
             self.issue.add_comment, ''
         )
+
+
+class IssueSearchTestCase(BaseGithubTestCase):
+    def setUp(self):
+        super(IssueSearchTestCase, self).setUp()
+        self.url = self.get_github_api_url('search/issues')
+        self.search_data = {
+            'total_count': 1,
+            'incomplete_results': False,
+            'items': [{
+                'number': 1,
+                'title': 'Test revision',
+                'updated_at': '2016-08-06T10:05:12Z',
+                'labels': [{'name': 'draft'}],
+                'assignees': [{'login': 'user1'}],
+            }]
+        }
+
+    @responses.activate
+    def test_search(self):
+        responses.add(
+            responses.GET, self.url,
+            body=json.dumps(self.search_data), status=200,
+            content_type='application/json'
+        )
+
+        issues = github.Repo(self.TOKEN).search_pulls(['assignee:user1'])
+
+        self.assertEqual(len(issues), 1)
+        self.assertEqual(issues[0].number, 1)
+        self.assertEqual(issues[0].title, 'Test revision')
+        self.assertEqual(issues[0].labels, ['draft'])
+        self.assertEqual(issues[0].assignees, ['user1'])
+        self.assertIn(
+            'q=repo%3A{}+is%3Apr+assignee%3Auser1'.format(config.REPO.replace('/', '%2F')),
+            responses.calls[0].request.url
+        )
+
+    @responses.activate
+    def test_conditional(self):
+        calls = []
+
+        def callback(request):
+            calls.append(request.headers.get('If-None-Match'))
+            if request.headers.get('If-None-Match') == '"etag"':
+                return (304, {}, '')
+            return (200, {'ETag': '"etag"'}, json.dumps(self.search_data))
+
+        responses.add_callback(responses.GET, self.url, callback=callback, content_type='application/json')
+
+        github.Issue.search(self.TOKEN, ['is:pr'])
+        issues = github.Issue.search(self.TOKEN, ['is:pr'])
+
+        self.assertEqual(calls, [None, '"etag"'])
+        self.assertEqual(issues[0].number, 1)
@@ -1,5 +1,7 @@
+import sys
 import json
 import responses
+from unittest import mock
 
 from django.utils.dateparse import parse_datetime
 
@@ -21,9 +23,15 @@ class BasePullTestCase(BaseGithubTestCase):
             'title': 'pull title',
             'body': 'pull body',
             'head': {
-                'ref': 'pull head ref'
+                'ref': 'pull head ref',
+                'sha': 'pull head sha'
+            },
+            'base': {
+                'ref': 'develop',
+                'sha': 'pull base sha'
             },
             'created_at': "2016-08-05T13:15:21Z",
+            'updated_at': "2016-08-06T10:05:12Z",
             'comments': 12
         }
         self.pull = github.PullRequest(self.TOKEN, self.data)
@@ -36,11 +44,35 @@ class PullDataTestCase(BasePullTestCase):
         self.assertEqual(self.pull.description, self.data['body'])
         self.assertEqual(self.pull.head_ref, self.data['head']['ref'])
         self.assertEqual(self.pull.created_at, parse_datetime(self.data['created_at']))
+        self.assertEqual(self.pull.updated_at, parse_datetime(self.data['updated_at']))
+        self.assertEqual(self.pull.head_sha, self.data['head']['sha'])
+        self.assertEqual(self.pull.base_sha, self.data['base']['sha'])
         self.assertEqual(self.pull.tot_comments, self.data['comments'])
 
     def test_branch(self):
         self.assertEqual(self.pull.branch.token, self.pull.token)
         self.assertEqual(self.pull.branch.name, self.pull.head_ref)
+        self.assertEqual(self.pull.branch.sha, self.pull.head_sha)
+
+    @responses.activate
+    def test_refresh_shas(self):
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/refs/heads/pull%20head%20ref'),
+            body=json.dumps({'object': {'sha': 'pushed head sha'}}), status=200,
+            content_type='application/json', adding_headers={'ETag': '"abc"'}
+        )
+
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/refs/heads/develop'),
+            body=json.dumps({'object': {'sha': 'pushed base sha'}}), status=200,
+            content_type='application/json', adding_headers={'ETag': '"def"'}
+        )
+
+        self.pull.refresh_shas()
+
+        self.assertEqual(self.pull.head_sha, 'pushed head sha')
+        self.assertEqual(self.pull.branch.sha, 'pushed head sha')
+        self.assertEqual(self.pull.base_sha, 'pushed base sha')
 
     @responses.activate
     def test_issue(self):
@@ -52,7 +84,44 @@ class PullDataTestCase(BasePullTestCase):
 
         issue = self.pull.issue
         self.assertEqual(issue.token, self.TOKEN)
-        self.assertEqual(issue._data['title'], 'test1')
+        self.assertEqual(issue.title, 'test1')
+
+
+def get_deep_size(obj, seen=None):
+    """
+    Returns the bytes taken by `obj` and everything it references.
+    """
+    seen = seen or set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(get_deep_size(key, seen) + get_deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(get_deep_size(item, seen) for item in obj)
+    return size
+
+
+class PullFootprintTestCase(BasePullTestCase):
+    def test_bytes_per_cached_revision(self):
+        """
+        A revision is a pull request and its issue in the response cache:
+        ~23KB of raw JSON (~51KB once parsed) against less than 2KB of records.
+        """
+        pull_content = self.get_fixture('open_pull.json').encode('utf-8')
+        issue_content = self.get_fixture('issue.json').encode('utf-8')
+        raw_size = sys.getsizeof(pull_content) + sys.getsizeof(issue_content)
+
+        records = (
+            github.PullData.from_json(json.loads(pull_content.decode('utf-8'))),
+            github.IssueData.from_json(json.loads(issue_content.decode('utf-8')))
+        )
+        size = sum(get_deep_size(record) for record in records)
+
+        self.assertLess(size, 2048)
+        self.assertLess(size * 10, raw_size)
 
 
 class GetAllPullTestCase(BasePullTestCase):
@@ -73,6 +142,32 @@ class GetAllPullTestCase(BasePullTestCase):
         self.assertEqual(pulls[1].token, self.TOKEN)
         self.assertEqual(pulls[1].title, 'test2')
 
+    @responses.activate
+    def test_all_pages(self):
+        url = self.get_github_api_repo_url('pulls')
+        next_link = '<{}?per_page=100&page=2>; rel="next"'.format(url)
+        github_responses = [
+            (200, {'ETag': '"page1"', 'Link': next_link}, json.dumps([{'number': 1}, {'number': 2}])),
+            (200, {'ETag': '"page2"'}, json.dumps([{'number': 3}])),
+            # revalidated page by page
+            (304, {'Link': next_link}, ''),
+            (304, {}, ''),
+        ]
+        responses.add_callback(
+            responses.GET, url,
+            callback=lambda request: github_responses.pop(0),
+            content_type='application/json'
+        )
+
+        for _ in range(2):
+            pulls = github.PullRequest.all(self.TOKEN)
+            self.assertEqual([pull.issue_nr for pull in pulls], [1, 2, 3])
+
+        self.assertEqual(len(responses.calls), 4)
+        self.assertTrue('per_page=100' in responses.calls[0].request.url)
+        self.assertTrue('page=2' in responses.calls[1].request.url)
+        self.assertEqual(responses.calls[3].request.headers['If-None-Match'], '"page2"')
+
 
 class GetPullTestCase(BasePullTestCase):
     @responses.activate
@@ -236,6 +331,34 @@ class ClosePullTestCase(BasePullTestCase):
         self.pull.close()
 
 
+class ComparisonPullTestCase(BasePullTestCase):
+    @responses.activate
+    def test_cached_by_shas(self):
+        self.pull._data = self.pull._data._replace(base_sha='base-sha', head_sha='head-sha')
+        compare_url = self.get_github_api_repo_url('compare/base-sha...head-sha')
+        responses.add(
+            responses.GET, compare_url,
+            body=json.dumps({
+                'ahead_by': 2,
+                'behind_by': 12,
+                'files': [{
+                    'filename': 'pages/page1/manifest.json', 'status': 'modified',
+                    'additions': 3, 'deletions': 1, 'patch': '@@ -1 +1,3 @@'
+                }]
+            }), status=200,
+            content_type='application/json'
+        )
+
+        for _ in range(2):
+            self.assertEqual(self.pull.comparison, github.Comparison(
+                ahead_by=2, behind_by=12,
+                files=(github.ChangedFile(
+                    path='pages/page1/manifest.json', status='modified', additions=3, deletions=1
+                ),)
+            ))
+        self.assertEqual(len(responses.calls), 1)
+
+
 class DiffPullTestCase(BasePullTestCase):
     @responses.activate
     def test_success(self):
@@ -247,3 +370,72 @@ class DiffPullTestCase(BasePullTestCase):
         )
 
         self.assertEqual(self.pull.diff, diff)
+
+    @responses.activate
+    def test_stream(self):
+        diff = 'diff line\n' * 10000
+        responses.add(
+            responses.GET, self.data['diff_url'],
+            body=diff, status=200,
+            content_type='text/plain'
+        )
+
+        chunks = list(self.pull.iter_diff())
+
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(b''.join(chunks).decode('utf-8'), diff)
+
+    @responses.activate
+    def test_stream_not_found(self):
+        responses.add(
+            responses.GET, self.data['diff_url'],
+            body='Not Found', status=404,
+            content_type='text/plain'
+        )
+
+        self.assertRaises(NotFoundException, self.pull.iter_diff)
+
+
+class FilesPullTestCase(BasePullTestCase):
+    def add_files_responses(self, pages):
+        responses.add_callback(
+            responses.GET, self.get_github_api_repo_url('pulls/1/files'),
+            callback=lambda request: (200, {}, json.dumps(pages.pop(0))),
+            content_type='application/json'
+        )
+
+    @responses.activate
+    @mock.patch.object(github.PullRequest, 'FILES_PER_PAGE', 2)
+    def test_paginated(self):
+        self.add_files_responses([
+            [
+                {'filename': 'pages/a/manifest.json'},
+                {'filename': 'pages/b/new.md', 'previous_filename': 'pages/b/old.md'}
+            ],
+            [{'filename': 'pages/c/manifest.json'}],
+        ])
+
+        self.assertEqual(
+            self.pull.files,
+            ['pages/a/manifest.json', 'pages/b/new.md', 'pages/b/old.md', 'pages/c/manifest.json']
+        )
+        self.assertEqual(len(responses.calls), 2)
+        self.assertTrue('page=2' in responses.calls[1].request.url)
+
+    @responses.activate
+    def test_cached_by_head_sha(self):
+        self.add_files_responses([
+            [{'filename': 'pages/a/manifest.json'}],
+            [{'filename': 'pages/b/manifest.json'}],
+        ])
+
+        self.assertEqual(self.pull.files, ['pages/a/manifest.json'])
+        self.assertEqual(
+            github.PullRequest(self.TOKEN, self.data).files, ['pages/a/manifest.json']
+        )
+        self.assertEqual(len(responses.calls), 1)
+
+        self.data['head']['sha'] = 'new head sha'
+        self.assertEqual(
+            github.PullRequest(self.TOKEN, self.data).files, ['pages/b/manifest.json']
+        )
@@ -0,0 +1,108 @@
+import json
+import responses
+
+from github.api import RepoRequest, PullData
+from github.cache import LRUCache, response_cache
+
+from github.tests.test_base import BaseGithubTestCase
+
+
+class ConditionalRequestTestCase(BaseGithubTestCase):
+    def setUp(self):
+        super(ConditionalRequestTestCase, self).setUp()
+        self.url = self.get_github_api_repo_url('pulls')
+
+    def add_responses(self, method, url, *github_responses):
+        """
+        Registers `github_responses`, a list of (status, headers, body),
+        to be returned in order by consecutive requests to `url`.
+        """
+        github_responses = list(github_responses)
+        responses.add_callback(
+            method, url,
+            callback=lambda request: github_responses.pop(0),
+            content_type='application/json'
+        )
+
+    @responses.activate
+    def test_not_modified_uses_cached_content(self):
+        self.add_responses(
+            responses.GET, self.url,
+            (200, {'ETag': '"abc"'}, json.dumps([{'number': 1}])),
+            (304, {}, '')
+        )
+
+        self.assertEqual(RepoRequest(self.TOKEN).set_url('pulls').get(), [{'number': 1}])
+        self.assertEqual(RepoRequest(self.TOKEN).set_url('pulls').get(), [{'number': 1}])
+
+        self.assertEqual(len(responses.calls), 2)
+        self.assertFalse('If-None-Match' in responses.calls[0].request.headers)
+        self.assertEqual(responses.calls[1].request.headers['If-None-Match'], '"abc"')
+
+    @responses.activate
+    def test_modified(self):
+        self.add_responses(
+            responses.GET, self.url,
+            (200, {'ETag': '"abc"'}, json.dumps([{'number': 1}])),
+            (200, {'ETag': '"def"'}, json.dumps([{'number': 2}]))
+        )
+
+        RepoRequest(self.TOKEN).set_url('pulls').get()
+        self.assertEqual(RepoRequest(self.TOKEN).set_url('pulls').get(), [{'number': 2}])
+
+    @responses.activate
+    def test_immutable_not_revalidated(self):
+        url = self.get_github_api_repo_url('git/trees/head-sha:pages')
+        self.add_responses(
+            responses.GET, url,
+            (200, {'ETag': '"abc"'}, json.dumps({'sha': 'tree-sha'}))
+        )
+
+        for _ in range(2):
+            tree_data = RepoRequest(self.TOKEN).set_url('git/trees/head-sha:pages').set_immutable(True).get()
+            self.assertEqual(tree_data, {'sha': 'tree-sha'})
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_projection_cached(self):
+        self.add_responses(
+            responses.GET, self.url,
+            (200, {'ETag': '"abc"'}, json.dumps([{'number': 1, 'head': {'sha': 'head-sha'}}])),
+            (304, {}, '')
+        )
+
+        pulls = RepoRequest(self.TOKEN).set_url('pulls').set_projection(PullData.from_json_list).get()
+        self.assertEqual(pulls[0].number, 1)
+        self.assertEqual(pulls[0].head_sha, 'head-sha')
+
+        # the record is kept instead of the raw body and returned as is on a 304
+        request = RepoRequest(self.TOKEN).set_url('pulls').set_projection(PullData.from_json_list)
+        self.assertEqual(response_cache.get(request._build_cache_key({})), ('"abc"', pulls))
+        self.assertTrue(request.get() is pulls)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_writes_are_not_conditional(self):
+        responses.add(
+            responses.POST, self.url,
+            body=json.dumps({'number': 1}), status=201,
+            content_type='application/json', adding_headers={'ETag': '"abc"'}
+        )
+
+        RepoRequest(self.TOKEN).set_url('pulls').post({})
+        RepoRequest(self.TOKEN).set_url('pulls').post({})
+        self.assertFalse('If-None-Match' in responses.calls[1].request.headers)
+
+
+class LRUCacheTestCase(BaseGithubTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertFalse('b' in cache)
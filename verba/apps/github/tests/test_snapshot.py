@@ -0,0 +1,101 @@
+import os
+import json
+import shutil
+import tempfile
+import responses
+from unittest import mock
+
+from github.api import RepoRequest, PullData
+from github.cache import response_cache, blob_cache, tree_cache
+from github.snapshot import save_snapshot, load_snapshot, CacheSnapshotter
+
+from github.tests.test_base import BaseGithubTestCase
+
+
+class BaseSnapshotTestCase(BaseGithubTestCase):
+    def setUp(self):
+        super(BaseSnapshotTestCase, self).setUp()
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        self.path = os.path.join(temp_dir, 'snapshot')
+
+
+class SnapshotTestCase(BaseSnapshotTestCase):
+    def test_save_and_load(self):
+        blob_cache.set('blob-sha', 'content')
+        tree_cache.set('tree-sha', ('tree-sha', ()))
+        response_cache.set('key', ('"etag"', PullData.from_json({'number': 1})))
+        save_snapshot(self.path)
+        blob_cache.clear()
+        tree_cache.clear()
+        response_cache.clear()
+
+        self.assertEqual(load_snapshot(self.path), 3)
+        self.assertEqual(blob_cache.get('blob-sha'), 'content')
+        self.assertEqual(tree_cache.get('tree-sha'), ('tree-sha', ()))
+        self.assertEqual(response_cache.get('key')[1].number, 1)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['snapshot'])
+
+    def test_keeps_newer_entries(self):
+        blob_cache.set('blob-sha', 'old content')
+        save_snapshot(self.path)
+        blob_cache.set('blob-sha', 'new content')
+
+        self.assertEqual(load_snapshot(self.path), 0)
+        self.assertEqual(blob_cache.get('blob-sha'), 'new content')
+
+    def test_missing(self):
+        self.assertEqual(load_snapshot(self.path), 0)
+
+    @mock.patch('github.snapshot.logger')
+    def test_corrupted(self, mocked_logger):
+        with open(self.path, 'wb') as snapshot_file:
+            snapshot_file.write(b'not a snapshot')
+
+        self.assertEqual(load_snapshot(self.path), 0)
+        self.assertTrue(mocked_logger.exception.called)
+
+    @mock.patch('github.snapshot.SNAPSHOT_VERSION', 0)
+    def test_other_version(self):
+        blob_cache.set('blob-sha', 'content')
+        save_snapshot(self.path)
+        blob_cache.clear()
+
+        with mock.patch('github.snapshot.SNAPSHOT_VERSION', 1):
+            self.assertEqual(load_snapshot(self.path), 0)
+        self.assertFalse('blob-sha' in blob_cache)
+
+    @responses.activate
+    def test_revalidated_after_load(self):
+        url = self.get_github_api_repo_url('pulls/1')
+        github_responses = [
+            (200, {'ETag': '"abc"'}, json.dumps({'number': 1, 'title': 'title'})),
+            (304, {}, ''),
+        ]
+        responses.add_callback(
+            responses.GET, url,
+            callback=lambda request: github_responses.pop(0),
+            content_type='application/json'
+        )
+
+        RepoRequest(self.TOKEN).set_url('pulls/1').set_projection(PullData.from_json).get()
+        save_snapshot(self.path)
+        response_cache.clear()
+        load_snapshot(self.path)
+
+        pull_data = RepoRequest(self.TOKEN).set_url('pulls/1').set_projection(PullData.from_json).get()
+        self.assertEqual(pull_data.title, 'title')
+        self.assertEqual(responses.calls[1].request.headers['If-None-Match'], '"abc"')
+
+
+class CacheSnapshotterTestCase(BaseSnapshotTestCase):
+    def test_only_saved_if_changed(self):
+        snapshotter = CacheSnapshotter(self.path)
+
+        self.assertFalse(snapshotter.save_if_changed())
+        self.assertFalse(os.path.exists(self.path))
+
+        blob_cache.set('blob-sha', 'content')
+        self.assertTrue(snapshotter.save_if_changed())
+        self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(snapshotter.save_if_changed())
@@ -54,3 +54,27 @@ class GetLoggedInUserTestCase(BaseUserTestCase):
         )
 
         self.assertRaises(InvalidResponseException, github.User.get_logged_in, token='invalid token')
+
+
+class GetRemainingRequestsTestCase(BaseUserTestCase):
+    @responses.activate
+    def test_success(self):
+        responses.add(
+            responses.GET, self.get_github_api_url('rate_limit'),
+            body=json.dumps({'resources': {'core': {'limit': 5000, 'remaining': 4321}}}), status=200,
+            content_type='application/json'
+        )
+
+        self.assertEqual(github.User.get_remaining_requests(token=self.TOKEN), 4321)
+
+
+class CanReadRepoTestCase(BaseUserTestCase):
+    @responses.activate
+    def test_permissions(self):
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('')[:-1],
+            body=json.dumps({'permissions': {'admin': False, 'push': False, 'pull': True}}), status=200,
+            content_type='application/json'
+        )
+
+        self.assertTrue(github.User.can_read_repo(token=self.TOKEN))
@@ -0,0 +1,124 @@
+import logging
+from collections import namedtuple
+
+from github import User
+from github.exceptions import GitHubException
+
+from verba_settings import config
+
+from .forms import NewRevisionForm, BULK_ACTIONS
+from .exceptions import RevisionNotFoundException
+from .utils import get_executor
+
+
+logger = logging.getLogger('revision.bulk')
+
+# GitHub requests needed, at most, to change the state of a revision
+# (pull, head and base refs, issue, labels, assignees, comment) and to create
+# one (base branch, ref, log file, pull, issue, labels, assignees).
+REQUESTS_PER_CHANGE = 7
+REQUESTS_PER_CREATE = 7
+
+BulkResult = namedtuple('BulkResult', ['key', 'title', 'ok', 'message'])
+
+
+def get_budget(token, requests_per_item):
+    """
+    Returns how many items can be processed with the requests left in the
+    rate limits of the tokens making them: `token` for writes and, for a
+    SharedReadToken, the service token reads go through.
+    """
+    tokens = {str(token), str(getattr(token, 'read_token', token))}
+    remaining = min(User.get_remaining_requests(calling_token) for calling_token in tokens)
+    return remaining // requests_per_item
+
+
+def run_in_bulk(token, func, items, requests_per_item):
+    """
+    Applies `func` to each of `items` concurrently and returns the list of
+    BulkResult in the same order.
+
+    `func` returns a BulkResult and raises GitHubException or
+    RevisionNotFoundException for the item to be reported as failed. Items
+    over the rate limit budget are not processed.
+    """
+    budget = get_budget(token, requests_per_item)
+
+    def apply(item):
+        try:
+            return func(item)
+        except (GitHubException, RevisionNotFoundException) as e:
+            logger.warning('Bulk operation failed for {}'.format(item), exc_info=True)
+            return BulkResult(key=item, title='', ok=False, message=str(e))
+
+    executor = get_executor('bulk', config.CONCURRENCY.BULK)
+    results = list(executor.map(apply, items[:budget]))
+    results += [
+        BulkResult(key=item, title='', ok=False, message='Skipped, not enough GitHub requests left')
+        for item in items[budget:]
+    ]
+    return results
+
+
+def get_form_errors(form):
+    return ' '.join(
+        ' '.join(errors) for errors in form.errors.values()
+    )
+
+
+def change_states(revision_manager, action, revision_ids, comment='', user=None):
+    """
+    Applies the state change `action` to each of `revision_ids` as it would
+    be through its ChangeState view, including the state checks and the
+    optional `comment`.
+
+    If `user` is given, only revisions assigned to them are changed.
+    """
+    _, form_class = BULK_ACTIONS[action]
+
+    def change_state(revision_id):
+        revision = revision_manager.get(revision_id)
+        if user and user not in revision.assignees:
+            return BulkResult(
+                key=revision_id, title=revision.title, ok=False,
+                message="The revision is not assigned to you"
+            )
+
+        form = form_class(data={'comment': comment}, revision=revision)
+        if not form.is_valid():
+            return BulkResult(
+                key=revision_id, title=revision.title, ok=False, message=get_form_errors(form)
+            )
+
+        form.save()
+        new_assignee = form.cleaned_data['new_assignee']
+        if isinstance(new_assignee, (list, tuple)):
+            new_assignee = ', '.join(new_assignee)
+        return BulkResult(
+            key=revision_id, title=revision.title, ok=True,
+            message="Assigned to '{}'".format(new_assignee)
+        )
+
+    return run_in_bulk(revision_manager.token, change_state, list(revision_ids), REQUESTS_PER_CHANGE)
+
+
+def create_revisions(revision_manager, rows, creator=None):
+    """
+    Creates one revision for each of `rows`, dicts with a 'title' and, if
+    `creator` isn't given, a 'creator'. Results are keyed by row number.
+    """
+    def create(row_number):
+        row = rows[row_number - 1]
+        form = NewRevisionForm(data={'title': row.get('title', '')}, revision_manager=revision_manager)
+        row_creator = creator or row.get('creator')
+        if not form.is_valid() or not row_creator:
+            message = get_form_errors(form) if form.errors else 'Creator missing'
+            return BulkResult(key=row_number, title=row.get('title', ''), ok=False, message=message)
+
+        revision = form.save(row_creator)
+        return BulkResult(
+            key=row_number, title=revision.title, ok=True,
+            message='Created revision {}'.format(revision.id)
+        )
+
+    return run_in_bulk(revision_manager.token, create, list(range(1, len(rows) + 1)), REQUESTS_PER_CREATE)
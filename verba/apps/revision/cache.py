@@ -0,0 +1,18 @@
+from github.cache import LRUCache
+
+
+# manifest blob sha => parsed manifest as a tuple of (key, value) items.
+# Entries are immutable, callers get a new dict every time so that they can't
+# change what other requests see.
+manifest_cache = LRUCache(max_entries=1000)
+
+# page signature => search Document of the page.
+# The signature is made of the paths and blob shas of the manifest and of the
+# files next to it so the same entry is shared by the base index and by the
+# revisions that didn't change the page.
+document_cache = LRUCache(max_entries=5000)
+
+# tree sha => tuple of Folder of the subfolders of the tree.
+# Trees are immutable so a folder is only indexed again when something in it
+# changes and revisions share the entries of the folders they didn't change.
+folder_cache = LRUCache(max_entries=2000)
@@ -3,6 +3,9 @@ BRANCH_PARTS_SEPARATOR = '|'
 REVISION_LOG_FILE_COMMIT_MSG = 'Create revision log file'
 REVISION_BODY_MSG = 'Content revision "{title}"'
 FILE_CHANGED_COMMIT_MSG = "[ci skip] Change file '{path}'"
+CONTENT_IMPORTED_COMMIT_MSG = "[ci skip] Import {count} changed files"
 
 CONTENT_FILE_MANIFEST = 'manifest.json'
 CONTENT_FILE_INCLUSION_DIRECTIVE = '!file='
+
+CONFLICT_MSG = 'The revision has been changed by somebody else in the meantime, please reload it and try again.'
@@ -0,0 +1,84 @@
+from collections import namedtuple
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+
+from github import Repo
+
+from verba_settings import config
+
+from .index import revision_index
+from .constants import BRANCH_PARTS_SEPARATOR
+
+
+DASHBOARD_VERSION_KEY = 'dashboard:version'
+
+
+class AssignedRevision(namedtuple('AssignedRevision', ['id', 'title', 'statuses', 'assignees', 'updated_at'])):
+    __slots__ = ()
+
+    def get_absolute_url(self):
+        return reverse('revision:activities', args=[self.id])
+
+
+def get_version():
+    version = cache.get(DASHBOARD_VERSION_KEY)
+    if version is None:
+        cache.add(DASHBOARD_VERSION_KEY, 1, timeout=None)
+        version = cache.get(DASHBOARD_VERSION_KEY, 1)
+    return version
+
+
+def expire_dashboards():
+    """
+    Makes every dashboard reload its revisions from GitHub, e.g. after a
+    revision has been assigned to somebody else.
+    """
+    try:
+        cache.incr(DASHBOARD_VERSION_KEY)
+    except ValueError:
+        pass
+
+
+def get_assigned_revisions(token, username, status=None):
+    """
+    Returns the list of AssignedRevision of the open revisions assigned to
+    `username`, optionally only the ones in `status`, most recently updated
+    first.
+
+    This is a request to the GitHub search API instead of a scan of the
+    issues of all the open pull requests. Search can only match the start of
+    branch names so, if the revision index is built, results it doesn't
+    have although they were updated before it was last brought up to date
+    aren't Verba revisions and are left out. Results are cached per user
+    for DASHBOARD.CACHE_TIMEOUT seconds.
+    """
+    cache_key = 'dashboard:{}:{}:{}'.format(get_version(), username, quote(status or ''))
+    revisions = cache.get(cache_key)
+    if revisions is not None:
+        return revisions
+
+    qualifiers = [
+        'is:open',
+        'head:{}{}'.format(config.BRANCHES.NAMESPACE, BRANCH_PARTS_SEPARATOR),
+        'assignee:{}'.format(username),
+    ]
+    if status:
+        qualifiers.append('label:"{}"'.format(status))
+
+    indexed_at = revision_index.get_checked_at()
+    indexed_ids = revision_index.get_ids() if indexed_at else set()
+    revisions = [
+        AssignedRevision(
+            id=issue.number,
+            title=issue.title,
+            statuses=[label for label in issue.labels if label in config.LABELS.ALLOWED],
+            assignees=[assignee for assignee in issue.assignees if assignee in config.ASSIGNEES.ALLOWED],
+            updated_at=issue.updated_at
+        )
+        for issue in Repo(token).search_pulls(qualifiers)
+        if issue.number in indexed_ids or not indexed_at or issue.updated_at.timestamp() > indexed_at
+    ]
+    cache.set(cache_key, revisions, timeout=config.DASHBOARD.CACHE_TIMEOUT)
+    return revisions
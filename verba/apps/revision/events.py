@@ -0,0 +1,186 @@
+import os
+import fcntl
+import logging
+import threading
+
+from github import Repo
+
+from verba_settings import config
+
+from .index import revision_index
+from .overlap import overlap_index
+from .search import search_index
+from .dashboard import expire_dashboards
+from .utils import get_events_state_path
+
+
+logger = logging.getLogger('revision.events')
+
+# events changing the title, labels, assignees or state of pull requests
+REVISION_EVENTS = ('PullRequestEvent', 'IssuesEvent')
+
+
+def get_changes(events, base_branch):
+    """
+    Returns a tuple of (revisions changed, base branch changed) for the
+    repo `events`.
+
+    Pull request and issue events change the state of revisions while
+    pushes change their head sha or, if to `base_branch`, the content the
+    revisions are based on.
+    """
+    revisions_changed = False
+    base_changed = False
+    for event in events:
+        if event.type in REVISION_EVENTS:
+            revisions_changed = True
+        elif event.type == 'PushEvent':
+            if event.ref == 'refs/heads/{}'.format(base_branch):
+                base_changed = True
+            else:
+                revisions_changed = True
+    return revisions_changed, base_changed
+
+
+class EventsPoller(object):
+    """
+    Polls the events of the repo in the background with the token of Verba
+    and brings the indexes up to date as soon as something changes.
+
+    This is for deployments where GitHub webhooks can't reach Verba. After
+    a poll that saw every new event and updated the indexes, requests don't
+    check GitHub for changes to the indexes themselves so browsing costs
+    close to no requests to users. Otherwise, or if the poller stops, the
+    indexes go back to being refreshed by requests.
+
+    Only one process polls at a time, the one holding the lock on
+    `lock_path`, the other ones wait to take over. The indexes of the other
+    processes share the leases and know when to update through the events
+    state folder, see PeriodicIndex.
+    """
+    def __init__(self, token, lock_path=None):
+        self.token = token
+        self.lock_path = lock_path or get_default_lock_path()
+        self._last_event_id = None
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get_indexes(self):
+        return [revision_index, overlap_index, search_index]
+
+    def acquire_lock(self):
+        """
+        Returns True if this process holds the lock to poll, taking it if free.
+        """
+        if self._lock_file is None:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            lock_file = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        return True
+
+    def release_lock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def update(self, indexes):
+        """
+        Updates the built `indexes` and returns True if none failed.
+        """
+        updated = True
+        for index in indexes:
+            # for the indexes of the other processes
+            index.mark_changed()
+            if not index.is_built():
+                continue
+            try:
+                index.update(self.token, force=True)
+            except Exception:
+                logger.exception('Could not update {}'.format(type(index).__name__))
+                updated = False
+        return updated
+
+    def poll(self):
+        """
+        Polls the events once and returns the seconds to wait before polling
+        again.
+
+        The first poll and any poll that doesn't reach back to the last seen
+        event, i.e. more events happened than GitHub returns at once, update
+        everything. The indexes are only kept fresh after a poll that
+        reached back to the last seen event and updated them without error,
+        otherwise requests keep checking GitHub as usual.
+        """
+        events, poll_interval = Repo(self.token).poll_events()
+        seen_ids = [event.id for event in events]
+        new_events = [event for event in events if self._last_event_id is None or event.id > self._last_event_id]
+
+        complete = self._last_event_id is not None and (not new_events or self._last_event_id in seen_ids)
+        if complete:
+            revisions_changed, base_changed = get_changes(new_events, config.BRANCHES.BASE)
+        else:
+            revisions_changed, base_changed = True, True
+
+        updated = True
+        if revisions_changed:
+            updated = self.update([revision_index, overlap_index])
+            expire_dashboards()
+        if base_changed:
+            updated = self.update([search_index]) and updated
+
+        if seen_ids:
+            self._last_event_id = max(seen_ids + [self._last_event_id or 0])
+
+        poll_interval = max(poll_interval, config.EVENTS.MIN_POLL_INTERVAL)
+        if complete and updated:
+            # a missed poll shouldn't send every request to GitHub
+            for index in self.get_indexes():
+                index.keep_fresh(poll_interval * 2)
+        return poll_interval
+
+    def run(self):
+        poll_interval = 0
+        try:
+            while not self._stop.wait(poll_interval):
+                poll_interval = config.EVENTS.MIN_POLL_INTERVAL
+                try:
+                    if self.acquire_lock():
+                        poll_interval = self.poll()
+                except Exception:
+                    logger.exception('Could not poll the repo events')
+        finally:
+            self.release_lock()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='events-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_default_lock_path():
+    return os.path.join(get_events_state_path(), 'events.lock')
+
+
+def start_polling(token):
+    """
+    Starts the events poller of this process if not already running, it
+    only polls while no other process does.
+    """
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = EventsPoller(token)
+            _poller.start()
+        return _poller
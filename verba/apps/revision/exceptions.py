@@ -4,3 +4,11 @@ class RevisionException(Exception):
 
 class RevisionNotFoundException(RevisionException):
     pass
+
+
+class InvalidTarballException(RevisionException):
+    pass
+
+
+class InvalidCursorException(RevisionException):
+    pass
@@ -0,0 +1,181 @@
+import io
+import json
+import time
+import tarfile
+import posixpath
+
+from github import Branch
+from github.exceptions import FileTooLargeException
+
+from verba_settings import config
+
+from .utils import get_pages, get_executor, is_content_file, get_blob_sha
+from .constants import CONTENT_IMPORTED_COMMIT_MSG
+from .exceptions import InvalidTarballException
+
+
+# number of files fetched concurrently before being added to the tarball,
+# it bounds how much content is held in memory at any time
+EXPORT_BATCH_SIZE = 20
+
+
+class StreamBuffer(object):
+    """
+    Write-only file object keeping what's written until `pop` is called so
+    that a tarball can be streamed while it's being built.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def get_base_entries(token):
+    """
+    Returns a dict of (absolute path, sha) of everything in the content folder
+    of the base branch.
+    """
+    _, entries = Branch(token, config.BRANCHES.BASE).get_git_tree(config.PATHS.CONTENT_FOLDER, recursive=True)
+    return {
+        '{}{}'.format(config.PATHS.CONTENT_FOLDER, entry.name): entry.sha
+        for entry in entries
+    }
+
+
+def iter_tarball(token, branch_name, entries):
+    """
+    Yields the chunks of a gzipped tarball with the files of all the pages in
+    `entries`, a dict of (absolute path, sha), with paths relative to the
+    content folder.
+
+    Files are read by blob sha in small concurrent batches and each chunk is
+    yielded as soon as the files are added so that the whole tarball is never
+    in memory.
+    """
+    branch = Branch(token, branch_name)
+    paths = sorted(
+        path
+        for signature in get_pages(entries).values()
+        for path, _ in signature
+    )
+    executor = get_executor('export', config.CONCURRENCY.EXPORT)
+    mtime = time.time()
+
+    buffer = StreamBuffer()
+    with tarfile.open(fileobj=buffer, mode='w|gz') as tar:
+        for start in range(0, len(paths), EXPORT_BATCH_SIZE):
+            batch = paths[start:start + EXPORT_BATCH_SIZE]
+            contents = executor.map(
+                lambda path: branch.get_file(path, sha=entries[path]).content.encode('utf-8'),
+                batch
+            )
+            for path, content in zip(batch, contents):
+                tar_info = tarfile.TarInfo(path[len(config.PATHS.CONTENT_FOLDER):])
+                tar_info.size = len(content)
+                tar_info.mtime = mtime
+                tar.addfile(tar_info, io.BytesIO(content))
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+def get_member_path(tar_info):
+    """
+    Returns the absolute path of the tarball member `tar_info`.
+
+    Raises InvalidTarballException if it's outside the content folder and
+    FileTooLargeException if it's over the size limit.
+    """
+    name = posixpath.normpath(tar_info.name)
+    if name.startswith(('/', '../')) or name == '..':
+        raise InvalidTarballException("Path '{}' outside the content folder".format(tar_info.name))
+    if tar_info.size > config.FILES.MAX_SIZE:
+        raise FileTooLargeException(
+            "'{}' is larger than the {} bytes limit".format(name, config.FILES.MAX_SIZE)
+        )
+    return '{}{}'.format(config.PATHS.CONTENT_FOLDER, name)
+
+
+def check_member_content(tar_info, path, content):
+    """
+    Raises InvalidTarballException if the tarball member `tar_info` is a
+    content file and `content` isn't valid JSON.
+    """
+    if is_content_file(path):
+        try:
+            json.loads(content.decode('utf-8'))
+        except ValueError:
+            raise InvalidTarballException("'{}' is not valid JSON".format(tar_info.name))
+
+
+def get_changed_files(tarball, entries):
+    """
+    Returns a dict of (absolute path, content) of the files in the file object
+    `tarball` which are new or different from the ones in `entries`, a dict of
+    (absolute path, sha).
+
+    Raises InvalidTarballException if it's not a valid tarball of content files
+    or has more than IMPORT.MAX_MEMBERS members and FileTooLargeException if
+    its files add up to more than IMPORT.MAX_SIZE bytes, so that a small
+    compressed upload can't fill the memory.
+    """
+    changed = {}
+    total_size = 0
+    try:
+        with tarfile.open(fileobj=tarball, mode='r:*') as tar:
+            for members, tar_info in enumerate(tar, start=1):
+                if members > config.IMPORT.MAX_MEMBERS:
+                    raise InvalidTarballException(
+                        'The tarball has more than {} files and folders'.format(config.IMPORT.MAX_MEMBERS)
+                    )
+                if not tar_info.isfile():
+                    continue
+
+                path = get_member_path(tar_info)
+                total_size += tar_info.size
+                if total_size > config.IMPORT.MAX_SIZE:
+                    raise FileTooLargeException(
+                        'The files in the tarball are larger than the {} bytes limit'.format(config.IMPORT.MAX_SIZE)
+                    )
+                content = tar.extractfile(tar_info).read()
+                if entries.get(path) == get_blob_sha(content):
+                    continue
+
+                check_member_content(tar_info, path, content)
+                changed[path] = content
+    except tarfile.TarError as e:
+        raise InvalidTarballException('Invalid tarball: {}'.format(e))
+    return changed
+
+
+def import_tarball(token, branch_name, entries, tarball, parent_sha=None):
+    """
+    Commits the files in `tarball` that differ from `entries` to the branch
+    `branch_name` as one single commit. Files missing from the tarball are
+    left untouched.
+
+    `parent_sha` is the commit `entries` were read at, if given the import
+    fails with ConflictException when the branch has moved since.
+
+    Returns the sorted list of changed paths.
+    """
+    changed = get_changed_files(tarball, entries)
+    if not changed:
+        return []
+
+    branch = Branch(token, branch_name, sha=parent_sha)
+    paths = sorted(changed)
+    executor = get_executor('export', config.CONCURRENCY.EXPORT)
+    blob_shas = executor.map(lambda path: branch.create_blob(changed[path]), paths)
+
+    branch.commit_blobs(
+        dict(zip(paths, blob_shas)),
+        message=CONTENT_IMPORTED_COMMIT_MSG.format(count=len(paths))
+    )
+    return paths
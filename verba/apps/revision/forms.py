@@ -1,8 +1,42 @@
+import csv
+from collections import OrderedDict
+
 from django import forms
 
+from verba_settings import config
+
 from .constants import BRANCH_PARTS_SEPARATOR
 
 
+class RevisionFilterForm(forms.Form):
+    ORDER_CHOICES = (
+        ('-updated', 'Recently updated'),
+        ('title', 'Title'),
+    )
+
+    title = forms.CharField(required=False)
+    status = forms.ChoiceField(required=False)
+    assignee = forms.CharField(required=False)
+    creator = forms.CharField(required=False)
+    updated_since = forms.DateField(required=False)
+    order = forms.ChoiceField(choices=ORDER_CHOICES, required=False)
+    cursor = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super(RevisionFilterForm, self).__init__(*args, **kwargs)
+        self.fields['status'].choices = [('', 'Any status')] + [
+            (label, label) for label in config.LABELS.ALLOWED
+        ]
+
+    def get_filters(self):
+        """
+        Returns the kwargs for RevisionIndex.query.
+        """
+        filters = dict(self.cleaned_data)
+        filters['order'] = filters['order'] or '-updated'
+        return filters
+
+
 class NewRevisionForm(forms.Form):
     title = forms.CharField(max_length=30)
 
@@ -148,3 +182,59 @@ class PublishForm(ChangeStateForm):
 
     def is_in_valid_state(self):
         return self.revision.is_in_2i() or self.revision.is_in_draft()
+
+
+BULK_ACTIONS = OrderedDict([
+    ('send-for-2i', ('Submit for 2i', SendFor2iForm)),
+    ('send-back', ('Send back', SendBackForm)),
+    ('publish', ('Publish', PublishForm)),
+])
+
+
+class BulkChangeStateForm(forms.Form):
+    action = forms.ChoiceField(
+        choices=[(action, name) for action, (name, _) in BULK_ACTIONS.items()]
+    )
+    revisions = forms.TypedMultipleChoiceField(coerce=int)
+    comment = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'rows': 3, 'cols': 50})
+    )
+
+    def __init__(self, *args, **kwargs):
+        revision_ids = kwargs.pop('revision_ids')
+        super(BulkChangeStateForm, self).__init__(*args, **kwargs)
+        self.fields['revisions'].choices = [(revision_id, revision_id) for revision_id in sorted(revision_ids)]
+
+
+class BulkCreateForm(forms.Form):
+    MAX_ROWS = 100
+
+    csv_file = forms.FileField(
+        label='CSV file',
+        help_text="One revision per row with its title in a column called 'title'"
+    )
+
+    def clean_csv_file(self):
+        """
+        Returns the list of rows of the file as dicts.
+        """
+        try:
+            lines = self.cleaned_data['csv_file'].read().decode('utf-8-sig').splitlines()
+        except UnicodeDecodeError:
+            raise forms.ValidationError('The file must be UTF-8 encoded')
+
+        reader = csv.DictReader(lines)
+        if not reader.fieldnames or 'title' not in reader.fieldnames:
+            raise forms.ValidationError("Column 'title' missing")
+
+        rows = list(reader)
+        if len(rows) > self.MAX_ROWS:
+            raise forms.ValidationError('Max {} revisions at a time'.format(self.MAX_ROWS))
+        return rows
+
+
+class ImportForm(forms.Form):
+    tarball = forms.FileField(
+        help_text='A tarball exported from Verba, only the files you changed are saved'
+    )
@@ -0,0 +1,253 @@
+import json
+import time
+import logging
+import sqlite3
+from collections import namedtuple
+
+from django.core.urlresolvers import reverse
+from django.utils.dateparse import parse_datetime
+
+from verba_settings import config
+
+from .models import RevisionManager
+from .utils import get_executor, PeriodicIndex, encode_cursor, decode_cursor
+from .exceptions import InvalidCursorException
+
+
+logger = logging.getLogger('revision.index')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    creator TEXT,
+    statuses TEXT NOT NULL,
+    assignees TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    head_sha TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS revisions_updated_at ON revisions (updated_at, id);
+CREATE INDEX IF NOT EXISTS revisions_title_key ON revisions (title_key, id);
+CREATE INDEX IF NOT EXISTS revisions_creator ON revisions (creator, updated_at, id);
+
+CREATE TABLE IF NOT EXISTS revision_statuses (
+    status TEXT NOT NULL,
+    revision_id INTEGER NOT NULL,
+    PRIMARY KEY (status, revision_id)
+);
+CREATE TABLE IF NOT EXISTS revision_assignees (
+    assignee TEXT NOT NULL,
+    revision_id INTEGER NOT NULL,
+    PRIMARY KEY (assignee, revision_id)
+);
+"""
+
+# order name => (column, descending)
+ORDERINGS = {
+    '-updated': ('updated_at', True),
+    'title': ('title_key', False),
+}
+
+
+class RevisionSummary(namedtuple('RevisionSummary', [
+    'id', 'title', 'creator', 'statuses', 'assignees', 'updated_at', 'head_sha'
+])):
+    """
+    What the revision list shows of a revision, read from the index instead
+    of GitHub.
+    """
+    __slots__ = ()
+
+    def get_absolute_url(self):
+        return reverse('revision:activities', args=[self.id])
+
+
+RevisionPage = namedtuple('RevisionPage', ['revisions', 'next_cursor'])
+
+
+def format_datetime(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class RevisionIndex(PeriodicIndex):
+    """
+    SQLite index of the open revisions so that the revision list can be
+    filtered, sorted and paginated without fetching every pull request and
+    issue from GitHub on each request.
+
+    Updates list the open pull requests and only fetch the labels and
+    assignees of the revisions updated since they were last indexed.
+    Pages are read with keyset pagination so that the time to load a page
+    doesn't depend on how many revisions there are.
+    """
+    def __init__(self, database=None):
+        super(RevisionIndex, self).__init__()
+        self._database = database
+        self._connection = None
+
+    def get_refresh_interval(self):
+        return config.REVISION_INDEX.REFRESH_INTERVAL
+
+    def _get_connection(self):
+        # only called with self._lock held
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self._database or config.REVISION_INDEX.DATABASE,
+                check_same_thread=False
+            )
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def _update(self, token):
+        start = time.time()
+        revisions = RevisionManager(token).get_all()
+
+        with self._lock:
+            connection = self._get_connection()
+            indexed = {
+                revision_id: (updated_at, head_sha)
+                for revision_id, updated_at, head_sha in connection.execute(
+                    'SELECT id, updated_at, head_sha FROM revisions'
+                )
+            }
+
+        changed = [
+            revision for revision in revisions
+            if indexed.get(revision.id) != (format_datetime(revision.updated_at), revision.head_sha)
+        ]
+        # statuses and assignees come from the issue, one request per revision
+        executor = get_executor('revision-index', config.CONCURRENCY.REVISION_INDEX)
+        summaries = list(executor.map(
+            lambda revision: RevisionSummary(
+                id=revision.id,
+                title=revision.title,
+                creator=revision.creator,
+                statuses=revision.statuses,
+                assignees=revision.assignees,
+                updated_at=format_datetime(revision.updated_at),
+                head_sha=revision.head_sha
+            ),
+            changed
+        ))
+        closed_ids = set(indexed) - {revision.id for revision in revisions}
+
+        if summaries or closed_ids:
+            with self._lock:
+                connection = self._get_connection()
+                with connection:
+                    for revision_id in closed_ids:
+                        self._remove(connection, revision_id)
+                    for summary in summaries:
+                        self._remove(connection, summary.id)
+                        self._add(connection, summary)
+
+        logger.info('Indexed {} of {} revisions in {:.1f}s'.format(
+            len(changed), len(revisions), time.time() - start
+        ))
+
+    def _add(self, connection, summary):
+        connection.execute(
+            'INSERT INTO revisions (id, title, title_key, creator, statuses, assignees, updated_at, head_sha) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                summary.id, summary.title, summary.title.lower(), summary.creator,
+                json.dumps(summary.statuses), json.dumps(summary.assignees),
+                summary.updated_at, summary.head_sha
+            )
+        )
+        connection.executemany(
+            'INSERT INTO revision_statuses (status, revision_id) VALUES (?, ?)',
+            [(status, summary.id) for status in set(summary.statuses)]
+        )
+        connection.executemany(
+            'INSERT INTO revision_assignees (assignee, revision_id) VALUES (?, ?)',
+            [(assignee, summary.id) for assignee in set(summary.assignees)]
+        )
+
+    def _remove(self, connection, revision_id):
+        connection.execute('DELETE FROM revisions WHERE id = ?', (revision_id,))
+        connection.execute('DELETE FROM revision_statuses WHERE revision_id = ?', (revision_id,))
+        connection.execute('DELETE FROM revision_assignees WHERE revision_id = ?', (revision_id,))
+
+    def get_ids(self):
+        """
+        Returns the set of the ids of the indexed revisions.
+        """
+        with self._lock:
+            return {row[0] for row in self._get_connection().execute('SELECT id FROM revisions')}
+
+    def _get_filters(self, status, assignee, creator, title, updated_since):
+        """
+        Returns the list of SQL conditions and the list of their params.
+        """
+        where = []
+        params = []
+        if status:
+            where.append('id IN (SELECT revision_id FROM revision_statuses WHERE status = ?)')
+            params.append(status)
+        if assignee:
+            where.append('id IN (SELECT revision_id FROM revision_assignees WHERE assignee = ?)')
+            params.append(assignee)
+        if creator:
+            where.append('creator = ?')
+            params.append(creator)
+        if title:
+            escaped = title.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            where.append("title_key LIKE ? ESCAPE '\\'")
+            params.append('%{}%'.format(escaped))
+        if updated_since:
+            where.append('updated_at >= ?')
+            params.append(format_datetime(updated_since))
+        return where, params
+
+    def query(
+        self, status=None, assignee=None, creator=None, title=None, updated_since=None,
+        order='-updated', cursor=None, page_size=None
+    ):
+        """
+        Returns the RevisionPage of the revisions matching all the given
+        filters, sorted by `order` (one of ORDERINGS) and starting after
+        `cursor`, the `next_cursor` of the previous page.
+
+        `title` matches any part of the title, case-insensitively, and
+        `updated_since` is a datetime.
+        """
+        column, descending = ORDERINGS[order]
+        direction = 'DESC' if descending else 'ASC'
+        page_size = page_size or config.REVISION_INDEX.PAGE_SIZE
+
+        where, params = self._get_filters(status, assignee, creator, title, updated_since)
+        if cursor:
+            value, revision_id = decode_cursor(cursor, length=2)
+            if not isinstance(revision_id, int):
+                raise InvalidCursorException("Invalid cursor '{}'".format(cursor))
+            operator = '<' if descending else '>'
+            where.append('({column} {op} ? OR ({column} = ? AND id {op} ?))'.format(column=column, op=operator))
+            params += [value, value, revision_id]
+
+        sql = 'SELECT id, title, creator, statuses, assignees, updated_at, head_sha, {} FROM revisions'.format(column)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY {column} {direction}, id {direction} LIMIT ?'.format(column=column, direction=direction)
+        params.append(page_size + 1)
+
+        with self._lock:
+            rows = self._get_connection().execute(sql, params).fetchall()
+
+        revisions = [
+            RevisionSummary(
+                id=row[0], title=row[1], creator=row[2],
+                statuses=json.loads(row[3]), assignees=json.loads(row[4]),
+                updated_at=parse_datetime(row[5]), head_sha=row[6]
+            )
+            for row in rows[:page_size]
+        ]
+        next_cursor = None
+        if len(rows) > page_size:
+            last_row = rows[page_size - 1]
+            next_cursor = encode_cursor([last_row[7], last_row[0]])
+        return RevisionPage(revisions=revisions, next_cursor=next_cursor)
+
+
+revision_index = RevisionIndex()
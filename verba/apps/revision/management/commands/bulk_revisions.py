@@ -0,0 +1,54 @@
+import csv
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from revision.models import RevisionManager
+from revision.forms import BULK_ACTIONS
+from revision.bulk import change_states, create_revisions
+
+
+class Command(BaseCommand):
+    help = (
+        'Changes the state of many revisions at once or, with the "create" action, '
+        'creates one revision for each row of a CSV file with "title" and "creator" columns.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=list(BULK_ACTIONS) + ['create'])
+        parser.add_argument('revision_ids', nargs='*', type=int)
+        parser.add_argument('--csv', dest='csv_path', help='CSV file of the revisions to create')
+        parser.add_argument('--comment', default='', help='Comment to add to each revision')
+        parser.add_argument(
+            '--token', default=getattr(settings, 'VERBA_GITHUB_TOKEN', None),
+            help='GitHub token, defaults to settings.VERBA_GITHUB_TOKEN'
+        )
+
+    def handle(self, *args, **options):
+        if not options['token']:
+            raise CommandError('A GitHub token is required')
+        revision_manager = RevisionManager(options['token'])
+
+        if options['action'] == 'create':
+            if not options['csv_path']:
+                raise CommandError('--csv is required to create revisions')
+            with open(options['csv_path'], encoding='utf-8-sig') as csv_file:
+                rows = list(csv.DictReader(csv_file))
+            results = create_revisions(revision_manager, rows)
+        else:
+            if not options['revision_ids']:
+                raise CommandError('At least one revision id is required')
+            results = change_states(
+                revision_manager, options['action'], options['revision_ids'], comment=options['comment']
+            )
+
+        for result in results:
+            line = '{}\t{}\t{}\t{}'.format(result.key, 'OK' if result.ok else 'FAILED', result.title, result.message)
+            if result.ok:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(self.style.ERROR(line))
+
+        failed = len([result for result in results if not result.ok])
+        if failed:
+            raise CommandError('{} of {} failed'.format(failed, len(results)))
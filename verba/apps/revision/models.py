@@ -1,5 +1,8 @@
 import random
 import json
+import threading
+import posixpath
+from collections import namedtuple
 
 from django.core.urlresolvers import reverse
 from django.utils import timezone
@@ -9,10 +12,16 @@ from github.exceptions import NotFoundException as GithubNotFoundException
 
 from verba_settings import config
 
-from .utils import is_verba_branch, generate_verba_branch_name, get_verba_branch_name_info, is_content_file
+from .utils import is_verba_branch, generate_verba_branch_name, get_verba_branch_name_info, is_content_file, \
+    get_executor, get_blob_sha
 from .constants import REVISION_LOG_FILE_COMMIT_MSG, REVISION_BODY_MSG, CONTENT_FILE_MANIFEST, \
     CONTENT_FILE_INCLUSION_DIRECTIVE, FILE_CHANGED_COMMIT_MSG
 from .exceptions import RevisionNotFoundException
+from .cache import manifest_cache
+
+
+# what a revision changes compared to the base branch
+ChangeSummary = namedtuple('ChangeSummary', ['pages', 'files', 'additions', 'deletions', 'behind_by', 'base_branch'])
 
 
 def abs_path(path):
@@ -27,6 +36,19 @@ def local_path(path):
     return path
 
 
+def get_manifest(git_file):
+    """
+    Returns the parsed manifest `git_file` as a new dict, parsing it only once
+    per blob sha.
+    """
+    sha = git_file.sha
+    items = manifest_cache.get(sha)
+    if items is None:
+        items = tuple(json.loads(git_file.content).items())
+        manifest_cache.set(sha, items)
+    return dict(items)
+
+
 class Activity(object):
     kind = None
 
@@ -107,58 +129,114 @@ class RevisionFile(object):
     def path(self):
         return local_path(self._file_folder)
 
+    def _get_manifest(self):
+        return get_manifest(self._file)
+
+    def _get_include_path(self, value):
+        """
+        Returns the absolute path of the file included with `value`,
+        `CONTENT_FILE_INCLUSION_DIRECTIVE` followed by the file name.
+        """
+        filename_to_include = value[len(CONTENT_FILE_INCLUSION_DIRECTIVE):]
+        return '{}/{}'.format(abs_path(self._file_folder), filename_to_include)
+
+    def _get_included_contents(self, paths):
+        """
+        Returns a dict of (path, content) for each included file in `paths`.
+
+        The files are fetched concurrently and, if the revision already knows
+        their blob sha, they come from the blob cache without any request.
+        """
+        git_files = [
+            self._pull.branch.get_file(path, sha=self.revision.get_blob_sha(path))
+            for path in paths
+        ]
+        if len(git_files) > 1:
+            executor = get_executor('includes', config.CONCURRENCY.INCLUDES)
+            contents = executor.map(lambda git_file: git_file.content, git_files)
+        else:
+            contents = [git_file.content for git_file in git_files]
+        return dict(zip(paths, contents))
+
     def get_content_items(self):
         """
         Returns a dict of items of type (key, value) where:
             - key is the key for the content area
             - value is the actual content
         """
-        content = json.loads(self._file.content)
+        items = self._get_manifest()
+
+        # if reference to external file for content => load it
+        includes = {
+            key: self._get_include_path(value)
+            for key, value in items.items()
+            if value.startswith(CONTENT_FILE_INCLUSION_DIRECTIVE)
+        }
+        included_contents = self._get_included_contents(sorted(set(includes.values())))
+
+        for key, path in includes.items():
+            items[key] = included_contents[path]
+        return items
 
-        items = {}
-        file_folder = abs_path(self._file_folder)
-        for key, value in content.items():
-            # if reference to external file for content => load it
+    def get_paths(self):
+        """
+        Returns the absolute paths of the manifest and of the files it includes.
+        """
+        paths = [self._file.path]
+        for value in self._get_manifest().values():
             if value.startswith(CONTENT_FILE_INCLUSION_DIRECTIVE):
-                filename_to_include = value[len(CONTENT_FILE_INCLUSION_DIRECTIVE):]
-                filepath_to_include = '{}/{}'.format(file_folder, filename_to_include)
-
-                git_file = self._pull.branch.get_file(filepath_to_include)
-                value = git_file.content
-
-            items[key] = value
-        return items
+                paths.append(self._get_include_path(value))
+        return sorted(set(paths))
 
     def save_content_items(self, new_content_items):
         """
         Saves the dict of (key, value) items.
+
+        Only the manifest and the included files whose content changes are
+        written, in a single commit on top of the head the revision was read
+        at, and the revision then moves to that commit.
         """
-        content = json.loads(self._file.content)
+        content = self._get_manifest()
+        git_files = {self._file.path: self._file}
+        new_contents = {}
 
-        file_folder = abs_path(self._file_folder)
         for key, old_value in content.items():
             new_value = new_content_items[key]
 
             # if reference to external file for content => update it
             if old_value.startswith(CONTENT_FILE_INCLUSION_DIRECTIVE):
-                filename_to_include = old_value[len(CONTENT_FILE_INCLUSION_DIRECTIVE):]
-                filepath_to_include = '{}/{}'.format(file_folder, filename_to_include)
-
-                git_file = self._pull.branch.get_file(filepath_to_include)
-                git_file.change_content(
-                    new_content=new_value,
-                    message=FILE_CHANGED_COMMIT_MSG.format(
-                        path=local_path('{}/{}'.format(self.path, filename_to_include))
-                    )
-                )
+                path = self._get_include_path(old_value)
+                git_files[path] = self._pull.branch.get_file(path, sha=self.revision.get_blob_sha(path))
+                new_contents[path] = new_value
             else:
                 content[key] = new_value
+        new_contents[self._file.path] = json.dumps(content, indent=4, sort_keys=True)
 
-        # save main manifest
-        self._file.change_content(
-            json.dumps(content, indent=4, sort_keys=True),
-            message=FILE_CHANGED_COMMIT_MSG.format(path=self.path)
+        changed = sorted(
+            path for path, new_content in new_contents.items()
+            if git_files[path].sha != get_blob_sha(new_content.encode('utf-8'))
         )
+        if len(changed) == 1:
+            # through the contents API, a single request for most files
+            path = changed[0]
+            git_files[path].change_content(
+                new_content=new_contents[path],
+                message=FILE_CHANGED_COMMIT_MSG.format(
+                    path=self.path if path == self._file.path else local_path(path)
+                )
+            )
+            head_sha = git_files[path].ref
+        elif changed:
+            branch = self._pull.branch
+            head_sha = branch.commit_files(
+                {path: new_contents[path] for path in changed},
+                message=FILE_CHANGED_COMMIT_MSG.format(path=self.path)
+            )
+        else:
+            return
+
+        if head_sha:
+            self._pull.head_sha = head_sha
 
     def get_absolute_url(self):
         return reverse('revision:edit-file', args=[self.revision.id, self.path])
@@ -167,6 +245,7 @@ class RevisionFile(object):
 class Revision(object):
     def __init__(self, pull):
         self._pull = pull
+        self._lock = threading.RLock()
 
     @property
     def id(self):
@@ -199,6 +278,22 @@ class Revision(object):
         _, _, creator, _ = get_verba_branch_name_info(self._pull.head_ref)
         return creator
 
+    @property
+    def branch_name(self):
+        return self._pull.head_ref
+
+    @property
+    def updated_at(self):
+        return self._pull.updated_at
+
+    @property
+    def head_sha(self):
+        return self._pull.head_sha
+
+    @property
+    def base_sha(self):
+        return self._pull.base_sha
+
     def is_in_draft(self):
         return config.LABELS.DRAFT in self.statuses
 
@@ -287,17 +382,66 @@ class Revision(object):
         Returns the list of RevisionFile instances belonging to this revision.
         """
         if not hasattr(self, '_files'):
-            git_files = self._pull.branch.get_dir_files(config.PATHS.CONTENT_FOLDER)
-
-            self._files = []
-            for git_file in git_files:
-                if is_content_file(git_file.path):
-                    self._files.append(
+            with self._lock:
+                if not hasattr(self, '_files'):
+                    git_files = self._pull.branch.get_dir_files(config.PATHS.CONTENT_FOLDER)
+                    self._blob_shas = {
+                        git_file.path: git_file.sha for git_file in git_files
+                    }
+                    self._files = [
                         RevisionFile(git_file, self)
-                    )
+                        for git_file in git_files
+                        if is_content_file(git_file.path)
+                    ]
 
         return self._files
 
+    def get_blob_shas(self):
+        """
+        Returns a dict of (absolute path, sha) of everything in the content
+        folder of this revision.
+        """
+        self.get_files()
+        return dict(self._blob_shas)
+
+    def get_blob_sha(self, path):
+        """
+        Returns the blob sha of the file with absolute path `path` if already
+        known from the tree fetched by `get_files` or None otherwise.
+        """
+        return getattr(self, '_blob_shas', {}).get(path)
+
+    def get_changed_paths(self):
+        """
+        Returns the absolute paths of the content files changed by this revision.
+        """
+        return [
+            path for path in self._pull.files
+            if path.startswith(config.PATHS.CONTENT_FOLDER)
+        ]
+
+    def get_change_summary(self):
+        """
+        Returns the ChangeSummary of the content changed by this revision and
+        of how many commits it's behind the base branch.
+
+        It's read from the compare API, cached by base and head sha, so the
+        diff is never downloaded.
+        """
+        comparison = self._pull.comparison
+        changed_files = [
+            changed_file for changed_file in comparison.files
+            if changed_file.path.startswith(config.PATHS.CONTENT_FOLDER)
+        ]
+        return ChangeSummary(
+            pages=len({posixpath.dirname(changed_file.path) for changed_file in changed_files}),
+            files=len(changed_files),
+            additions=sum(changed_file.additions for changed_file in changed_files),
+            deletions=sum(changed_file.deletions for changed_file in changed_files),
+            behind_by=comparison.behind_by,
+            base_branch=config.BRANCHES.BASE
+        )
+
     def get_file(self, path):
         """
         Return RevisionFile for file with path == `path`.
@@ -328,12 +472,20 @@ class Revision(object):
     def diff(self):
         return self._pull.diff
 
+    def iter_diff(self):
+        """
+        Returns an iterator over the chunks of bytes of the diff so that it
+        can be streamed to the browser as it's downloaded.
+        """
+        return self._pull.iter_diff()
+
     def get_absolute_url(self):
         return reverse('revision:activities', args=[self.id])
 
 
 class RevisionManager(object):
     def __init__(self, token):
+        self.token = token
         self._repo = Repo(token)
 
     def get_all(self):
@@ -358,6 +510,8 @@ class RevisionManager(object):
             pull = self._repo.get_pull(revision_id)
             if not is_verba_branch(pull.head_ref):
                 raise GithubNotFoundException('Not found')
+            # the revision is read and compared at the latest commits of its branches
+            pull.refresh_shas()
         except GithubNotFoundException:
             raise RevisionNotFoundException('Revision with id {} not found'.format(revision_id))
 
@@ -0,0 +1,101 @@
+import time
+import logging
+from collections import namedtuple
+
+from verba_settings import config
+
+from .models import RevisionManager
+from .utils import get_executor, PeriodicIndex
+
+
+logger = logging.getLogger('revision.overlap')
+
+Overlap = namedtuple('Overlap', ['revision_id', 'title'])
+
+
+class OverlapIndex(PeriodicIndex):
+    """
+    Index of the content files changed by each open revision so that editors
+    can be warned as soon as somebody else is changing the same page.
+
+    Updates only fetch the files of the revisions with a new head sha.
+    """
+    def __init__(self):
+        super(OverlapIndex, self).__init__()
+        self._head_shas = {}  # revision id => indexed head sha
+        self._titles = {}  # revision id => title
+        self._paths = {}  # revision id => set of changed paths
+        self._revisions = {}  # path => set of revision ids
+
+    def get_refresh_interval(self):
+        return config.OVERLAP.REFRESH_INTERVAL
+
+    def _update(self, token):
+        start = time.time()
+        revisions = RevisionManager(token).get_all()
+
+        changed = [
+            revision for revision in revisions
+            if self._head_shas.get(revision.id) != revision.head_sha
+        ]
+        executor = get_executor('overlap', config.CONCURRENCY.OVERLAP)
+        changed_paths = executor.map(lambda revision: revision.get_changed_paths(), changed)
+
+        with self._lock:
+            open_ids = {revision.id for revision in revisions}
+            for revision_id in set(self._head_shas) - open_ids:
+                self._remove(revision_id)
+
+            for revision, paths in zip(changed, changed_paths):
+                self._remove(revision.id)
+                self._add(revision, paths)
+
+            for revision in revisions:
+                self._titles[revision.id] = revision.title
+
+        logger.info('Indexed {} of {} revisions in {:.1f}s'.format(
+            len(changed), len(revisions), time.time() - start
+        ))
+
+    def _add(self, revision, paths):
+        self._head_shas[revision.id] = revision.head_sha
+        self._paths[revision.id] = set(paths)
+        for path in paths:
+            self._revisions.setdefault(path, set()).add(revision.id)
+
+    def _remove(self, revision_id):
+        self._head_shas.pop(revision_id, None)
+        self._titles.pop(revision_id, None)
+        for path in self._paths.pop(revision_id, ()):
+            revision_ids = self._revisions[path]
+            revision_ids.discard(revision_id)
+            if not revision_ids:
+                del self._revisions[path]
+
+    def get_overlaps(self, paths, revision_id):
+        """
+        Returns the list of Overlap of the open revisions, other than
+        `revision_id`, changing any of `paths`.
+        """
+        with self._lock:
+            revision_ids = set()
+            for path in paths:
+                revision_ids |= self._revisions.get(path, set())
+            revision_ids.discard(revision_id)
+
+            return [
+                Overlap(revision_id=other_id, title=self._titles[other_id])
+                for other_id in sorted(revision_ids)
+            ]
+
+
+overlap_index = OverlapIndex()
+
+
+def get_overlaps(token, revision_file):
+    """
+    Returns the list of Overlap of the other open revisions changing the
+    manifest or the included files of `revision_file`.
+    """
+    overlap_index.update(token)
+    return overlap_index.get_overlaps(revision_file.get_paths(), revision_file.revision.id)
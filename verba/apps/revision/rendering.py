@@ -0,0 +1,42 @@
+import hashlib
+import threading
+
+import mistune
+
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+
+# markdown => html renders are immutable so they can be kept for long
+RENDER_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+_local = threading.local()
+
+
+def get_markdown():
+    """
+    Returns the markdown parser of the current thread as parsers keep state
+    while rendering. Raw html is escaped and links are checked for unsafe
+    schemes so that rendered text is safe to mark as such.
+    """
+    markdown = getattr(_local, 'markdown', None)
+    if markdown is None:
+        markdown = _local.markdown = mistune.Markdown(renderer=mistune.Renderer(escape=True))
+    return markdown
+
+
+def render_markdown(text):
+    """
+    Returns the html of the markdown `text`, rendering it only once per
+    content hash.
+    """
+    if not text:
+        return mark_safe('')
+
+    # renders of other versions of mistune may not be escaped the same way
+    cache_key = 'markdown:{}:{}'.format(mistune.__version__, hashlib.sha1(text.encode('utf-8')).hexdigest())
+    html = cache.get(cache_key)
+    if html is None:
+        html = get_markdown()(text)
+        cache.set(cache_key, html, RENDER_CACHE_TIMEOUT)
+    return mark_safe(html)
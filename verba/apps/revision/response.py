@@ -0,0 +1,28 @@
+import time
+import logging
+
+from django.template.response import TemplateResponse
+
+
+logger = logging.getLogger('revision.views')
+
+
+class TimedTemplateResponse(TemplateResponse):
+    """
+    TemplateResponse which logs how long rendering the template took and
+    exposes it in the `Server-Timing` header so that the time saved by
+    fragment caching shows up in the browser dev tools as well.
+    """
+    @property
+    def rendered_content(self):
+        start = time.time()
+        content = super(TimedTemplateResponse, self).rendered_content
+        duration = (time.time() - start) * 1000
+
+        template_name = self.template_name
+        if isinstance(template_name, (list, tuple)):
+            template_name = ', '.join(template_name)
+
+        logger.info('Rendered {} in {:.1f}ms'.format(template_name, duration))
+        self['Server-Timing'] = 'render;dur={:.1f}'.format(duration)
+        return content
@@ -0,0 +1,229 @@
+import re
+import time
+import logging
+import posixpath
+from collections import namedtuple, Counter
+
+from github import Branch, File
+from github.exceptions import GitHubException
+
+from verba_settings import config
+
+from .models import get_manifest, local_path
+from .utils import is_content_file, get_executor, get_pages, PeriodicIndex
+from .constants import CONTENT_FILE_INCLUSION_DIRECTIVE
+from .cache import document_cache
+
+
+logger = logging.getLogger('revision.search')
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+Document = namedtuple('Document', ['title', 'words'])
+SearchResult = namedtuple('SearchResult', ['path', 'title', 'score'])
+
+
+def tokenize(text):
+    """
+    Returns the list of lowercase words in `text`.
+    """
+    return [word.lower() for word in WORD_RE.findall(text)]
+
+
+def get_document(token, branch_name, folder, signature):
+    """
+    Returns the Document of the page in `folder` with words from all the
+    values of its manifest, included files resolved.
+
+    Files are read by blob sha and documents are cached by signature so a
+    page is only fetched again when it changes.
+    """
+    document = document_cache.get(signature)
+    if document is not None:
+        return document
+
+    shas = dict(signature)
+    manifest_path = next(
+        path for path in shas
+        if posixpath.dirname(path) == folder and is_content_file(path)
+    )
+
+    title = local_path(folder)
+    texts = []
+    try:
+        items = get_manifest(File(token, manifest_path, branch_name, sha=shas[manifest_path]))
+        title = items.get('title') or title
+
+        for value in items.values():
+            if value.startswith(CONTENT_FILE_INCLUSION_DIRECTIVE):
+                path = '{}/{}'.format(folder, value[len(CONTENT_FILE_INCLUSION_DIRECTIVE):])
+                if path not in shas:  # broken include, nothing to index
+                    continue
+                value = File(token, path, branch_name, sha=shas[path]).content
+            texts.append(value)
+    except (ValueError, GitHubException):
+        # the page is still listed by title so that it can be found and fixed
+        logger.warning('Could not index page {}'.format(folder), exc_info=True)
+
+    # the title is counted once more so that pages with matching titles rank first
+    document = Document(title=title, words=Counter(tokenize(' '.join([title] + texts))))
+    document_cache.set(signature, document)
+    return document
+
+
+def get_documents(token, branch_name, pages):
+    """
+    Returns a dict of (page folder, Document) for `pages`, a dict of
+    (page folder, signature), fetching the pages concurrently.
+    """
+    folders = list(pages)
+    executor = get_executor('search', config.CONCURRENCY.SEARCH)
+    documents = executor.map(
+        lambda folder: get_document(token, branch_name, folder, pages[folder]),
+        folders
+    )
+    return dict(zip(folders, documents))
+
+
+class SearchIndex(PeriodicIndex):
+    """
+    Inverted index of the words in the pages of the base branch.
+
+    The index is built the first time it's needed. After that, at most every
+    `SEARCH.REFRESH_INTERVAL` seconds, the content tree of the base branch is
+    revalidated and only the pages whose signature changed are fetched again.
+    """
+    def __init__(self):
+        super(SearchIndex, self).__init__()
+        self.tree_sha = None
+        self._signatures = {}  # page folder => signature
+        self._documents = {}  # page folder => Document
+        self._postings = {}  # word => {page folder: number of occurrences}
+
+    def get_refresh_interval(self):
+        return config.SEARCH.REFRESH_INTERVAL
+
+    def _update(self, token):
+        start = time.time()
+        branch = Branch(token, config.BRANCHES.BASE)
+        tree_sha, entries = branch.get_git_tree(config.PATHS.CONTENT_FOLDER, recursive=True)
+        if tree_sha == self.tree_sha:
+            return
+
+        pages = get_pages({
+            '{}{}'.format(config.PATHS.CONTENT_FOLDER, entry.name): entry.sha
+            for entry in entries
+        })
+        changed = {
+            folder: signature
+            for folder, signature in pages.items()
+            if self._signatures.get(folder) != signature
+        }
+        documents = get_documents(token, branch.name, changed)
+
+        with self._lock:
+            for folder in set(self._signatures) - set(pages):
+                self._remove(folder)
+            for folder, signature in changed.items():
+                self._remove(folder)
+                self._add(folder, signature, documents[folder])
+            self.tree_sha = tree_sha
+
+        logger.info('Indexed {} of {} pages in {:.1f}s'.format(
+            len(changed), len(pages), time.time() - start
+        ))
+
+    def _add(self, folder, signature, document):
+        self._signatures[folder] = signature
+        self._documents[folder] = document
+        for word, count in document.words.items():
+            self._postings.setdefault(word, {})[folder] = count
+
+    def _remove(self, folder):
+        document = self._documents.pop(folder, None)
+        self._signatures.pop(folder, None)
+        if document is None:
+            return
+
+        for word in document.words:
+            posting = self._postings[word]
+            del posting[folder]
+            if not posting:
+                del self._postings[word]
+
+    def get_revision_overlay(self, token, revision):
+        """
+        Returns the overlay of the pages of `revision` which differ from the
+        ones in the index.
+        """
+        pages = get_pages(revision.get_blob_shas())
+        with self._lock:
+            signatures = dict(self._signatures)
+
+        changed = {
+            folder: signature
+            for folder, signature in pages.items()
+            if signatures.get(folder) != signature
+        }
+        overlay = get_documents(token, revision.branch_name, changed)
+        overlay.update({
+            folder: None
+            for folder in signatures
+            if folder not in pages
+        })
+        return overlay
+
+    def search(self, words, overlay=None):
+        """
+        Returns the list of SearchResult for the pages containing all `words`,
+        best matches first.
+
+        `overlay` is a dict of (page folder, Document) replacing or adding
+        pages to the index just for this search, None removes the page.
+        """
+        overlay = overlay or {}
+        matches = {}
+
+        with self._lock:
+            postings = sorted(
+                (self._postings.get(word, {}) for word in words),
+                key=len
+            )
+            for folder in postings[0]:
+                if folder in overlay:
+                    continue
+                counts = [posting.get(folder) for posting in postings]
+                if all(counts):
+                    matches[folder] = (self._documents[folder].title, sum(counts))
+
+        for folder, document in overlay.items():
+            if document is None:
+                continue
+            counts = [document.words.get(word) for word in words]
+            if all(counts):
+                matches[folder] = (document.title, sum(counts))
+
+        results = [
+            SearchResult(path=local_path(folder), title=title, score=score)
+            for folder, (title, score) in matches.items()
+        ]
+        results.sort(key=lambda result: (-result.score, result.path))
+        return results
+
+
+search_index = SearchIndex()
+
+
+def search(token, query, revision=None):
+    """
+    Returns the list of SearchResult for the pages of the base branch matching
+    all the words in `query` or, if `revision` is given, for the pages of the
+    revision branch.
+    """
+    words = tokenize(query)
+    if not words:
+        return []
+
+    search_index.update(token)
+    overlay = search_index.get_revision_overlay(token, revision) if revision else None
+    return search_index.search(words, overlay)[:config.SEARCH.MAX_RESULTS]
@@ -0,0 +1,11 @@
+from django import template
+
+from revision.rendering import render_markdown
+
+
+register = template.Library()
+
+
+@register.filter
+def markdown(text):
+    return render_markdown(text)
@@ -0,0 +1,168 @@
+import json
+import responses
+from io import StringIO
+from urllib.parse import quote
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from github.auth import SharedReadToken
+from github.exceptions import InvalidResponseException
+from github.tests.test_base import BaseGithubTestCase
+
+from revision.bulk import change_states, create_revisions, BulkResult, REQUESTS_PER_CHANGE
+from revision.models import RevisionManager
+from revision.utils import generate_verba_branch_name
+from revision.exceptions import RevisionNotFoundException
+
+
+@mock.patch('revision.bulk.User')
+class ChangeStatesTestCase(SimpleTestCase):
+    def setUp(self):
+        super(ChangeStatesTestCase, self).setUp()
+        self.revisions = {
+            1: mock.MagicMock(title='draft revision', assignees=['test-owner']),
+            2: mock.MagicMock(title='2i revision', assignees=['test-owner']),
+            3: mock.MagicMock(title='other revision', assignees=['test-owner-2']),
+        }
+        self.revisions[1].is_in_draft.return_value = True
+        self.revisions[1].move_to_2i.return_value = 'test-owner-2'
+        self.revisions[2].is_in_draft.return_value = False
+
+        def get(revision_id):
+            if revision_id not in self.revisions:
+                raise RevisionNotFoundException('Revision with id {} not found'.format(revision_id))
+            return self.revisions[revision_id]
+
+        self.revision_manager = mock.MagicMock(token='123456')
+        self.revision_manager.get.side_effect = get
+
+    def test_report(self, MockedUser):  # noqa
+        MockedUser.get_remaining_requests.return_value = 5000
+
+        with mock.patch('revision.bulk.logger'):
+            results = change_states(
+                self.revision_manager, 'send-for-2i', [1, 2, 3, 4], comment='some comment', user='test-owner'
+            )
+
+        self.assertEqual(results, [
+            BulkResult(key=1, title='draft revision', ok=True, message="Assigned to 'test-owner-2'"),
+            BulkResult(key=2, title='2i revision', ok=False, message='This revision is not in correct state'),
+            BulkResult(key=3, title='other revision', ok=False, message='The revision is not assigned to you'),
+            BulkResult(key=4, title='', ok=False, message='Revision with id 4 not found'),
+        ])
+        self.revisions[1].add_comment.assert_called_with('some comment')
+        self.assertFalse(self.revisions[2].move_to_2i.called)
+        self.assertFalse(self.revisions[3].move_to_2i.called)
+
+    def test_github_errors_reported(self, MockedUser):  # noqa
+        MockedUser.get_remaining_requests.return_value = 5000
+        self.revisions[1].move_to_2i.side_effect = InvalidResponseException('Received 500')
+
+        with mock.patch('revision.bulk.logger'):
+            results = change_states(self.revision_manager, 'send-for-2i', [1])
+
+        self.assertEqual(results, [
+            BulkResult(key=1, title='', ok=False, message='Received 500')
+        ])
+
+    def test_within_rate_limit(self, MockedUser):  # noqa
+        # enough requests left for 1 revision only
+        MockedUser.get_remaining_requests.return_value = 9
+
+        results = change_states(self.revision_manager, 'send-for-2i', [1, 2])
+
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[1].message, 'Skipped, not enough GitHub requests left')
+        self.revision_manager.get.assert_called_once_with(1)
+
+    def test_within_rate_limit_of_read_token(self, MockedUser):  # noqa
+        # reads go through the service token which has fewer requests left
+        remaining = {'123456': 5000, 'service-token': 9}
+        MockedUser.get_remaining_requests.side_effect = lambda token: remaining[token]
+        self.revision_manager.token = SharedReadToken('123456', 'service-token')
+        self.revision_manager.token._read_token = 'service-token'  # the user can read the repo
+
+        results = change_states(self.revision_manager, 'send-for-2i', [1, 2])
+
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[1].message, 'Skipped, not enough GitHub requests left')
+
+
+@mock.patch('revision.bulk.User')
+class RequestsPerChangeTestCase(BaseGithubTestCase):
+    @responses.activate
+    def test_requests_per_change(self, MockedUser):  # noqa
+        MockedUser.get_remaining_requests.return_value = 5000
+        branch_name = generate_verba_branch_name('test1', 'test-owner')
+        pull = json.loads(self.get_fixture('open_pull.json'))
+        pull['head']['ref'] = branch_name
+        pull['issue_url'] = self.get_github_api_repo_url('issues/1')
+        issue = json.loads(self.get_fixture('issue.json'))
+        issue['labels'] = [{'name': 'draft'}]
+        issue['url'] = pull['issue_url']
+        issue['comments_url'] = self.get_github_api_repo_url('issues/1/comments')
+        ref = {'object': {'sha': 'abc'}}
+        head_ref_url = self.get_github_api_repo_url('git/refs/heads/{}'.format(quote(branch_name)))
+
+        responses.add(responses.GET, self.get_github_api_repo_url('pulls/1'), json=pull, status=200)
+        responses.add(responses.GET, head_ref_url, json=ref, status=200)
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/refs/heads/develop'), json=ref, status=200
+        )
+        responses.add(responses.GET, self.get_github_api_repo_url('issues/1'), json=issue, status=200)
+        responses.add(responses.PATCH, self.get_github_api_repo_url('issues/1'), json=issue, status=200)
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('issues/1/comments'),
+            body=self.get_fixture('comment.json'), status=201, content_type='application/json'
+        )
+
+        results = change_states(RevisionManager(token=self.TOKEN), 'publish', [1], comment='some comment')
+
+        self.assertTrue(results[0].ok)
+        self.assertEqual(len(responses.calls), REQUESTS_PER_CHANGE)
+
+
+@mock.patch('revision.bulk.User')
+class CreateRevisionsTestCase(SimpleTestCase):
+    def test_report(self, MockedUser):  # noqa
+        MockedUser.get_remaining_requests.return_value = 5000
+        revision_manager = mock.MagicMock(token='123456')
+        revision_manager.create.side_effect = lambda title, creator: mock.MagicMock(id=10, title=title)
+
+        results = create_revisions(
+            revision_manager,
+            [{'title': 'new revision', 'creator': 'test-owner'}, {'title': '', 'creator': 'test-owner'}]
+        )
+
+        self.assertEqual(results, [
+            BulkResult(key=1, title='new revision', ok=True, message='Created revision 10'),
+            BulkResult(key=2, title='', ok=False, message='This field is required.'),
+        ])
+        revision_manager.create.assert_called_once_with('new revision', 'test-owner')
+
+
+@mock.patch('revision.management.commands.bulk_revisions.change_states')
+@mock.patch('revision.management.commands.bulk_revisions.RevisionManager')
+class BulkRevisionsCommandTestCase(SimpleTestCase):
+    def test_change_states(self, MockedRevisionManager, mocked_change_states):  # noqa
+        mocked_change_states.return_value = [
+            BulkResult(key=1, title='some revision', ok=True, message='ok')
+        ]
+        out = StringIO()
+
+        call_command('bulk_revisions', 'publish', '1', '--token=123456', '--comment=done', stdout=out)
+
+        MockedRevisionManager.assert_called_with('123456')
+        mocked_change_states.assert_called_with(MockedRevisionManager(), 'publish', [1], comment='done')
+        self.assertTrue('some revision' in out.getvalue())
+
+    def test_failures(self, MockedRevisionManager, mocked_change_states):  # noqa
+        mocked_change_states.return_value = [
+            BulkResult(key=1, title='some revision', ok=False, message='failed')
+        ]
+
+        with self.assertRaises(CommandError):
+            call_command('bulk_revisions', 'publish', '1', '--token=123456', stdout=StringIO())
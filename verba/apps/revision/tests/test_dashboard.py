@@ -0,0 +1,91 @@
+import time
+import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from revision.dashboard import get_assigned_revisions, expire_dashboards, AssignedRevision
+
+
+@mock.patch.dict(settings.VERBA_CONFIG['LABELS'], {'ALLOWED': ['draft', '2i']})
+@mock.patch.dict(settings.VERBA_CONFIG['ASSIGNEES'], {'ALLOWED': ['writer', 'developer']})
+@mock.patch('revision.dashboard.Repo')
+class GetAssignedRevisionsTestCase(SimpleTestCase):
+    def setUp(self):
+        super(GetAssignedRevisionsTestCase, self).setUp()
+        cache.clear()
+
+        index_patcher = mock.patch('revision.dashboard.revision_index')
+        self.mocked_revision_index = index_patcher.start()
+        self.addCleanup(index_patcher.stop)
+        # not built yet
+        self.mocked_revision_index.get_checked_at.return_value = None
+
+    def get_mocked_issue(self):
+        return mock.MagicMock(
+            number=1, title='Stomach ache',
+            labels=['draft', 'other label'], assignees=['writer', 'somebody-else'],
+            updated_at=datetime.datetime(2016, 8, 6, 10, 5, 12)
+        )
+
+    def test_search(self, MockedRepo):  # noqa
+        MockedRepo().search_pulls.return_value = [self.get_mocked_issue()]
+
+        revisions = get_assigned_revisions('123456', 'writer', status='draft')
+
+        self.assertEqual(revisions, [
+            AssignedRevision(
+                id=1, title='Stomach ache', statuses=['draft'], assignees=['writer'],
+                updated_at=datetime.datetime(2016, 8, 6, 10, 5, 12)
+            )
+        ])
+        MockedRepo.assert_called_with('123456')
+        MockedRepo().search_pulls.assert_called_with(
+            ['is:open', 'head:{}|'.format(settings.VERBA_CONFIG['BRANCHES']['NAMESPACE']),
+             'assignee:writer', 'label:"draft"']
+        )
+
+    def test_indexed(self, MockedRepo):  # noqa
+        self.mocked_revision_index.get_checked_at.return_value = time.time()
+        self.mocked_revision_index.get_ids.return_value = {1}
+        MockedRepo().search_pulls.return_value = [self.get_mocked_issue()]
+
+        self.assertEqual([revision.id for revision in get_assigned_revisions('123456', 'writer')], [1])
+
+    def test_not_verba_branch(self, MockedRepo):  # noqa
+        # found by the search but not in the index although updated before it
+        self.mocked_revision_index.get_checked_at.return_value = time.time()
+        self.mocked_revision_index.get_ids.return_value = set()
+        MockedRepo().search_pulls.return_value = [self.get_mocked_issue()]
+
+        self.assertEqual(get_assigned_revisions('123456', 'writer'), [])
+        self.assertFalse(MockedRepo().get_pulls.called)
+
+    def test_not_indexed_yet(self, MockedRepo):  # noqa
+        # updated after the index was brought up to date
+        self.mocked_revision_index.get_checked_at.return_value = datetime.datetime(2016, 8, 1).timestamp()
+        self.mocked_revision_index.get_ids.return_value = set()
+        MockedRepo().search_pulls.return_value = [self.get_mocked_issue()]
+
+        self.assertEqual([revision.id for revision in get_assigned_revisions('123456', 'writer')], [1])
+
+    def test_cached_per_user(self, MockedRepo):  # noqa
+        MockedRepo().search_pulls.return_value = [self.get_mocked_issue()]
+
+        get_assigned_revisions('123456', 'writer')
+        get_assigned_revisions('123456', 'writer')
+        self.assertEqual(MockedRepo().search_pulls.call_count, 1)
+
+        get_assigned_revisions('654321', 'developer')
+        self.assertEqual(MockedRepo().search_pulls.call_count, 2)
+
+    def test_expire(self, MockedRepo):  # noqa
+        MockedRepo().search_pulls.return_value = []
+
+        get_assigned_revisions('123456', 'writer')
+        expire_dashboards()
+        get_assigned_revisions('123456', 'writer')
+
+        self.assertEqual(MockedRepo().search_pulls.call_count, 2)
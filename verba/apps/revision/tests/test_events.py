@@ -0,0 +1,151 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from revision.events import get_changes, EventsPoller
+
+
+def get_mocked_event(event_id, event_type, ref=None):
+    return mock.MagicMock(id=event_id, type=event_type, ref=ref)
+
+
+class GetChangesTestCase(SimpleTestCase):
+    def test_revision_events(self):
+        self.assertEqual(get_changes([get_mocked_event(1, 'IssuesEvent')], 'develop'), (True, False))
+        self.assertEqual(get_changes([get_mocked_event(1, 'PullRequestEvent')], 'develop'), (True, False))
+        self.assertEqual(
+            get_changes([get_mocked_event(1, 'PushEvent', 'refs/heads/some-branch')], 'develop'),
+            (True, False)
+        )
+
+    def test_base_branch_push(self):
+        self.assertEqual(
+            get_changes([get_mocked_event(1, 'PushEvent', 'refs/heads/develop')], 'develop'),
+            (False, True)
+        )
+
+    def test_other_events(self):
+        self.assertEqual(
+            get_changes([get_mocked_event(1, 'IssueCommentEvent'), get_mocked_event(2, 'WatchEvent')], 'develop'),
+            (False, False)
+        )
+
+
+@mock.patch('revision.events.expire_dashboards')
+@mock.patch('revision.events.search_index')
+@mock.patch('revision.events.overlap_index')
+@mock.patch('revision.events.revision_index')
+@mock.patch('revision.events.Repo')
+class EventsPollerTestCase(SimpleTestCase):
+    def setUp(self):
+        super(EventsPollerTestCase, self).setUp()
+        self.poller = EventsPoller('123456')
+
+    def test_first_poll_updates_everything(
+        self, MockedRepo, mocked_revision_index, mocked_overlap_index, mocked_search_index, mocked_expire_dashboards  # noqa
+    ):
+        MockedRepo().poll_events.return_value = ([get_mocked_event(2, 'WatchEvent')], 60)
+
+        self.assertEqual(self.poller.poll(), 60)
+
+        for index in (mocked_revision_index, mocked_overlap_index, mocked_search_index):
+            index.update.assert_called_once_with('123456', force=True)
+            # so that the other processes update their index too
+            index.mark_changed.assert_called_once_with()
+            # the events before the first poll are unknown
+            self.assertFalse(index.keep_fresh.called)
+        self.assertTrue(mocked_expire_dashboards.called)
+
+    def test_only_new_events(
+        self, MockedRepo, mocked_revision_index, mocked_overlap_index, mocked_search_index, mocked_expire_dashboards  # noqa
+    ):
+        MockedRepo().poll_events.return_value = ([get_mocked_event(2, 'WatchEvent')], 60)
+        self.poller.poll()
+        mocked_revision_index.reset_mock()
+        mocked_search_index.reset_mock()
+
+        # base branch push already seen, new pull request event
+        MockedRepo().poll_events.return_value = ([
+            get_mocked_event(3, 'PullRequestEvent'),
+            get_mocked_event(2, 'PushEvent', 'refs/heads/develop'),
+        ], 60)
+        self.poller.poll()
+
+        mocked_revision_index.update.assert_called_once_with('123456', force=True)
+        self.assertFalse(mocked_search_index.update.called)
+
+    def test_nothing_new(
+        self, MockedRepo, mocked_revision_index, mocked_overlap_index, mocked_search_index, mocked_expire_dashboards  # noqa
+    ):
+        MockedRepo().poll_events.return_value = ([get_mocked_event(2, 'PullRequestEvent')], 60)
+        self.poller.poll()
+        mocked_revision_index.reset_mock()
+
+        self.poller.poll()
+
+        self.assertFalse(mocked_revision_index.update.called)
+        mocked_revision_index.keep_fresh.assert_called_with(120)
+
+    def test_missed_events_update_everything(
+        self, MockedRepo, mocked_revision_index, mocked_overlap_index, mocked_search_index, mocked_expire_dashboards  # noqa
+    ):
+        MockedRepo().poll_events.return_value = ([get_mocked_event(2, 'WatchEvent')], 60)
+        self.poller.poll()
+        mocked_search_index.reset_mock()
+
+        # event 2 no longer in the page, so some events in between were missed
+        MockedRepo().poll_events.return_value = ([get_mocked_event(40, 'WatchEvent')], 60)
+        self.poller.poll()
+
+        mocked_search_index.update.assert_called_once_with('123456', force=True)
+        self.assertFalse(mocked_search_index.keep_fresh.called)
+
+    def test_failed_update_not_kept_fresh(
+        self, MockedRepo, mocked_revision_index, mocked_overlap_index, mocked_search_index, mocked_expire_dashboards  # noqa
+    ):
+        MockedRepo().poll_events.return_value = ([get_mocked_event(2, 'WatchEvent')], 60)
+        self.poller.poll()
+
+        mocked_overlap_index.update.side_effect = Exception()
+        MockedRepo().poll_events.return_value = ([get_mocked_event(3, 'PullRequestEvent')], 60)
+        self.poller.poll()
+
+        self.assertTrue(mocked_revision_index.update.called)
+        for index in (mocked_revision_index, mocked_overlap_index, mocked_search_index):
+            self.assertFalse(index.keep_fresh.called)
+
+    def test_indexes_not_built_skipped(
+        self, MockedRepo, mocked_revision_index, mocked_overlap_index, mocked_search_index, mocked_expire_dashboards  # noqa
+    ):
+        mocked_search_index.is_built.return_value = False
+        MockedRepo().poll_events.return_value = ([], 60)
+
+        self.poller.poll()
+
+        self.assertFalse(mocked_search_index.update.called)
+        self.assertTrue(mocked_revision_index.update.called)
+
+    def test_min_poll_interval(
+        self, MockedRepo, mocked_revision_index, mocked_overlap_index, mocked_search_index, mocked_expire_dashboards  # noqa
+    ):
+        MockedRepo().poll_events.return_value = ([], 1)
+
+        self.assertEqual(self.poller.poll(), 60)
+
+
+class EventsPollerLockTestCase(SimpleTestCase):
+    def test_only_one_poller_holds_the_lock(self):
+        with tempfile.TemporaryDirectory() as lock_dir:
+            lock_path = os.path.join(lock_dir, 'events.lock')
+            poller = EventsPoller('123456', lock_path=lock_path)
+            other_poller = EventsPoller('123456', lock_path=lock_path)
+
+            self.assertTrue(poller.acquire_lock())
+            self.assertTrue(poller.acquire_lock())
+            self.assertFalse(other_poller.acquire_lock())
+
+            poller.release_lock()
+            self.assertTrue(other_poller.acquire_lock())
+            other_poller.release_lock()
@@ -0,0 +1,146 @@
+import io
+import json
+import tarfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from github.exceptions import FileTooLargeException
+
+from revision.export import iter_tarball, import_tarball, get_changed_files, get_blob_sha
+from revision.exceptions import InvalidTarballException
+
+
+def build_tarball(files):
+    tarball = io.BytesIO()
+    with tarfile.open(fileobj=tarball, mode='w:gz') as tar:
+        for name, content in files.items():
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = len(content)
+            tar.addfile(tar_info, io.BytesIO(content))
+    tarball.seek(0)
+    return tarball
+
+
+class GetBlobShaTestCase(SimpleTestCase):
+    def test_same_as_git(self):
+        # git hash-object of a file with 'hello\n'
+        self.assertEqual(get_blob_sha(b'hello\n'), 'ce013625030ba8dba906f756967f9e9ca394464a')
+
+
+@mock.patch('revision.export.Branch')
+class IterTarballTestCase(SimpleTestCase):
+    def test_tarball(self, MockedBranch):  # noqa
+        contents = {
+            'sha1': json.dumps({'title': 'page 1'}),
+            'sha2': 'included content',
+            'sha3': json.dumps({'title': 'page 2'}),
+        }
+        MockedBranch().get_file.side_effect = lambda path, sha: mock.Mock(content=contents[sha])
+        entries = {
+            'pages/page1': 'tree1',
+            'pages/page1/manifest.json': 'sha1',
+            'pages/page1/content.md': 'sha2',
+            'pages/page2/manifest.json': 'sha3',
+            'pages/not-a-page/file.md': 'sha4',
+        }
+
+        chunks = list(iter_tarball('123456', 'some-branch', entries))
+
+        self.assertTrue(len(chunks) > 1)
+        with tarfile.open(fileobj=io.BytesIO(b''.join(chunks)), mode='r:gz') as tar:
+            files = {
+                tar_info.name: tar.extractfile(tar_info).read().decode('utf-8')
+                for tar_info in tar
+            }
+        self.assertEqual(files, {
+            'page1/manifest.json': contents['sha1'],
+            'page1/content.md': contents['sha2'],
+            'page2/manifest.json': contents['sha3'],
+        })
+        MockedBranch.assert_called_with('123456', 'some-branch')
+
+
+class GetChangedFilesTestCase(SimpleTestCase):
+    def test_only_changed(self):
+        manifest = json.dumps({'title': 'page 1'}).encode('utf-8')
+        tarball = build_tarball({
+            'page1/manifest.json': manifest,
+            'page1/content.md': b'new content',
+            'page2/new.md': b'new file',
+        })
+        entries = {
+            'pages/page1/manifest.json': get_blob_sha(manifest),
+            'pages/page1/content.md': get_blob_sha(b'old content'),
+        }
+
+        self.assertEqual(get_changed_files(tarball, entries), {
+            'pages/page1/content.md': b'new content',
+            'pages/page2/new.md': b'new file',
+        })
+
+    def test_path_outside_content_folder(self):
+        tarball = build_tarball({'../other/file.md': b'content'})
+
+        self.assertRaises(InvalidTarballException, get_changed_files, tarball, {})
+
+    def test_invalid_manifest(self):
+        tarball = build_tarball({'page1/manifest.json': b'not json'})
+
+        self.assertRaises(InvalidTarballException, get_changed_files, tarball, {})
+
+    def test_not_a_tarball(self):
+        self.assertRaises(InvalidTarballException, get_changed_files, io.BytesIO(b'not a tarball'), {})
+
+    @mock.patch.dict(settings.VERBA_CONFIG['FILES'], {'MAX_SIZE': 5})
+    def test_file_too_large(self):
+        tarball = build_tarball({'page1/content.md': b'larger than 5 bytes'})
+
+        self.assertRaises(FileTooLargeException, get_changed_files, tarball, {})
+
+    @mock.patch.dict(settings.VERBA_CONFIG['IMPORT'], {'MAX_SIZE': 10})
+    def test_files_too_large_together(self):
+        tarball = build_tarball({'page1/content.md': b'6 byte', 'page2/content.md': b'6 byte'})
+
+        self.assertRaises(FileTooLargeException, get_changed_files, tarball, {})
+
+    @mock.patch.dict(settings.VERBA_CONFIG['IMPORT'], {'MAX_MEMBERS': 2})
+    def test_too_many_members(self):
+        tarball = build_tarball({'page{}/content.md'.format(index): b'content' for index in range(3)})
+
+        self.assertRaises(InvalidTarballException, get_changed_files, tarball, {})
+
+
+@mock.patch('revision.export.Branch')
+class ImportTarballTestCase(SimpleTestCase):
+    def test_single_commit(self, MockedBranch):  # noqa
+        MockedBranch().create_blob.side_effect = lambda content: 'blob-{}'.format(content.decode('utf-8'))
+        tarball = build_tarball({
+            'page1/content.md': b'new',
+            'page2/content.md': b'same',
+        })
+        entries = {'pages/page2/content.md': get_blob_sha(b'same')}
+
+        paths = import_tarball('123456', 'some-branch', entries, tarball)
+
+        self.assertEqual(paths, ['pages/page1/content.md'])
+        MockedBranch().commit_blobs.assert_called_once_with(
+            {'pages/page1/content.md': 'blob-new'},
+            message='[ci skip] Import 1 changed files'
+        )
+
+    def test_pinned_parent(self, MockedBranch):  # noqa
+        tarball = build_tarball({'page1/content.md': b'new'})
+
+        import_tarball('123456', 'some-branch', {}, tarball, parent_sha='head-sha')
+
+        MockedBranch.assert_called_with('123456', 'some-branch', sha='head-sha')
+
+    def test_nothing_changed(self, MockedBranch):  # noqa
+        tarball = build_tarball({'page1/content.md': b'same'})
+
+        paths = import_tarball('123456', 'some-branch', {'pages/page1/content.md': get_blob_sha(b'same')}, tarball)
+
+        self.assertEqual(paths, [])
+        self.assertFalse(MockedBranch().commit_blobs.called)
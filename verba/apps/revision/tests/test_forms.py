@@ -1,8 +1,10 @@
 from unittest import mock
 
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test.testcases import SimpleTestCase
 
-from revision.forms import NewRevisionForm, ContentForm, SendFor2iForm, SendBackForm, PublishForm, AddCommentForm
+from revision.forms import NewRevisionForm, ContentForm, SendFor2iForm, SendBackForm, PublishForm, AddCommentForm, \
+    BulkChangeStateForm, BulkCreateForm
 from revision.constants import BRANCH_PARTS_SEPARATOR
 
 
@@ -208,3 +210,64 @@ class AddCommentFormTestCase(SimpleTestCase):
 
         self.assertFalse(form.is_valid())
         self.assertEqual(self.revision.add_comment.call_count, 0)
+
+
+class BulkChangeStateFormTestCase(SimpleTestCase):
+    def setUp(self):
+        super(BulkChangeStateFormTestCase, self).setUp()
+        self.revision_ids = {1, 2}
+
+    def test_valid(self):
+        form = BulkChangeStateForm(
+            revision_ids=self.revision_ids,
+            data={'action': 'publish', 'revisions': ['1', '2']}
+        )
+
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['revisions'], [1, 2])
+
+    def test_unknown_revision(self):
+        form = BulkChangeStateForm(
+            revision_ids=self.revision_ids,
+            data={'action': 'publish', 'revisions': ['3']}
+        )
+
+        self.assertFalse(form.is_valid())
+        self.assertTrue('revisions' in form.errors)
+
+    def test_unknown_action(self):
+        form = BulkChangeStateForm(
+            revision_ids=self.revision_ids,
+            data={'action': 'merge', 'revisions': ['1']}
+        )
+
+        self.assertFalse(form.is_valid())
+        self.assertTrue('action' in form.errors)
+
+
+class BulkCreateFormTestCase(SimpleTestCase):
+    def get_form(self, content):
+        return BulkCreateForm(
+            data={},
+            files={'csv_file': SimpleUploadedFile('revisions.csv', content)}
+        )
+
+    def test_valid(self):
+        form = self.get_form('title,notes\nfirst,a\nsecond,b\n'.encode('utf-8'))
+
+        self.assertTrue(form.is_valid())
+        self.assertEqual(
+            [row['title'] for row in form.cleaned_data['csv_file']], ['first', 'second']
+        )
+
+    def test_title_column_missing(self):
+        form = self.get_form(b'name\nfirst\n')
+
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['csv_file'], ["Column 'title' missing"])
+
+    def test_too_many_rows(self):
+        content = 'title\n' + 'some title\n' * (BulkCreateForm.MAX_ROWS + 1)
+        form = self.get_form(content.encode('utf-8'))
+
+        self.assertFalse(form.is_valid())
@@ -0,0 +1,118 @@
+import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from revision.index import RevisionIndex
+from revision.exceptions import InvalidCursorException
+
+
+@mock.patch('revision.index.RevisionManager')
+class RevisionIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        super(RevisionIndexTestCase, self).setUp()
+        self.index = RevisionIndex(database=':memory:')
+
+    def get_mocked_revision(self, revision_id, title, day=1, statuses=None, assignees=None, creator='writer'):
+        return mock.MagicMock(
+            id=revision_id,
+            title=title,
+            creator=creator,
+            statuses=statuses or ['draft'],
+            assignees=assignees or [creator],
+            updated_at=datetime.datetime(2016, 8, day, 10, 0, 0, tzinfo=timezone.utc),
+            head_sha='sha{}'.format(revision_id)
+        )
+
+    def get_ids(self, page):
+        return [revision.id for revision in page.revisions]
+
+    def test_filters(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get_all.return_value = [
+            self.get_mocked_revision(1, 'Stomach ache', day=1),
+            self.get_mocked_revision(2, 'Headache', day=2, statuses=['2i'], assignees=['developer']),
+            self.get_mocked_revision(3, '100% cotton', day=3, creator='developer'),
+        ]
+        self.index.update('123456')
+
+        self.assertEqual(self.get_ids(self.index.query()), [3, 2, 1])
+        self.assertEqual(self.get_ids(self.index.query(status='2i')), [2])
+        self.assertEqual(self.get_ids(self.index.query(assignee='writer')), [1])
+        self.assertEqual(self.get_ids(self.index.query(creator='developer')), [3])
+        self.assertEqual(self.get_ids(self.index.query(title='ACHE')), [2, 1])
+        self.assertEqual(self.get_ids(self.index.query(title='0%')), [3])
+        self.assertEqual(self.get_ids(self.index.query(updated_since=datetime.date(2016, 8, 2))), [3, 2])
+        self.assertEqual(self.get_ids(self.index.query(order='title')), [3, 2, 1])
+        self.assertEqual(self.get_ids(self.index.query(status='draft', creator='writer')), [1])
+        self.assertEqual(self.index.get_ids(), {1, 2, 3})
+
+        revision = self.index.query(status='2i').revisions[0]
+        self.assertEqual(revision.title, 'Headache')
+        self.assertEqual(revision.statuses, ['2i'])
+        self.assertEqual(revision.assignees, ['developer'])
+        self.assertEqual(revision.updated_at, datetime.datetime(2016, 8, 2, 10, 0, 0, tzinfo=timezone.utc))
+
+    def test_cursor_pagination(self, MockedRevisionManager):  # noqa
+        # revisions 1-3 updated at the same time to test ties
+        MockedRevisionManager().get_all.return_value = [
+            self.get_mocked_revision(revision_id, 'revision {}'.format(revision_id), day=min(revision_id, 3))
+            for revision_id in range(1, 6)
+        ]
+        self.index.update('123456')
+
+        for order, expected_ids in [('-updated', [5, 4, 3, 2, 1]), ('title', [1, 2, 3, 4, 5])]:
+            ids = []
+            cursor = None
+            while True:
+                page = self.index.query(order=order, cursor=cursor, page_size=2)
+                ids += self.get_ids(page)
+                cursor = page.next_cursor
+                if not cursor:
+                    break
+            self.assertEqual(ids, expected_ids)
+
+    def test_invalid_cursor(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get_all.return_value = []
+        self.index.update('123456')
+
+        self.assertRaises(InvalidCursorException, self.index.query, cursor='invalid')
+
+    @mock.patch.dict(settings.VERBA_CONFIG['REVISION_INDEX'], {'REFRESH_INTERVAL': 0})
+    def test_incremental_update(self, MockedRevisionManager):  # noqa
+        revision1 = self.get_mocked_revision(1, 'revision 1')
+        revision2 = self.get_mocked_revision(2, 'revision 2')
+        MockedRevisionManager().get_all.return_value = [revision1, revision2]
+        self.index.update('123456')
+
+        # revision 1 unchanged, revision 2 sent for 2i, revision 3 opened
+        revision1_again = mock.MagicMock(
+            id=1, updated_at=revision1.updated_at, head_sha=revision1.head_sha
+        )
+        revision2_changed = self.get_mocked_revision(2, 'revision 2', day=2, statuses=['2i'])
+        revision3 = self.get_mocked_revision(3, 'revision 3', day=3)
+        MockedRevisionManager().get_all.return_value = [revision1_again, revision2_changed, revision3]
+        self.index.update('123456')
+
+        self.assertEqual(self.get_ids(self.index.query()), [3, 2, 1])
+        self.assertEqual(self.get_ids(self.index.query(status='2i')), [2])
+        self.assertEqual(self.get_ids(self.index.query(status='draft')), [3, 1])
+
+        # revision 1 closed
+        MockedRevisionManager().get_all.return_value = [revision2_changed, revision3]
+        self.index.update('123456')
+
+        self.assertEqual(self.get_ids(self.index.query()), [3, 2])
+        self.assertEqual(self.get_ids(self.index.query(status='draft')), [3])
+
+    def test_expire(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get_all.return_value = []
+
+        self.index.update('123456')
+        self.index.update('123456')
+        self.assertEqual(MockedRevisionManager().get_all.call_count, 1)
+
+        self.index.expire()
+        self.index.update('123456')
+        self.assertEqual(MockedRevisionManager().get_all.call_count, 2)
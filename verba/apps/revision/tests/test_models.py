@@ -1,18 +1,25 @@
 import json
 import datetime
+import responses
 from unittest import mock
 
 from verba_settings import config
 
+from django.conf import settings
 from django.test import SimpleTestCase
 
+import github
+from github import Comparison, ChangedFile
+from github.cache import blob_cache
 from github.exceptions import NotFoundException
+from github.tests.test_base import BaseGithubTestCase
 
-from revision.models import RevisionManager, Revision, RevisionFile, Comment, PlainActivity
-from revision.utils import generate_verba_branch_name
+from revision.models import RevisionManager, Revision, RevisionFile, Comment, PlainActivity, ChangeSummary
+from revision.utils import generate_verba_branch_name, get_blob_sha
 from revision.constants import REVISION_LOG_FILE_COMMIT_MSG, REVISION_BODY_MSG, CONTENT_FILE_MANIFEST, \
     CONTENT_FILE_INCLUSION_DIRECTIVE, FILE_CHANGED_COMMIT_MSG
 from revision.exceptions import RevisionNotFoundException
+from revision.cache import manifest_cache
 
 
 @mock.patch('revision.models.Repo')
@@ -94,6 +101,8 @@ class RevisionManagerTestCase(SimpleTestCase):
         revision = manager.get(revision_id)
 
         self.assertEqual(revision.id, revision_id)
+        # read at the latest commit of its branch
+        self.assertTrue(mocked_repo.get_pull.return_value.refresh_shas.called)
 
     def test_get_not_found(self, MockedRepo):  # noqa
         revision_id = 1
@@ -319,6 +328,35 @@ class RevisionTestCase(SimpleTestCase):
             ['some-path/test1', 'test3']
         )
 
+        # blob shas from the tree are now known
+        self.assertEqual(self.revision.get_blob_sha(git_files[1].path), git_files[1].sha)
+        self.assertEqual(self.revision.get_blob_sha('unknown-path'), None)
+        self.assertEqual(
+            self.revision.get_blob_shas(),
+            {git_file.path: git_file.sha for git_file in git_files}
+        )
+
+    def test_get_changed_paths(self):
+        content_path = '{}some-path/test1/{}'.format(config.PATHS.CONTENT_FOLDER, CONTENT_FILE_MANIFEST)
+        self.revision._pull.files = [
+            content_path,
+            '{}some-log-file'.format(config.PATHS.REVISIONS_LOG_FOLDER)
+        ]
+
+        self.assertEqual(self.revision.get_changed_paths(), [content_path])
+
+    def test_get_change_summary(self):
+        self.revision._pull.comparison = Comparison(ahead_by=3, behind_by=12, files=(
+            ChangedFile(path='pages/page1/manifest.json', status='modified', additions=3, deletions=1),
+            ChangedFile(path='pages/page1/content.md', status='modified', additions=10, deletions=5),
+            ChangedFile(path='pages/page2/manifest.json', status='added', additions=4, deletions=0),
+            ChangedFile(path='content-revision-logs/some-log-file', status='added', additions=0, deletions=0),
+        ))
+
+        self.assertEqual(self.revision.get_change_summary(), ChangeSummary(
+            pages=2, files=3, additions=17, deletions=6, behind_by=12, base_branch=config.BRANCHES.BASE
+        ))
+
     def test_get_file(self):
         path = '{}some-path/test1/{}'.format(config.PATHS.CONTENT_FOLDER, CONTENT_FILE_MANIFEST)
         rev_file = self.revision.get_file(path)
@@ -334,8 +372,10 @@ class RevisionFileTestCase(SimpleTestCase):
             config.PATHS.CONTENT_FOLDER, CONTENT_FILE_MANIFEST
         )
         self.pull = mock.MagicMock()
+        revision = mock.MagicMock(_pull=self.pull)
+        revision.get_blob_sha.return_value = None
         self.revision_file = RevisionFile(
-            _file=mocked_file, revision=mock.MagicMock(_pull=self.pull)
+            _file=mocked_file, revision=revision
         )
 
     def test_path(self):
@@ -343,6 +383,35 @@ class RevisionFileTestCase(SimpleTestCase):
             self.revision_file.path, 'some-path/test-page'
         )
 
+    def test_manifest_parsed_once_per_sha(self):
+        manifest_cache.clear()
+        self.revision_file._file.sha = 'manifest-sha'
+        self.revision_file._file.content = json.dumps({'area1': 'some text'})
+
+        items = self.revision_file.get_content_items()
+        items['area1'] = 'changed by the caller'
+
+        # changing the manifest content wouldn't have any effect as it's not parsed again
+        self.revision_file._file.content = json.dumps({'area1': 'some other text'})
+        self.assertDictEqual(
+            self.revision_file.get_content_items(), {'area1': 'some text'}
+        )
+
+    def test_get_paths(self):
+        self.revision_file._file.content = json.dumps({
+            'area1': 'some text',
+            'area2': '{}some-content-file'.format(CONTENT_FILE_INCLUSION_DIRECTIVE),
+            'area3': '{}some-content-file'.format(CONTENT_FILE_INCLUSION_DIRECTIVE)
+        })
+
+        self.assertEqual(
+            self.revision_file.get_paths(),
+            [
+                '{}some-path/test-page/{}'.format(config.PATHS.CONTENT_FOLDER, CONTENT_FILE_MANIFEST),
+                '{}some-path/test-page/some-content-file'.format(config.PATHS.CONTENT_FOLDER)
+            ]
+        )
+
     def test_get_content_items(self):
         self.revision_file._file.content = json.dumps({
             'area1': 'some text',
@@ -354,7 +423,7 @@ class RevisionFileTestCase(SimpleTestCase):
 
         content_items = self.revision_file.get_content_items()
         self.pull.branch.get_file.assert_called_with(
-            '{}some-path/test-page/some-content-file'.format(config.PATHS.CONTENT_FOLDER)
+            '{}some-path/test-page/some-content-file'.format(config.PATHS.CONTENT_FOLDER), sha=None
         )
         self.assertDictEqual(
             content_items, {
@@ -363,15 +432,37 @@ class RevisionFileTestCase(SimpleTestCase):
             }
         )
 
+    def test_get_content_items_deduplicates_includes(self):
+        self.revision_file._file.content = json.dumps({
+            'area1': '{}file1'.format(CONTENT_FILE_INCLUSION_DIRECTIVE),
+            'area2': '{}file2'.format(CONTENT_FILE_INCLUSION_DIRECTIVE),
+            'area3': '{}file1'.format(CONTENT_FILE_INCLUSION_DIRECTIVE)
+        })
+        self.revision_file.revision.get_blob_sha.side_effect = lambda path: 'sha-{}'.format(path[-5:])
+        self.pull.branch.get_file.side_effect = lambda path, sha: mock.MagicMock(
+            content='content of {}'.format(sha)
+        )
+
+        content_items = self.revision_file.get_content_items()
+
+        self.assertEqual(self.pull.branch.get_file.call_count, 2)
+        self.assertDictEqual(
+            content_items, {
+                'area1': 'content of sha-file1',
+                'area2': 'content of sha-file2',
+                'area3': 'content of sha-file1'
+            }
+        )
+
     def test_save_content_items(self):
         self.revision_file._file.content = json.dumps({
             'area1': 'some text',
             'area2': '{}some-content-file'.format(CONTENT_FILE_INCLUSION_DIRECTIVE)
         })
-        external_git_file = mock.MagicMock(
+        self.pull.branch.get_file.return_value = mock.MagicMock(
             content='some external file content'
         )
-        self.pull.branch.get_file.return_value = external_git_file
+        self.pull.branch.commit_files.return_value = 'new-head-sha'
 
         # save
         self.revision_file.save_content_items({
@@ -379,16 +470,13 @@ class RevisionFileTestCase(SimpleTestCase):
             'area2': 'some new text for area2'
         })
 
-        # check that external file saved with new content
-        external_git_file.change_content.assert_called_with(
-            message=FILE_CHANGED_COMMIT_MSG.format(path='some-path/test-page/some-content-file'),
-            new_content='some new text for area2'
-        )
-
-        # check that manifest file saved with right content
-        args, kwargs = self.revision_file._file.change_content.call_args
+        # manifest and external file saved in one commit
+        args, kwargs = self.pull.branch.commit_files.call_args
+        external_path = '{}some-path/test-page/some-content-file'.format(config.PATHS.CONTENT_FOLDER)
+        self.assertEqual(sorted(args[0]), sorted([external_path, self.revision_file._file.path]))
+        self.assertEqual(args[0][external_path], 'some new text for area2')
         self.assertDictEqual(
-            json.loads(args[0]), {
+            json.loads(args[0][self.revision_file._file.path]), {
                 'area1': 'some new text for area1',
                 'area2': '{}some-content-file'.format(CONTENT_FILE_INCLUSION_DIRECTIVE)
             }
@@ -397,6 +485,100 @@ class RevisionFileTestCase(SimpleTestCase):
             kwargs['message'],
             FILE_CHANGED_COMMIT_MSG.format(path='some-path/test-page'),
         )
+        self.assertEqual(self.pull.head_sha, 'new-head-sha')
+
+    def test_save_only_changed(self):
+        self.revision_file._file.content = json.dumps({
+            'area1': 'some text',
+            'area2': '{}some-content-file'.format(CONTENT_FILE_INCLUSION_DIRECTIVE)
+        })
+        external_git_file = mock.MagicMock(sha=get_blob_sha(b'same external text'))
+        self.pull.branch.get_file.return_value = external_git_file
+
+        self.revision_file.save_content_items({
+            'area1': 'some new text for area1',
+            'area2': 'same external text'
+        })
+
+        self.assertFalse(external_git_file.change_content.called)
+        self.assertFalse(self.pull.branch.commit_files.called)
+        args, kwargs = self.revision_file._file.change_content.call_args
+        self.assertEqual(json.loads(kwargs['new_content'])['area1'], 'some new text for area1')
+        self.assertEqual(kwargs['message'], FILE_CHANGED_COMMIT_MSG.format(path='some-path/test-page'))
+        self.assertEqual(self.pull.head_sha, self.revision_file._file.ref)
+
+
+class SaveRevisionFileTestCase(BaseGithubTestCase):
+    def setUp(self):
+        super(SaveRevisionFileTestCase, self).setUp()
+        self.branch_name = 'some-branch'
+        self.pull = github.PullRequest(self.TOKEN, {
+            'number': 1,
+            'head': {'ref': self.branch_name, 'sha': 'head-sha'},
+            'base': {'ref': 'develop', 'sha': 'base-sha'},
+        })
+        self.folder = '{}some-path/test-page/'.format(config.PATHS.CONTENT_FOLDER)
+        self.manifest = json.dumps({
+            'area1': '{}file1'.format(CONTENT_FILE_INCLUSION_DIRECTIVE),
+            'area2': '{}file2'.format(CONTENT_FILE_INCLUSION_DIRECTIVE)
+        }, indent=4, sort_keys=True)
+        blob_shas = {
+            '{}{}'.format(self.folder, CONTENT_FILE_MANIFEST): get_blob_sha(self.manifest.encode('utf-8')),
+            '{}file1'.format(self.folder): 'file1-sha',
+            '{}file2'.format(self.folder): 'file2-sha',
+        }
+        blob_cache.set(blob_shas['{}{}'.format(self.folder, CONTENT_FILE_MANIFEST)], self.manifest)
+
+        revision = mock.MagicMock(_pull=self.pull)
+        revision.get_blob_sha.side_effect = blob_shas.get
+        manifest_path = '{}{}'.format(self.folder, CONTENT_FILE_MANIFEST)
+        self.revision_file = RevisionFile(
+            self.pull.branch.get_file(manifest_path, sha=blob_shas[manifest_path]), revision
+        )
+
+    @responses.activate
+    @mock.patch.dict(settings.VERBA_CONFIG['FILES'], {'LARGE_SIZE': 10})
+    def test_save_includes_in_one_commit(self):
+        manifest_cache.clear()
+        ref_url = self.get_github_api_repo_url('git/refs/heads/{}'.format(self.branch_name))
+        blob_shas = iter(['new-file1-sha', 'new-file2-sha'])
+        responses.add_callback(
+            responses.POST, self.get_github_api_repo_url('git/blobs'),
+            callback=lambda request: (201, {}, json.dumps({'sha': next(blob_shas)})),
+            content_type='application/json'
+        )
+        responses.add(
+            responses.GET, self.get_github_api_repo_url('git/commits/head-sha'),
+            body=json.dumps({'tree': {'sha': 'head-tree-sha'}}), status=200, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/trees'),
+            body=json.dumps({'sha': 'new-tree-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.POST, self.get_github_api_repo_url('git/commits'),
+            body=json.dumps({'sha': 'new-commit-sha'}), status=201, content_type='application/json'
+        )
+        responses.add(
+            responses.PATCH, ref_url,
+            body=json.dumps({'object': {'sha': 'new-commit-sha'}}), status=200, content_type='application/json'
+        )
+
+        # the second include is over FILES.LARGE_SIZE
+        self.revision_file.save_content_items({
+            'area1': 'small',
+            'area2': 'content larger than 10 bytes'
+        })
+
+        ref_updates = [call for call in responses.calls if call.request.method == 'PATCH']
+        self.assertEqual(len(ref_updates), 1)
+        tree_data = json.loads(responses.calls[3].request.body)
+        self.assertEqual(
+            [entry['path'] for entry in tree_data['tree']],
+            ['{}file1'.format(self.folder), '{}file2'.format(self.folder)]
+        )
+        self.assertEqual(json.loads(responses.calls[4].request.body)['parents'], ['head-sha'])
+        self.assertEqual(self.pull.head_sha, 'new-commit-sha')
 
 
 class CommentTestCase(SimpleTestCase):
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from revision.overlap import OverlapIndex, Overlap
+
+
+@mock.patch('revision.overlap.RevisionManager')
+class OverlapIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        super(OverlapIndexTestCase, self).setUp()
+        self.index = OverlapIndex()
+
+    def get_mocked_revision(self, revision_id, head_sha, paths):
+        revision = mock.MagicMock(id=revision_id, title='revision {}'.format(revision_id), head_sha=head_sha)
+        revision.get_changed_paths.return_value = paths
+        return revision
+
+    def test_get_overlaps(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get_all.return_value = [
+            self.get_mocked_revision(1, 'sha1', ['pages/a/manifest.json']),
+            self.get_mocked_revision(2, 'sha2', ['pages/a/content.md', 'pages/b/manifest.json']),
+            self.get_mocked_revision(3, 'sha3', ['pages/a/manifest.json']),
+        ]
+        self.index.update('123456')
+
+        self.assertEqual(
+            self.index.get_overlaps(['pages/a/manifest.json', 'pages/a/content.md'], 1),
+            [Overlap(revision_id=2, title='revision 2'), Overlap(revision_id=3, title='revision 3')]
+        )
+        self.assertEqual(self.index.get_overlaps(['pages/b/manifest.json'], 2), [])
+        self.assertEqual(self.index.get_overlaps(['pages/c/manifest.json'], 1), [])
+
+    @mock.patch.dict(settings.VERBA_CONFIG['OVERLAP'], {'REFRESH_INTERVAL': 0})
+    def test_incremental_update(self, MockedRevisionManager):  # noqa
+        revision1 = self.get_mocked_revision(1, 'sha1', ['pages/a/manifest.json'])
+        revision2 = self.get_mocked_revision(2, 'sha2', ['pages/b/manifest.json'])
+        MockedRevisionManager().get_all.return_value = [revision1, revision2]
+        self.index.update('123456')
+
+        # revision 1 unchanged, revision 2 has new commits, revision 3 opened
+        revision1_again = self.get_mocked_revision(1, 'sha1', [])
+        revision2_changed = self.get_mocked_revision(2, 'sha2-new', ['pages/a/manifest.json'])
+        revision3 = self.get_mocked_revision(3, 'sha3', ['pages/b/manifest.json'])
+        MockedRevisionManager().get_all.return_value = [revision1_again, revision2_changed, revision3]
+        self.index.update('123456')
+
+        self.assertFalse(revision1_again.get_changed_paths.called)
+        self.assertEqual(
+            [overlap.revision_id for overlap in self.index.get_overlaps(['pages/a/manifest.json'], None)],
+            [1, 2]
+        )
+        self.assertEqual(
+            [overlap.revision_id for overlap in self.index.get_overlaps(['pages/b/manifest.json'], None)],
+            [3]
+        )
+
+        # revision 1 closed
+        MockedRevisionManager().get_all.return_value = [revision2_changed, revision3]
+        self.index.update('123456')
+
+        self.assertEqual(
+            [overlap.revision_id for overlap in self.index.get_overlaps(['pages/a/manifest.json'], None)],
+            [2]
+        )
+
+    def test_checked_once_per_refresh_interval(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get_all.return_value = []
+
+        self.index.update('123456')
+        self.index.update('123456')
+
+        self.assertEqual(MockedRevisionManager().get_all.call_count, 1)
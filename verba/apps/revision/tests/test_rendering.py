@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from revision.rendering import render_markdown
+
+
+class RenderMarkdownTestCase(SimpleTestCase):
+    def setUp(self):
+        super(RenderMarkdownTestCase, self).setUp()
+        cache.clear()
+
+    def test_render(self):
+        self.assertEqual(
+            render_markdown('some **text**\n\n* item'),
+            '<p>some <strong>text</strong></p>\n<ul>\n<li>item</li>\n</ul>\n'
+        )
+
+    def test_html_escaped(self):
+        self.assertEqual(
+            render_markdown('<script>alert(1)</script> [link](javascript:alert(1))'),
+            '<p>&lt;script&gt;alert(1)&lt;/script&gt; <a href="">link</a>)</p>\n'
+        )
+
+    def test_comment_escaped(self):
+        html = Template('{% load rendering %}{{ comment|markdown }}').render(Context({
+            'comment': '<script>alert(1)</script>\n\n[link](javascript:alert(1)) ![image](JaVaScRiPt:alert(1))'
+        }))
+
+        self.assertNotIn('<script', html)
+        self.assertNotIn('javascript:', html.lower())
+        self.assertIn('&lt;script&gt;', html)
+
+    def test_empty(self):
+        self.assertEqual(render_markdown(''), '')
+        self.assertEqual(render_markdown(None), '')
+
+    @mock.patch('revision.rendering.get_markdown')
+    def test_cached_by_content(self, mocked_get_markdown):
+        mocked_get_markdown.return_value.return_value = '<p>text</p>'
+
+        render_markdown('text')
+        self.assertEqual(render_markdown('text'), '<p>text</p>')
+
+        self.assertEqual(mocked_get_markdown.return_value.call_count, 1)
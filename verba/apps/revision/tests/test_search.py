@@ -0,0 +1,145 @@
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from github import TreeEntry
+
+from revision.search import SearchIndex, tokenize
+from revision.cache import manifest_cache, document_cache
+
+
+class BaseSearchTestCase(SimpleTestCase):
+    def setUp(self):
+        super(BaseSearchTestCase, self).setUp()
+        manifest_cache.clear()
+        document_cache.clear()
+
+        self.blobs = {
+            'm1': json.dumps({'title': 'Headache', 'content': '!file=content.md'}),
+            'c1': 'Take paracetamol',
+            'm2': json.dumps({'title': 'Stomach ache', 'content': 'Take paracetamol or ibuprofen'}),
+            'm3': json.dumps({'title': 'Stomach ache', 'content': 'Drink water'}),
+        }
+        self.tree = {
+            'sha': 'tree1',
+            'tree': [
+                {'path': 'headache', 'sha': 'tree-headache'},
+                {'path': 'headache/manifest.json', 'sha': 'm1'},
+                {'path': 'headache/content.md', 'sha': 'c1'},
+                {'path': 'stomach-ache', 'sha': 'tree-stomach'},
+                {'path': 'stomach-ache/manifest.json', 'sha': 'm2'},
+            ]
+        }
+
+        branch_patcher = mock.patch('revision.search.Branch')
+        self.MockedBranch = branch_patcher.start()
+        self.addCleanup(branch_patcher.stop)
+        self.MockedBranch().get_git_tree.side_effect = lambda *args, **kwargs: (
+            self.tree['sha'],
+            tuple(TreeEntry(name=tree_el['path'], type='blob', sha=tree_el['sha']) for tree_el in self.tree['tree'])
+        )
+
+        file_patcher = mock.patch('revision.search.File')
+        self.MockedFile = file_patcher.start()
+        self.addCleanup(file_patcher.stop)
+        self.MockedFile.side_effect = lambda token, path, branch_name, sha: mock.Mock(
+            path=path, sha=sha, content=self.blobs[sha]
+        )
+
+        self.index = SearchIndex()
+
+    def get_fetched_shas(self):
+        return [call[1]['sha'] for call in self.MockedFile.call_args_list]
+
+    def search(self, query, overlay=None):
+        return [
+            result.path for result in self.index.search(tokenize(query), overlay)
+        ]
+
+
+class SearchIndexTestCase(BaseSearchTestCase):
+    def test_search(self):
+        self.index.update('123456')
+
+        self.assertEqual(self.search('paracetamol'), ['headache', 'stomach-ache'])
+        self.assertEqual(self.search('Take Ibuprofen'), ['stomach-ache'])
+        self.assertEqual(self.search('paracetamol water'), [])
+
+    def test_title_ranks_first(self):
+        self.index.update('123456')
+
+        self.assertEqual(self.search('ache'), ['stomach-ache'])
+        self.assertEqual(
+            [result.score for result in self.index.search(['stomach'])], [2]
+        )
+
+    @mock.patch.dict(settings.VERBA_CONFIG['SEARCH'], {'REFRESH_INTERVAL': 0})
+    def test_incremental_update(self):
+        self.index.update('123456')
+        self.assertEqual(sorted(self.get_fetched_shas()), ['c1', 'm1', 'm2'])
+        self.MockedFile.reset_mock()
+
+        # stomach-ache changed, headache deleted
+        self.tree = {
+            'sha': 'tree2',
+            'tree': [
+                {'path': 'stomach-ache', 'sha': 'tree-stomach-2'},
+                {'path': 'stomach-ache/manifest.json', 'sha': 'm3'},
+            ]
+        }
+        self.index.update('123456')
+
+        self.assertEqual(self.get_fetched_shas(), ['m3'])
+        self.assertEqual(self.search('paracetamol'), [])
+        self.assertEqual(self.search('water'), ['stomach-ache'])
+        self.assertEqual(self.index._postings.get('headache'), None)
+
+    @mock.patch.dict(settings.VERBA_CONFIG['SEARCH'], {'REFRESH_INTERVAL': 0})
+    def test_same_tree_not_reindexed(self):
+        self.index.update('123456')
+        self.MockedFile.reset_mock()
+
+        self.index.update('123456')
+
+        self.assertEqual(self.MockedBranch().get_git_tree.call_count, 2)
+        self.assertFalse(self.MockedFile.called)
+
+    def test_checked_once_per_refresh_interval(self):
+        self.index.update('123456')
+        self.index.update('123456')
+
+        self.assertEqual(self.MockedBranch().get_git_tree.call_count, 1)
+
+    def test_invalid_page_indexed_by_title(self):
+        self.blobs['m2'] = 'invalid json'
+
+        with mock.patch('revision.search.logger'):
+            self.index.update('123456')
+
+        self.assertEqual(self.search('stomach ache'), ['stomach-ache'])
+
+
+class RevisionOverlayTestCase(BaseSearchTestCase):
+    def test_overlay(self):
+        self.index.update('123456')
+        self.MockedFile.reset_mock()
+
+        revision = mock.MagicMock(branch_name='revision-branch')
+        revision.get_blob_shas.return_value = {
+            'pages/stomach-ache': 'tree-stomach-2',
+            'pages/stomach-ache/manifest.json': 'm3',
+        }
+
+        overlay = self.index.get_revision_overlay('123456', revision)
+
+        # only the changed page is fetched, from the revision branch
+        self.assertEqual(self.get_fetched_shas(), ['m3'])
+        self.assertEqual(self.MockedFile.call_args[0][2], 'revision-branch')
+
+        self.assertEqual(self.search('water', overlay), ['stomach-ache'])
+        self.assertEqual(self.search('paracetamol', overlay), [])
+
+        # base index unchanged
+        self.assertEqual(self.search('paracetamol'), ['headache', 'stomach-ache'])
@@ -0,0 +1,104 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from github import TreeEntry
+
+from revision.tree import get_tree_nodes, TreeNode
+from revision.cache import manifest_cache, folder_cache
+
+
+class GetTreeNodesTestCase(SimpleTestCase):
+    def setUp(self):
+        super(GetTreeNodesTestCase, self).setUp()
+        manifest_cache.clear()
+        folder_cache.clear()
+
+        self.blobs = {
+            'm1': json.dumps({'title': 'Headache'}),
+            'm2': json.dumps({'content': 'no title'}),
+        }
+        self.trees = {
+            'head-sha:pages': [
+                TreeEntry(name='conditions', type='tree', sha='t-conditions'),
+                TreeEntry(name='README.md', type='blob', sha='readme'),
+            ],
+            'head-sha:pages/conditions': [
+                TreeEntry(name='headache', type='tree', sha='t-headache'),
+                TreeEntry(name='stomach-ache', type='tree', sha='t-stomach'),
+            ],
+            't-conditions': [
+                TreeEntry(name='headache', type='tree', sha='t-headache'),
+                TreeEntry(name='stomach-ache', type='tree', sha='t-stomach'),
+            ],
+            't-headache': [
+                TreeEntry(name='manifest.json', type='blob', sha='m1'),
+                TreeEntry(name='adults', type='tree', sha='t-adults'),
+            ],
+            't-stomach': [
+                TreeEntry(name='manifest.json', type='blob', sha='m2'),
+            ],
+        }
+        self.tree_shas = {
+            'head-sha:pages': 't-root',
+            'head-sha:pages/conditions': 't-conditions',
+        }
+
+        repo_patcher = mock.patch('revision.tree.Repo')
+        self.MockedRepo = repo_patcher.start()
+        self.addCleanup(repo_patcher.stop)
+        self.MockedRepo().get_tree.side_effect = lambda tree_ish: (
+            self.tree_shas.get(tree_ish, tree_ish), tuple(self.trees[tree_ish])
+        )
+        self.trees['t-root'] = self.trees['head-sha:pages']
+
+        file_patcher = mock.patch('revision.tree.File')
+        self.MockedFile = file_patcher.start()
+        self.addCleanup(file_patcher.stop)
+        self.MockedFile.side_effect = lambda token, path, branch_name, sha: mock.Mock(
+            path=path, sha=sha, content=self.blobs[sha]
+        )
+
+        self.revision = mock.MagicMock(id=1, head_sha='head-sha')
+        self.revision.get_changed_paths.return_value = ['pages/conditions/headache/manifest.json']
+
+    def test_root(self):
+        nodes = get_tree_nodes('123456', self.revision)
+
+        self.assertEqual(nodes, [
+            TreeNode(
+                path='conditions', title='conditions', is_page=False, has_children=True,
+                changed=True, revision_id=1
+            ),
+        ])
+        self.assertEqual(nodes[0].get_absolute_url(), None)
+
+    def test_subfolder(self):
+        nodes = get_tree_nodes('123456', self.revision, 'conditions')
+
+        self.assertEqual(nodes, [
+            TreeNode(
+                path='conditions/headache', title='Headache', is_page=True, has_children=True,
+                changed=True, revision_id=1
+            ),
+            TreeNode(
+                path='conditions/stomach-ache', title='stomach-ache', is_page=True, has_children=False,
+                changed=False, revision_id=1
+            ),
+        ])
+        self.assertEqual(nodes[0].get_absolute_url(), '/revision/1/editor/conditions/headache/')
+
+    def test_cached_by_tree_sha(self):
+        get_tree_nodes('123456', self.revision, 'conditions')
+        self.assertEqual(len(self.MockedFile.call_args_list), 2)
+
+        # another revision with the same folder doesn't read any manifest
+        self.MockedFile.reset_mock()
+        self.revision.head_sha = 'other-head-sha'
+        self.trees['other-head-sha:pages/conditions'] = self.trees['t-conditions']
+        self.tree_shas['other-head-sha:pages/conditions'] = 't-conditions'
+
+        nodes = get_tree_nodes('123456', self.revision, 'conditions')
+        self.assertEqual([node.title for node in nodes], ['Headache', 'stomach-ache'])
+        self.assertFalse(self.MockedFile.called)
@@ -1,9 +1,13 @@
+import tempfile
+from unittest import mock
+
+from django.conf import settings
 from django.test import SimpleTestCase
 
 from verba_settings import config
 
 from revision.utils import is_verba_branch, generate_verba_branch_name, get_verba_branch_name_info, \
-    is_content_file
+    is_content_file, get_pages, PeriodicIndex
 from revision.constants import BRANCH_PARTS_SEPARATOR, CONTENT_FILE_MANIFEST
 
 
@@ -110,3 +114,116 @@ class IsContentFileTestCase(SimpleTestCase):
         self.assertFalse(
             is_content_file('some-path/something{}'.format(CONTENT_FILE_MANIFEST))
         )
+
+
+class GetPagesTestCase(SimpleTestCase):
+    def test_groups_files_by_closest_page(self):
+        pages = get_pages({
+            'pages/page1': 'tree1',
+            'pages/page1/manifest.json': 'sha1',
+            'pages/page1/content.md': 'sha2',
+            'pages/page1/sub': 'tree2',
+            'pages/page1/sub/manifest.json': 'sha3',
+            'pages/page1/sub/images/image.md': 'sha4',
+            'pages/other/file.md': 'sha5',
+        })
+
+        self.assertEqual(pages, {
+            'pages/page1': (
+                ('pages/page1/content.md', 'sha2'),
+                ('pages/page1/manifest.json', 'sha1'),
+            ),
+            'pages/page1/sub': (
+                ('pages/page1/sub/images/image.md', 'sha4'),
+                ('pages/page1/sub/manifest.json', 'sha3'),
+            ),
+        })
+
+
+class CountingIndex(PeriodicIndex):
+    def __init__(self, state_path=None):
+        super(CountingIndex, self).__init__(state_path=state_path)
+        self.updates = 0
+
+    def get_refresh_interval(self):
+        return 0
+
+    def _update(self, token):
+        self.updates += 1
+
+
+class PeriodicIndexTestCase(SimpleTestCase):
+    def test_refreshed_after_interval(self):
+        index = CountingIndex()
+        index.update('123456')
+        index.update('123456')
+
+        self.assertEqual(index.updates, 2)
+
+    def test_kept_fresh_by_poller(self):
+        index = CountingIndex()
+        index.update('123456')
+        index.keep_fresh(60)
+        index.update('123456')
+
+        self.assertEqual(index.updates, 1)
+
+    def test_expire_overrides_poller(self):
+        index = CountingIndex()
+        index.update('123456')
+        index.keep_fresh(60)
+        index.expire()
+        index.update('123456')
+
+        self.assertEqual(index.updates, 2)
+
+    def test_not_built_until_updated(self):
+        index = CountingIndex()
+        index.keep_fresh(60)
+        self.assertFalse(index.is_built())
+
+        index.update('123456')
+        self.assertTrue(index.is_built())
+        self.assertEqual(index.updates, 1)
+
+
+@mock.patch.dict(settings.VERBA_CONFIG['EVENTS'], {'POLL': True})
+class SharedPeriodicIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        super(SharedPeriodicIndexTestCase, self).setUp()
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+
+        # the same index in the process polling and in another one
+        self.polling_index = CountingIndex(state_path=state_dir.name)
+        self.other_index = CountingIndex(state_path=state_dir.name)
+        self.polling_index.update('123456')
+        self.other_index.update('123456')
+
+    def test_kept_fresh_without_the_lock(self):
+        self.polling_index.keep_fresh(60)
+        self.other_index.update('123456')
+
+        self.assertEqual(self.other_index.updates, 1)
+
+    def test_changes_seen_by_other_processes(self):
+        self.polling_index.keep_fresh(60)
+        self.polling_index.mark_changed()
+        self.other_index.update('123456')
+        self.other_index.update('123456')
+
+        # updated once, then fresh again
+        self.assertEqual(self.other_index.updates, 2)
+
+    def test_expire_reaches_other_processes(self):
+        self.polling_index.keep_fresh(60)
+        self.polling_index.expire()
+        self.other_index.update('123456')
+
+        self.assertEqual(self.other_index.updates, 2)
+
+    def test_lease_expires(self):
+        self.polling_index.keep_fresh(-1)
+        self.other_index.update('123456')
+
+        self.assertEqual(self.other_index.updates, 2)
@@ -1,32 +1,289 @@
+import gzip
+import datetime
 from unittest import mock
 
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.urlresolvers import reverse
 
 from auth.tests.test_base import AuthTestCase
 
-from revision.exceptions import RevisionNotFoundException
+from github.exceptions import FileTooLargeException, NotFoundException, ConflictException
+from revision.exceptions import RevisionNotFoundException, InvalidTarballException, InvalidCursorException
+from revision.constants import CONFLICT_MSG
+from revision.index import RevisionSummary, RevisionPage
+from revision.dashboard import AssignedRevision
+from revision.search import SearchResult
+from revision.overlap import Overlap
+from revision.tree import TreeNode
+from revision.models import ChangeSummary
+from revision.bulk import BulkResult
 
 
-@mock.patch('revision.views.RevisionManager')
+@mock.patch('revision.views.revision_index')
 class RevisionListTestCase(AuthTestCase):
     def setUp(self):
         super(RevisionListTestCase, self).setUp()
         self.url = reverse('revision:list')
 
-    def test_redirects_to_login(self, MockedRevisionManager):  # noqa
+    def get_revision_summary(self, revision_id):
+        return RevisionSummary(
+            id=revision_id, title='revision {}'.format(revision_id), creator='test-user',
+            statuses=['draft'], assignees=['test-user'],
+            updated_at=datetime.datetime(2016, 8, 6, 10, 5, 12), head_sha='abc'
+        )
+
+    def test_redirects_to_login(self, mocked_revision_index):
         self._test_redirects_to_login(self.url)
 
-    def test_get(self, MockedRevisionManager):  # noqa
+    def test_get(self, mocked_revision_index):
+        revisions = [self.get_revision_summary(1), self.get_revision_summary(2)]
+        mocked_revision_index.query.return_value = RevisionPage(revisions=revisions, next_cursor=None)
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.context['revisions'], revisions)
+        self.assertIsNone(response.context['next_url'])
+        self.assertContains(response, 'revision 2')
+        mocked_revision_index.update.assert_called_with('123456789')
+        mocked_revision_index.query.assert_called_with(
+            title='', status='', assignee='', creator='', updated_since=None, order='-updated', cursor=''
+        )
+
+    def test_filtered(self, mocked_revision_index):
+        mocked_revision_index.query.return_value = RevisionPage(
+            revisions=[self.get_revision_summary(1)], next_cursor='next-cursor'
+        )
+
+        self.login()
+
+        response = self.client.get(self.url, {'status': 'draft', 'updated_since': '2016-08-01', 'order': 'title'})
+        self.assertEqual(response.status_code, 200)
+        mocked_revision_index.query.assert_called_with(
+            title='', status='draft', assignee='', creator='', updated_since=datetime.date(2016, 8, 1),
+            order='title', cursor=''
+        )
+        self.assertIn('cursor=next-cursor', response.context['next_url'])
+        self.assertIn('status=draft', response.context['next_url'])
+
+    def test_mine(self, mocked_revision_index):
+        mocked_revision_index.query.return_value = RevisionPage(revisions=[], next_cursor=None)
+
+        self.login()
+
+        response = self.client.get(reverse('revision:my-list'), {'creator': 'somebody-else'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['mine'])
+        self.assertEqual(mocked_revision_index.query.call_args[1]['creator'], 'test-owner')
+
+    def test_invalid_cursor(self, mocked_revision_index):
+        mocked_revision_index.query.side_effect = InvalidCursorException('Invalid cursor')
+
+        self.login()
+
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_not_modified(self, mocked_revision_index):
+        mocked_revision_index.query.return_value = RevisionPage(
+            revisions=[self.get_revision_summary(1)], next_cursor=None
+        )
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+@mock.patch('revision.views.get_assigned_revisions')
+class AssignedRevisionsTestCase(AuthTestCase):
+    def setUp(self):
+        super(AssignedRevisionsTestCase, self).setUp()
+        self.url = reverse('revision:assigned')
+
+    def test_redirects_to_login(self, mocked_get_assigned_revisions):
+        self._test_redirects_to_login(self.url)
+
+    def test_landing_page(self, mocked_get_assigned_revisions):
+        response = self.client.get(reverse('index'))
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+
+    def test_get(self, mocked_get_assigned_revisions):
         revisions = [
-            mock.MagicMock(), mock.MagicMock()
+            AssignedRevision(
+                id=1, title='Stomach ache', statuses=['draft'], assignees=['test-owner'],
+                updated_at=datetime.datetime(2016, 8, 6, 10, 5, 12)
+            )
         ]
-        MockedRevisionManager().get_all.return_value = revisions
+        mocked_get_assigned_revisions.return_value = revisions
+
+        self.login()
+
+        response = self.client.get(self.url, {'status': 'draft'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['revisions'], revisions)
+        self.assertContains(response, 'Stomach ache')
+        mocked_get_assigned_revisions.assert_called_with('123456789', 'test-owner', status='draft')
+
+    def test_unknown_status_ignored(self, mocked_get_assigned_revisions):
+        mocked_get_assigned_revisions.return_value = []
+
+        self.login()
+
+        response = self.client.get(self.url, {'status': 'unknown'})
+        self.assertEqual(response.status_code, 200)
+        mocked_get_assigned_revisions.assert_called_with('123456789', 'test-owner', status='')
+
+
+@mock.patch('revision.views.search')
+class SearchTestCase(AuthTestCase):
+    def setUp(self):
+        super(SearchTestCase, self).setUp()
+        self.url = reverse('revision:search')
+
+    def test_redirects_to_login(self, mocked_search):
+        self._test_redirects_to_login(self.url)
+
+    def test_get(self, mocked_search):
+        results = [SearchResult(path='stomach-ache', title='Stomach ache', score=2)]
+        mocked_search.return_value = results
+
+        self.login()
+
+        response = self.client.get(self.url, {'q': ' paracetamol '})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['results'], results)
+        self.assertContains(response, 'Stomach ache')
+        mocked_search.assert_called_with('123456789', 'paracetamol')
+
+    def test_compressed(self, mocked_search):
+        mocked_search.return_value = [SearchResult(path='stomach-ache', title='Stomach ache', score=2)]
+
+        self.login()
+
+        response = self.client.get(self.url, {'q': 'paracetamol'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class RenderMarkdownTestCase(AuthTestCase):
+    def setUp(self):
+        super(RenderMarkdownTestCase, self).setUp()
+        self.url = reverse('revision:render-markdown')
+
+    def test_redirects_to_login(self):
+        response = self.client.post(self.url, {'text': 'some text'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_render(self):
+        self.login()
+
+        response = self.client.post(self.url, {'text': '# title'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'html': '<h1>title</h1>\n'})
+
+
+@mock.patch('revision.views.revision_index')
+@mock.patch('revision.views.change_states')
+@mock.patch('revision.views.RevisionManager')
+class BulkChangeStateTestCase(AuthTestCase):
+    def setUp(self):
+        super(BulkChangeStateTestCase, self).setUp()
+        self.url = reverse('revision:bulk-change-state')
+
+    def test_redirects_to_login(self, MockedRevisionManager, mocked_change_states, mocked_revision_index):  # noqa
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_report(self, MockedRevisionManager, mocked_change_states, mocked_revision_index):  # noqa
+        mocked_revision_index.get_ids.return_value = {1, 2}
+        mocked_change_states.return_value = [
+            BulkResult(key=1, title='rev 1', ok=True, message="Assigned to 'test-developer'"),
+            BulkResult(key=2, title='rev 2', ok=False, message='This revision is not in correct state'),
+        ]
+
+        self.login()
+
+        response = self.client.post(self.url, {'action': 'publish', 'revisions': ['1', '2'], 'comment': 'done'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'This revision is not in correct state')
+        mocked_change_states.assert_called_with(
+            MockedRevisionManager(), 'publish', [1, 2], comment='done', user='test-owner'
+        )
+        self.assertFalse(MockedRevisionManager().get_all.called)
+
+    def test_unindexed_revision(self, MockedRevisionManager, mocked_change_states, mocked_revision_index):  # noqa
+        mocked_revision_index.get_ids.return_value = {1}
+
+        self.login()
+
+        response = self.client.post(self.url, {'action': 'publish', 'revisions': ['1', '3']})
+        self.assertRedirects(response, reverse('revision:list'), fetch_redirect_response=False)
+        self.assertFalse(mocked_change_states.called)
+
+    def test_nothing_selected(self, MockedRevisionManager, mocked_change_states, mocked_revision_index):  # noqa
+        mocked_revision_index.get_ids.return_value = {1}
+
+        self.login()
+
+        response = self.client.post(self.url, {'action': 'publish'})
+        self.assertRedirects(response, reverse('revision:list'), fetch_redirect_response=False)
+        self.assertFalse(mocked_change_states.called)
+
+
+@mock.patch('revision.views.create_revisions')
+@mock.patch('revision.views.RevisionManager')
+class BulkCreateTestCase(AuthTestCase):
+    def setUp(self):
+        super(BulkCreateTestCase, self).setUp()
+        self.url = reverse('revision:bulk-create')
+
+    def test_redirects_to_login(self, MockedRevisionManager, mocked_create_revisions):  # noqa
+        self._test_redirects_to_login(self.url)
+
+    def test_report(self, MockedRevisionManager, mocked_create_revisions):  # noqa
+        mocked_create_revisions.return_value = [
+            BulkResult(key=1, title='new revision', ok=True, message='Created revision 10')
+        ]
+
+        self.login()
+
+        response = self.client.post(self.url, {
+            'csv_file': SimpleUploadedFile('revisions.csv', b'title\nnew revision\n')
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Created revision 10')
+        mocked_create_revisions.assert_called_with(
+            MockedRevisionManager(), [{'title': 'new revision'}], creator='test-owner'
+        )
+
+
+@mock.patch('revision.views.get_base_entries')
+@mock.patch('revision.views.iter_tarball')
+class ExportBaseTestCase(AuthTestCase):
+    def setUp(self):
+        super(ExportBaseTestCase, self).setUp()
+        self.url = reverse('revision:export')
+
+    def test_redirects_to_login(self, mocked_iter_tarball, mocked_get_base_entries):  # noqa
+        self._test_redirects_to_login(self.url)
+
+    def test_streamed(self, mocked_iter_tarball, mocked_get_base_entries):  # noqa
+        mocked_iter_tarball.return_value = iter([b'chunk1', b'chunk2'])
 
         self.login()
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
-        self.assertListEqual(response.context['revisions'], revisions)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), b'chunk1chunk2')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="develop.tar.gz"')
+        mocked_iter_tarball.assert_called_with('123456789', 'develop', mocked_get_base_entries())
 
 
 @mock.patch('revision.views.RevisionManager')
@@ -38,6 +295,14 @@ class NewRevisionTestCase(AuthTestCase):
     def test_redirects_to_login(self, MockedRevisionManager):  # noqa
         self._test_redirects_to_login(self.url)
 
+    def test_not_compressed(self, MockedRevisionManager):  # noqa
+        # the page has a CSRF token
+        self.login()
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
     def test_invalid_title(self, MockedRevisionManager):  # noqa
         self.login()
 
@@ -63,12 +328,20 @@ class NewRevisionTestCase(AuthTestCase):
 
 
 class BaseRevisionDetailTestCase(AuthTestCase):
+    def setUp(self):
+        super(BaseRevisionDetailTestCase, self).setUp()
+        cache.clear()
+
     def get_mocked_revision(self):
         return mock.MagicMock(
             id=1,
             assignees=[
                 self.get_user_data()['login']
-            ]
+            ],
+            updated_at='2016-08-06T10:05:12Z',
+            head_sha='head-sha',
+            base_sha='base-sha',
+            tot_comments=1
         )
 
     def _test_non_assignees_not_allowed(self, MockedRevisionManager):  # noqa
@@ -97,10 +370,6 @@ class EditorTestCase(BaseRevisionDetailTestCase):
 
     def test_get_found(self, MockedRevisionManager):  # noqa
         revision = self.get_mocked_revision()
-        rev_files = [
-            mock.MagicMock(), mock.MagicMock()
-        ]
-        revision.get_files.return_value = rev_files
         MockedRevisionManager().get.return_value = revision
 
         self.login()
@@ -108,7 +377,47 @@ class EditorTestCase(BaseRevisionDetailTestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.context['revision'], revision)
-        self.assertEqual(response.context['revision'].get_files(), rev_files)
+        # the sidebar is loaded from the tree endpoint, not from all the files
+        self.assertContains(response, reverse('revision:tree', kwargs={'revision_id': 1}))
+        self.assertFalse(revision.get_files.called)
+
+        # editor scripts only loaded when editing a file
+        self.assertNotContains(response, 'simplemde')
+
+    def test_not_modified(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # new commit on the revision branch => page has to be rendered again
+        revision.head_sha = 'new-head-sha'
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_is_per_user(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        revision.assignees = ['test-owner', 'test-owner-2']
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+        etag = self.client.get(self.url)['ETag']
+
+        self.client = self.client_class()  # new browser, no cookies
+        self.login(token='another-token', user_data=self.get_user_data(login='test-owner-2'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
 
     def test_get_not_found(self, MockedRevisionManager):  # noqa
         MockedRevisionManager().get.side_effect = RevisionNotFoundException()
@@ -119,6 +428,64 @@ class EditorTestCase(BaseRevisionDetailTestCase):
         self.assertEqual(response.status_code, 404)
 
 
+@mock.patch('revision.views.get_tree_nodes')
+@mock.patch('revision.views.RevisionManager')
+class TreeTestCase(BaseRevisionDetailTestCase):
+    def setUp(self):
+        super(TreeTestCase, self).setUp()
+        self.url = reverse('revision:tree', kwargs={'revision_id': 1})
+
+    def test_redirects_to_login(self, MockedRevisionManager, mocked_get_tree_nodes):  # noqa
+        self._test_redirects_to_login(self.url)
+
+    def test_non_assignees_not_allowed(self, MockedRevisionManager, mocked_get_tree_nodes):  # noqa
+        self._test_non_assignees_not_allowed(MockedRevisionManager)
+
+    def test_get(self, MockedRevisionManager, mocked_get_tree_nodes):  # noqa
+        revision = self.get_mocked_revision()
+        MockedRevisionManager().get.return_value = revision
+        mocked_get_tree_nodes.return_value = [
+            TreeNode(
+                path='conditions/headache', title='Headache', is_page=True, has_children=False,
+                changed=True, revision_id=1
+            ),
+        ]
+
+        self.login()
+
+        response = self.client.get(self.url, {'path': 'conditions/'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'path': 'conditions',
+            'folders': [{
+                'path': 'conditions/headache',
+                'title': 'Headache',
+                'url': reverse('revision:edit-file', args=[1, 'conditions/headache']),
+                'has_children': False,
+                'changed': True,
+            }]
+        })
+        mocked_get_tree_nodes.assert_called_with('123456789', revision, 'conditions')
+
+    def test_not_found(self, MockedRevisionManager, mocked_get_tree_nodes):  # noqa
+        MockedRevisionManager().get.return_value = self.get_mocked_revision()
+        mocked_get_tree_nodes.side_effect = NotFoundException('Not Found')
+
+        self.login()
+
+        response = self.client.get(self.url, {'path': 'missing'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_path(self, MockedRevisionManager, mocked_get_tree_nodes):  # noqa
+        MockedRevisionManager().get.return_value = self.get_mocked_revision()
+
+        self.login()
+
+        response = self.client.get(self.url, {'path': '../content-revision-logs'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(mocked_get_tree_nodes.called)
+
+
 @mock.patch('revision.views.RevisionManager')
 class EditFileTestCase(BaseRevisionDetailTestCase):
     def setUp(self):
@@ -133,12 +500,26 @@ class EditFileTestCase(BaseRevisionDetailTestCase):
         }
         self.revision.get_file.return_value = self.revision_file
 
+        overlaps_patcher = mock.patch('revision.views.get_overlaps')
+        self.mocked_get_overlaps = overlaps_patcher.start()
+        self.mocked_get_overlaps.return_value = []
+        self.addCleanup(overlaps_patcher.stop)
+
     def test_redirects_to_login(self, MockedRevisionManager):  # noqa
         self._test_redirects_to_login(self.url)
 
     def test_non_assignees_not_allowed(self, MockedRevisionManager):  # noqa
         self._test_non_assignees_not_allowed(MockedRevisionManager)
 
+    def test_get(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get.return_value = self.revision
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'simplemde')
+
     def test_invalid_title(self, MockedRevisionManager):  # noqa
         MockedRevisionManager().get.return_value = self.revision
 
@@ -164,6 +545,55 @@ class EditFileTestCase(BaseRevisionDetailTestCase):
         self.assertEqual(response.status_code, 302)
         self.revision_file.save_content_items.assert_called_with(data)
 
+    def test_get_overlaps(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get.return_value = self.revision
+        self.mocked_get_overlaps.return_value = [Overlap(revision_id=2, title='other revision')]
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'This page is also being changed in')
+        self.assertContains(response, reverse('revision:activities', kwargs={'revision_id': 2}))
+        self.mocked_get_overlaps.assert_called_with('123456789', self.revision_file)
+
+    def test_get_file_too_large(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get.return_value = self.revision
+        self.revision_file.get_content_items.side_effect = FileTooLargeException('too large')
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, reverse('revision:editor', kwargs={'revision_id': 1}), fetch_redirect_response=False
+        )
+
+    def test_save_file_too_large(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get.return_value = self.revision
+        self.revision_file.save_content_items.side_effect = FileTooLargeException('too large')
+
+        self.login()
+
+        response = self.client.post(self.url, data={
+            'title': 'new title',
+            'content': 'new content'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].non_field_errors(), ['too large'])
+
+    def test_save_conflict(self, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get.return_value = self.revision
+        self.revision_file.save_content_items.side_effect = ConflictException('Received 409')
+
+        self.login()
+
+        response = self.client.post(self.url, data={
+            'title': 'new title',
+            'content': 'new content'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].non_field_errors(), [CONFLICT_MSG])
+
 
 @mock.patch('revision.views.RevisionManager')
 class ChangeStateMixin(object):
@@ -237,6 +667,39 @@ class ActivitiesTestCase(BaseRevisionDetailTestCase):
         self.assertEqual(response.context['revision'], revision)
         self.assertEqual(response.context['revision'].activities, activities)
 
+    def test_change_summary_rendered(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        # make the template engine use attribute lookups and call `get_change_summary`
+        revision.__getitem__.side_effect = KeyError
+        revision.get_change_summary = mock.MagicMock(
+            return_value=ChangeSummary(
+                pages=3, files=4, additions=20, deletions=2, behind_by=12, base_branch='develop'
+            ),
+            do_not_call_in_templates=False, alters_data=False
+        )
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertContains(response, '3 pages changed, 12 commits behind develop')
+
+    def test_comments_rendered(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        revision.__getitem__.side_effect = KeyError
+        revision.activities = [
+            mock.Mock(
+                kind='comment', description='wrote', created_by='test-owner',
+                created_at=datetime.datetime(2016, 8, 6), body='some **markdown** <script>'
+            )
+        ]
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'some <strong>markdown</strong> &lt;script&gt;')
+
     def test_add_comment(self, MockedRevisionManager):  # noqa
         revision = self.get_mocked_revision()
         MockedRevisionManager().get.return_value = revision
@@ -265,11 +728,176 @@ class ChangesTestCase(BaseRevisionDetailTestCase):
 
     def test_get(self, MockedRevisionManager):  # noqa
         revision = self.get_mocked_revision()
-        revision.diff = 'some diff'
         MockedRevisionManager().get.return_value = revision
 
         self.login()
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.context['revision'].diff, revision.diff)
+        self.assertEqual(response.context['revision'], revision)
+        self.assertContains(response, reverse('revision:diff', kwargs={'revision_id': 1}))
+
+
+@mock.patch('revision.views.RevisionManager')
+class DiffTestCase(BaseRevisionDetailTestCase):
+    def setUp(self):
+        super(DiffTestCase, self).setUp()
+        self.url = reverse('revision:diff', kwargs={'revision_id': 1})
+
+    def test_redirects_to_login(self, MockedRevisionManager):  # noqa
+        self._test_redirects_to_login(self.url)
+
+    def test_non_assignees_not_allowed(self, MockedRevisionManager):  # noqa
+        self._test_non_assignees_not_allowed(MockedRevisionManager)
+
+    def test_streamed(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        revision.iter_diff.return_value = iter([b'diff --git a/file b/file\n', b'+new line\n'])
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), b'diff --git a/file b/file\n+new line\n')
+
+    def test_compressed(self, MockedRevisionManager):  # noqa
+        revision = self.get_mocked_revision()
+        revision.iter_diff.return_value = iter([b'+new line\n'] * 100)
+        MockedRevisionManager().get.return_value = revision
+
+        self.login()
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'+new line\n' * 100)
+
+
+@mock.patch('revision.views.search_index')
+@mock.patch('revision.views.search')
+@mock.patch('revision.views.RevisionManager')
+class RevisionSearchTestCase(BaseRevisionDetailTestCase):
+    def setUp(self):
+        super(RevisionSearchTestCase, self).setUp()
+        self.url = reverse('revision:revision-search', kwargs={'revision_id': 1})
+
+    def test_redirects_to_login(self, MockedRevisionManager, mocked_search, mocked_search_index):  # noqa
+        self._test_redirects_to_login(self.url)
+
+    def test_non_assignees_not_allowed(self, MockedRevisionManager, mocked_search, mocked_search_index):  # noqa
+        self._test_non_assignees_not_allowed(MockedRevisionManager)
+
+    def test_get(self, MockedRevisionManager, mocked_search, mocked_search_index):  # noqa
+        revision = self.get_mocked_revision()
+        MockedRevisionManager().get.return_value = revision
+        mocked_search.return_value = [SearchResult(path='stomach-ache', title='Stomach ache', score=2)]
+
+        self.login()
+
+        response = self.client.get(self.url, {'q': 'paracetamol'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse('revision:edit-file', args=[1, 'stomach-ache']))
+        mocked_search.assert_called_with(
+            '123456789', 'paracetamol', revision=revision
+        )
+
+    def test_etag_changes_with_base_index(self, MockedRevisionManager, mocked_search, mocked_search_index):  # noqa
+        MockedRevisionManager().get.return_value = self.get_mocked_revision()
+        mocked_search.return_value = []
+        mocked_search_index.tree_sha = 'tree1'
+
+        self.login()
+
+        response = self.client.get(self.url, {'q': 'paracetamol'})
+        etag = response['ETag']
+
+        response = self.client.get(self.url, {'q': 'paracetamol'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        mocked_search_index.tree_sha = 'tree2'
+        response = self.client.get(self.url, {'q': 'paracetamol'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@mock.patch('revision.views.iter_tarball')
+@mock.patch('revision.views.RevisionManager')
+class ExportRevisionTestCase(BaseRevisionDetailTestCase):
+    def setUp(self):
+        super(ExportRevisionTestCase, self).setUp()
+        self.url = reverse('revision:export-revision', kwargs={'revision_id': 1})
+
+    def test_redirects_to_login(self, MockedRevisionManager, mocked_iter_tarball):  # noqa
+        self._test_redirects_to_login(self.url)
+
+    def test_non_assignees_not_allowed(self, MockedRevisionManager, mocked_iter_tarball):  # noqa
+        self._test_non_assignees_not_allowed(MockedRevisionManager)
+
+    def test_streamed(self, MockedRevisionManager, mocked_iter_tarball):  # noqa
+        revision = self.get_mocked_revision()
+        revision.branch_name = 'revision-branch'
+        MockedRevisionManager().get.return_value = revision
+        mocked_iter_tarball.return_value = iter([b'chunk1', b'chunk2'])
+
+        self.login()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'chunk1chunk2')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="revision-1.tar.gz"')
+        mocked_iter_tarball.assert_called_with('123456789', 'revision-branch', revision.get_blob_shas())
+
+
+@mock.patch('revision.views.import_tarball')
+@mock.patch('revision.views.RevisionManager')
+class ImportRevisionTestCase(BaseRevisionDetailTestCase):
+    def setUp(self):
+        super(ImportRevisionTestCase, self).setUp()
+        self.url = reverse('revision:import', kwargs={'revision_id': 1})
+
+    def test_redirects_to_login(self, MockedRevisionManager, mocked_import_tarball):  # noqa
+        self._test_redirects_to_login(self.url)
+
+    def test_non_assignees_not_allowed(self, MockedRevisionManager, mocked_import_tarball):  # noqa
+        self._test_non_assignees_not_allowed(MockedRevisionManager)
+
+    def test_success(self, MockedRevisionManager, mocked_import_tarball):  # noqa
+        MockedRevisionManager().get.return_value = self.get_mocked_revision()
+        mocked_import_tarball.return_value = ['pages/page1/content.md']
+
+        self.login()
+
+        response = self.client.post(self.url, {
+            'tarball': SimpleUploadedFile('revision.tar.gz', b'some tarball')
+        })
+        self.assertRedirects(
+            response, reverse('revision:editor', kwargs={'revision_id': 1}), fetch_redirect_response=False
+        )
+        self.assertTrue(mocked_import_tarball.called)
+        # committed on top of the head the files were compared with
+        self.assertEqual(mocked_import_tarball.call_args[1]['parent_sha'], 'head-sha')
+
+    def test_conflict(self, MockedRevisionManager, mocked_import_tarball):  # noqa
+        MockedRevisionManager().get.return_value = self.get_mocked_revision()
+        mocked_import_tarball.side_effect = ConflictException('The branch has changed')
+
+        self.login()
+
+        response = self.client.post(self.url, {
+            'tarball': SimpleUploadedFile('revision.tar.gz', b'some tarball')
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].non_field_errors(), [CONFLICT_MSG])
+
+    def test_invalid_tarball(self, MockedRevisionManager, mocked_import_tarball):  # noqa
+        MockedRevisionManager().get.return_value = self.get_mocked_revision()
+        mocked_import_tarball.side_effect = InvalidTarballException('Invalid tarball')
+
+        self.login()
+
+        response = self.client.post(self.url, {
+            'tarball': SimpleUploadedFile('revision.tar.gz', b'some tarball')
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].errors['tarball'], ['Invalid tarball'])
@@ -0,0 +1,109 @@
+import logging
+import posixpath
+from collections import namedtuple
+
+from django.core.urlresolvers import reverse
+
+from github import Repo, File
+from github.exceptions import GitHubException
+
+from verba_settings import config
+
+from .models import get_manifest
+from .utils import is_content_file, get_executor
+from .cache import folder_cache
+
+
+logger = logging.getLogger('revision.tree')
+
+# what the editor sidebar needs to know about a subfolder, independent of where the tree is
+Folder = namedtuple('Folder', ['name', 'sha', 'title', 'is_page', 'has_children'])
+
+
+class TreeNode(namedtuple('TreeNode', ['path', 'title', 'is_page', 'has_children', 'changed', 'revision_id'])):
+    """
+    A folder of the content tree of a revision, `path` is relative to the
+    content folder.
+    """
+    __slots__ = ()
+
+    def get_absolute_url(self):
+        if not self.is_page:
+            return None
+        return reverse('revision:edit-file', args=[self.revision_id, self.path])
+
+
+def get_folder(token, entry):
+    """
+    Returns the Folder of the tree `entry`, reading its title from the
+    manifest if it's a page.
+    """
+    _, entries = Repo(token).get_tree(entry.sha)
+    manifest = next(
+        (child for child in entries if child.type == 'blob' and is_content_file(child.name)),
+        None
+    )
+
+    title = entry.name
+    if manifest:
+        try:
+            # read by blob sha, the branch is never used
+            items = get_manifest(File(token, manifest.name, None, sha=manifest.sha))
+            title = items.get('title') or title
+        except (ValueError, GitHubException):
+            # the page is still listed so that it can be opened and fixed
+            logger.warning('Could not read the title of {}'.format(entry.name), exc_info=True)
+
+    return Folder(
+        name=entry.name,
+        sha=entry.sha,
+        title=title,
+        is_page=manifest is not None,
+        has_children=any(child.type == 'tree' for child in entries)
+    )
+
+
+def get_folders(token, tree_sha):
+    """
+    Returns the tuple of Folder of the subfolders of the tree `tree_sha`.
+
+    It takes one non-recursive tree request per subfolder plus one blob
+    request per page but only the first time, the result is cached by tree
+    sha.
+    """
+    folders = folder_cache.get(tree_sha)
+    if folders is None:
+        _, entries = Repo(token).get_tree(tree_sha)
+        subtrees = [entry for entry in entries if entry.type == 'tree']
+
+        executor = get_executor('tree', config.CONCURRENCY.TREE)
+        folders = tuple(executor.map(lambda entry: get_folder(token, entry), subtrees))
+        folder_cache.set(tree_sha, folders)
+    return folders
+
+
+def get_tree_nodes(token, revision, path=''):
+    """
+    Returns the list of TreeNode of the subfolders of the folder `path` of
+    `revision`, marked as changed if the revision changes any file in them.
+
+    The folder is read at the head commit of the revision so that nothing
+    has to be revalidated.
+    """
+    folder = posixpath.join(config.PATHS.CONTENT_FOLDER, path).rstrip('/')
+    tree_sha, _ = Repo(token).get_tree('{}:{}'.format(revision.head_sha, folder))
+
+    changed_paths = revision.get_changed_paths()
+    nodes = []
+    for subfolder in get_folders(token, tree_sha):
+        node_path = posixpath.join(path, subfolder.name)
+        prefix = '{}/'.format(posixpath.join(config.PATHS.CONTENT_FOLDER, node_path))
+        nodes.append(TreeNode(
+            path=node_path,
+            title=subfolder.title,
+            is_page=subfolder.is_page,
+            has_children=subfolder.has_children,
+            changed=any(changed_path.startswith(prefix) for changed_path in changed_paths),
+            revision_id=revision.id
+        ))
+    return nodes
@@ -9,6 +9,41 @@ urlpatterns = [
         login_required(views.RevisionList.as_view()),
         name='list'
     ),
+    url(
+        r'^assigned/$',
+        login_required(views.AssignedRevisions.as_view()),
+        name='assigned'
+    ),
+    url(
+        r'^mine/$',
+        login_required(views.RevisionList.as_view(mine=True)),
+        name='my-list'
+    ),
+    url(
+        r'^search/$',
+        login_required(views.Search.as_view()),
+        name='search'
+    ),
+    url(
+        r'^bulk/$',
+        login_required(views.BulkChangeState.as_view()),
+        name='bulk-change-state'
+    ),
+    url(
+        r'^new/bulk/$',
+        login_required(views.BulkCreate.as_view()),
+        name='bulk-create'
+    ),
+    url(
+        r'^render-markdown/$',
+        login_required(views.RenderMarkdown.as_view()),
+        name='render-markdown'
+    ),
+    url(
+        r'^export/$',
+        login_required(views.ExportBase.as_view()),
+        name='export'
+    ),
     url(
         r'^new/$',
         login_required(views.NewRevision.as_view()),
@@ -19,11 +54,31 @@ urlpatterns = [
         login_required(views.Editor.as_view()),
         name='editor'
     ),
+    url(
+        r'^(?P<revision_id>\d+)/editor/tree/$',
+        login_required(views.Tree.as_view()),
+        name='tree'
+    ),
     url(
         r'^(?P<revision_id>\d+)/editor/(?P<file_path>.+)/$',
         login_required(views.EditFile.as_view()),
         name='edit-file'
     ),
+    url(
+        r'^(?P<revision_id>\d+)/search/$',
+        login_required(views.RevisionSearch.as_view()),
+        name='revision-search'
+    ),
+    url(
+        r'^(?P<revision_id>\d+)/export/$',
+        login_required(views.ExportRevision.as_view()),
+        name='export-revision'
+    ),
+    url(
+        r'^(?P<revision_id>\d+)/import/$',
+        login_required(views.ImportRevision.as_view()),
+        name='import'
+    ),
     url(
         r'^(?P<revision_id>\d+)/send-for-2i/$',
         login_required(views.SendFor2i.as_view()),
@@ -49,4 +104,9 @@ urlpatterns = [
         login_required(views.Changes.as_view()),
         name='changes'
     ),
+    url(
+        r'^(?P<revision_id>\d+)/changes/diff/$',
+        login_required(views.Diff.as_view()),
+        name='diff'
+    ),
 ]
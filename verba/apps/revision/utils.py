@@ -1,9 +1,20 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import tempfile
+import threading
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
 from django.utils.text import slugify
 from django.utils.crypto import get_random_string
 
 from verba_settings import config
 
 from .constants import BRANCH_PARTS_SEPARATOR, CONTENT_FILE_MANIFEST
+from .exceptions import InvalidCursorException
 
 
 def is_verba_branch(name):
@@ -48,3 +59,229 @@ def is_content_file(path):
     """
     file_name = path.split('/')[-1]
     return file_name and file_name.lower() == CONTENT_FILE_MANIFEST
+
+
+def get_blob_sha(content):
+    """
+    Returns the sha git gives to a blob with `content` (bytes).
+    """
+    header = 'blob {}\0'.format(len(content)).encode('utf-8')
+    return hashlib.sha1(header + content).hexdigest()
+
+
+def get_pages(entries):
+    """
+    Groups `entries`, a dict of (absolute path, sha) from a recursive git tree,
+    by page.
+
+    Returns a dict of (page folder, signature) where the signature is the sorted
+    tuple of (path, sha) of the files belonging to the page, that is the files
+    whose closest folder with a manifest is the page folder. The signature
+    changes whenever the manifest or any file it can include changes.
+    """
+    folders = {posixpath.dirname(path) for path in entries}
+    page_files = {
+        posixpath.dirname(path): []
+        for path in entries
+        if is_content_file(path)
+    }
+
+    for path, sha in entries.items():
+        if path in folders:  # subtree
+            continue
+
+        folder = posixpath.dirname(path)
+        while folder and folder not in page_files:
+            folder = posixpath.dirname(folder)
+
+        if folder in page_files:
+            page_files[folder].append((path, sha))
+
+    return {
+        folder: tuple(sorted(files))
+        for folder, files in page_files.items()
+    }
+
+
+def encode_cursor(values):
+    """
+    Returns the opaque pagination cursor of the list `values`, the sort keys
+    of the last item of a page.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, length):
+    """
+    Returns the list of `length` values encoded in `cursor` or raises
+    InvalidCursorException.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursorException("Invalid cursor '{}'".format(cursor))
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursorException("Invalid cursor '{}'".format(cursor))
+    return values
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name, max_workers):
+    """
+    Returns the thread pool `name`, shared by all the requests of the process.
+
+    The pool bounds how many GitHub requests run at the same time for a task
+    and its threads are long-lived so that they keep their pooled connections.
+    """
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=max_workers)
+        return _executors[name]
+
+
+def get_events_state_path():
+    """
+    Returns the folder of the files through which the processes share the
+    state of the events poller.
+    """
+    return config.EVENTS.STATE_PATH or os.path.join(tempfile.gettempdir(), 'verba-events')
+
+
+def get_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return 0
+
+
+def touch(path, mtime=None):
+    """
+    Sets the modification time of the file `path` to `mtime`, now by default,
+    creating the file and its folder if needed.
+    """
+    # set explicitly as the clock of the file system can be coarser than time.time()
+    mtime = time.time() if mtime is None else mtime
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'a').close()
+    os.utime(path, (mtime, mtime))
+
+
+class PeriodicIndex(object):
+    """
+    Base for the in-process indexes shared by all the requests of the process
+    and brought up to date with GitHub at most every `get_refresh_interval()`
+    seconds.
+
+    Subclasses implement `_update` and guard their data with `_lock`.
+
+    When EVENTS.POLL is on, only one process polls but the indexes of every
+    process are kept fresh: the poller leases them with the mtime of the
+    file `<name>.lease` in the events state folder and the mtime of
+    `<name>.changed` is the last time their data changed, on GitHub or
+    through Verba, so that other processes know they need an update.
+    """
+    def __init__(self, state_path=None):
+        self._checked_at = None
+        self._update_started_at = None
+        self._polled_until = 0
+        self._state_path = state_path
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+    def get_name(self):
+        return type(self).__name__.lower()
+
+    def _get_state_file(self, suffix):
+        return os.path.join(
+            self._state_path or get_events_state_path(), '{}.{}'.format(self.get_name(), suffix)
+        )
+
+    def get_refresh_interval(self):
+        raise NotImplementedError()
+
+    def is_built(self):
+        return self._checked_at is not None
+
+    def get_checked_at(self):
+        """
+        Returns the timestamp the index was last brought up to date at, 0 if
+        expired since, or None if not built yet.
+        """
+        return self._checked_at
+
+    def _is_leased(self):
+        """
+        Returns True if the poller of another process keeps the index fresh
+        and nothing has changed since this process last started updating it.
+        """
+        if not config.EVENTS.POLL or not self._update_started_at:
+            return False
+        return (
+            time.time() < get_mtime(self._get_state_file('lease')) and
+            get_mtime(self._get_state_file('changed')) < self._update_started_at
+        )
+
+    def _is_fresh(self):
+        if self._checked_at is None:
+            return False
+        if time.time() < self._polled_until or self._is_leased():
+            return True
+        return time.time() - self._checked_at < self.get_refresh_interval()
+
+    def keep_fresh(self, seconds):
+        """
+        Called by the events poller which keeps the index up to date for the
+        next `seconds` so that requests don't need to check GitHub themselves.
+        Requests go back to checking if the poller stops.
+        """
+        self._polled_until = time.time() + seconds
+        if config.EVENTS.POLL:
+            touch(self._get_state_file('lease'), self._polled_until)
+
+    def mark_changed(self):
+        """
+        Makes the other processes bring their index up to date before relying
+        on the lease again.
+        """
+        if config.EVENTS.POLL:
+            touch(self._get_state_file('changed'))
+
+    def expire(self):
+        """
+        Makes the next request bring the index up to date, e.g. after
+        something has been changed through Verba, in every process.
+        """
+        self._polled_until = 0
+        if self._checked_at is not None:
+            self._checked_at = 0
+        self.mark_changed()
+
+    def update(self, token, force=False):
+        """
+        Brings the index up to date.
+
+        Requests only wait for the index to be built the first time, after that
+        they don't wait for an update already in progress but use the current
+        data instead.
+        """
+        if not force and self._is_fresh():
+            return
+
+        if not self._update_lock.acquire(self._checked_at is None):
+            return
+
+        try:
+            if not force and self._is_fresh():
+                return
+            update_started_at = time.time()
+            self._update(token)
+            self._update_started_at = update_started_at
+            self._checked_at = time.time()
+        finally:
+            self._update_lock.release()
+
+    def _update(self, token):
+        raise NotImplementedError()
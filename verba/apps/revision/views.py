@@ -1,18 +1,40 @@
+import hashlib
+
+from django.conf import settings
 from django.shortcuts import redirect
 from django.views.generic.base import TemplateResponseMixin, ContextMixin
 from django.views.generic.edit import ProcessFormView, FormMixin
 from django.views.generic import View, TemplateView, FormView
 from django.contrib.messages.views import SuccessMessageMixin
-from django.http import Http404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.core.urlresolvers import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from github.exceptions import FileTooLargeException, NotFoundException, ConflictException
+
+from verba_settings import config
 
 from .models import RevisionManager
-from .forms import NewRevisionForm, ContentForm, SendFor2iForm, SendBackForm, PublishForm, AddCommentForm
-from .exceptions import RevisionNotFoundException
+from .response import TimedTemplateResponse
+from .forms import NewRevisionForm, ContentForm, SendFor2iForm, SendBackForm, PublishForm, AddCommentForm, \
+    BulkChangeStateForm, BulkCreateForm, BULK_ACTIONS, ImportForm, RevisionFilterForm
+from .exceptions import RevisionNotFoundException, InvalidTarballException, InvalidCursorException
+from .constants import CONFLICT_MSG
+from .index import revision_index
+from .dashboard import get_assigned_revisions, expire_dashboards
+from .search import search, search_index
+from .overlap import get_overlaps
+from .tree import get_tree_nodes
+from .rendering import render_markdown
+from .bulk import change_states, create_revisions
+from .export import iter_tarball, import_tarball, get_base_entries
 
 
 class RevisionMixin(object):
+    response_class = TimedTemplateResponse
+
     @property
     def revision_manager(self):
         if not hasattr(self, '_revision_manager'):
@@ -20,6 +42,48 @@ class RevisionMixin(object):
         return self._revision_manager
 
 
+class ConditionalGetMixin(object):
+    """
+    Answers `If-None-Match` with 304 before rendering any template if the state
+    the page is rendered from hasn't changed.
+
+    Views return that state from `get_etag_parts`. The ETag always includes the
+    logged-in user, their session auth hash and CSRF cookie so that an ETag
+    can never match a page rendered for somebody else.
+    """
+    def get_etag_parts(self):
+        return []
+
+    def get_etag(self):
+        request = self.request
+        parts = [
+            request.user.pk,
+            request.user.get_session_auth_hash(),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+            request.get_full_path()
+        ]
+        parts += self.get_etag_parts()
+
+        value = '|'.join(str(part) for part in parts)
+        return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        # pending messages are rendered in the page so it can't be a 304
+        if request.method not in ('GET', 'HEAD') or messages.get_messages(request):
+            return super(ConditionalGetMixin, self).dispatch(request, *args, **kwargs)
+
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super(ConditionalGetMixin, self).dispatch(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = quote_etag(etag)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+        return response
+
+
 class RevisionDetailMixin(RevisionMixin):
     def get_revision(self):
         if not hasattr(self, '_revision'):
@@ -30,16 +94,128 @@ class RevisionDetailMixin(RevisionMixin):
         return self._revision
 
 
-class RevisionList(RevisionMixin, TemplateView):
+class RevisionList(RevisionMixin, ConditionalGetMixin, TemplateView):
+    """
+    Lists the open revisions from the revision index, filtered by the GET
+    params and one page at a time.
+
+    With `mine`, only the revisions created by the logged-in user are listed.
+    """
     http_method_names = ['get']
     template_name = 'revision/list.html'
+    mine = False
+
+    def get_form(self):
+        if not hasattr(self, '_form'):
+            self._form = RevisionFilterForm(data=self.request.GET)
+        return self._form
+
+    def get_page(self):
+        if not hasattr(self, '_page'):
+            revision_index.update(self.request.user.token)
+
+            form = self.get_form()
+            filters = form.get_filters() if form.is_valid() else {}
+            if self.mine:
+                filters['creator'] = self.request.user.pk
+            try:
+                self._page = revision_index.query(**filters)
+            except InvalidCursorException as e:
+                raise Http404(e)
+        return self._page
+
+    def get_next_url(self):
+        next_cursor = self.get_page().next_cursor
+        if not next_cursor:
+            return None
+
+        params = self.request.GET.copy()
+        params['cursor'] = next_cursor
+        return '?{}'.format(params.urlencode())
+
+    def get_etag_parts(self):
+        page = self.get_page()
+        return [
+            (revision.id, revision.updated_at, revision.head_sha, revision.statuses, revision.assignees)
+            for revision in page.revisions
+        ] + [page.next_cursor]
 
     def get_context_data(self, **kwargs):
         context = super(RevisionList, self).get_context_data(**kwargs)
-        context['revisions'] = self.revision_manager.get_all()
+        context['form'] = self.get_form()
+        context['revisions'] = self.get_page().revisions
+        context['next_url'] = self.get_next_url()
+        context['mine'] = self.mine
+        context['tab'] = 'mine' if self.mine else 'all'
+        context['bulk_actions'] = [(action, name) for action, (name, _) in BULK_ACTIONS.items()]
+        return context
+
+
+class AssignedRevisions(RevisionMixin, ConditionalGetMixin, TemplateView):
+    """
+    Dashboard of the revisions assigned to the logged-in user, optionally
+    only the ones with the status in the `status` GET param.
+    """
+    http_method_names = ['get']
+    template_name = 'revision/assigned.html'
+
+    def get_status(self):
+        status = self.request.GET.get('status', '')
+        return status if status in config.LABELS.ALLOWED else ''
+
+    def get_revisions(self):
+        if not hasattr(self, '_revisions'):
+            self._revisions = get_assigned_revisions(
+                self.request.user.token, self.request.user.pk, status=self.get_status()
+            )
+        return self._revisions
+
+    def get_etag_parts(self):
+        return [
+            (revision.id, revision.updated_at, revision.statuses, revision.assignees)
+            for revision in self.get_revisions()
+        ]
+
+    def get_context_data(self, **kwargs):
+        context = super(AssignedRevisions, self).get_context_data(**kwargs)
+        context['revisions'] = self.get_revisions()
+        context['status'] = self.get_status()
+        context['statuses'] = config.LABELS.ALLOWED
+        context['tab'] = 'assigned'
+        return context
+
+
+class SearchMixin(object):
+    def get_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_results(self):
+        raise NotImplementedError()
+
+    def get_context_data(self, **kwargs):
+        context = super(SearchMixin, self).get_context_data(**kwargs)
+        context['query'] = self.get_query()
+        context['results'] = self.get_results()
         return context
 
 
+class Search(SearchMixin, RevisionMixin, TemplateView):
+    http_method_names = ['get']
+    template_name = 'revision/search.html'
+
+    def get_results(self):
+        return search(self.request.user.token, self.get_query())
+
+
+class RenderMarkdown(View):
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        return JsonResponse({
+            'html': render_markdown(request.POST.get('text', ''))
+        })
+
+
 class NewRevision(RevisionMixin, FormView):
     form_class = NewRevisionForm
     template_name = 'revision/new.html'
@@ -51,6 +227,8 @@ class NewRevision(RevisionMixin, FormView):
 
     def form_valid(self, form):
         self.revision = form.save(self.request.user.pk)
+        revision_index.expire()
+        expire_dashboards()
         messages.success(self.request, 'Revision created.')
         return super(NewRevision, self).form_valid(form)
 
@@ -58,7 +236,80 @@ class NewRevision(RevisionMixin, FormView):
         return reverse('revision:editor', kwargs={'revision_id': self.revision.id})
 
 
-class BaseRevisionDetailMixin(RevisionDetailMixin, TemplateResponseMixin, ContextMixin):
+class BulkChangeState(RevisionMixin, FormView):
+    http_method_names = ['post']
+    form_class = BulkChangeStateForm
+    template_name = 'revision/bulk_report.html'
+
+    def get_form_kwargs(self):
+        kwargs = super(BulkChangeState, self).get_form_kwargs()
+        # the selected ids come from the revision list, which is read from the index
+        revision_index.update(self.request.user.token)
+        kwargs['revision_ids'] = revision_index.get_ids()
+        return kwargs
+
+    def form_valid(self, form):
+        action = form.cleaned_data['action']
+        results = change_states(
+            self.revision_manager,
+            action,
+            form.cleaned_data['revisions'],
+            comment=form.cleaned_data['comment'],
+            user=self.request.user.pk
+        )
+        revision_index.expire()
+        expire_dashboards()
+        return self.render_to_response(
+            self.get_context_data(action_name=BULK_ACTIONS[action][0], results=results)
+        )
+
+    def form_invalid(self, form):
+        messages.error(self.request, 'Please select an action and at least one revision.')
+        return redirect('revision:list')
+
+
+class BulkCreate(RevisionMixin, FormView):
+    form_class = BulkCreateForm
+    template_name = 'revision/bulk_create.html'
+
+    def form_valid(self, form):
+        results = create_revisions(
+            self.revision_manager, form.cleaned_data['csv_file'], creator=self.request.user.pk
+        )
+        revision_index.expire()
+        expire_dashboards()
+        return self.response_class(
+            request=self.request,
+            template='revision/bulk_report.html',
+            context=self.get_context_data(action_name='Create', results=results)
+        )
+
+
+class ExportMixin(object):
+    def get_export_filename(self):
+        raise NotImplementedError()
+
+    def get_export_chunks(self):
+        raise NotImplementedError()
+
+    def get(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(self.get_export_chunks(), content_type='application/gzip')
+        response['Content-Disposition'] = 'attachment; filename="{}"'.format(self.get_export_filename())
+        return response
+
+
+class ExportBase(ExportMixin, View):
+    http_method_names = ['get']
+
+    def get_export_filename(self):
+        return '{}.tar.gz'.format(config.BRANCHES.BASE)
+
+    def get_export_chunks(self):
+        token = self.request.user.token
+        return iter_tarball(token, config.BRANCHES.BASE, get_base_entries(token))
+
+
+class BaseRevisionDetailMixin(ConditionalGetMixin, RevisionDetailMixin, TemplateResponseMixin, ContextMixin):
     template_name = None
     page_type = None
 
@@ -71,6 +322,20 @@ class BaseRevisionDetailMixin(RevisionDetailMixin, TemplateResponseMixin, Contex
 
         return super(BaseRevisionDetailMixin, self).dispatch(*args, **kwargs)
 
+    def get_etag_parts(self):
+        """
+        `updated_at` changes with title, labels, assignees and comments,
+        `head_sha` and `base_sha` with the content of the revision.
+        """
+        revision = self.get_revision()
+        return [
+            self.page_type,
+            revision.updated_at,
+            revision.head_sha,
+            revision.base_sha,
+            revision.tot_comments
+        ]
+
     def get_context_data(self, **kwargs):
         context = super(BaseRevisionDetailMixin, self).get_context_data(**kwargs)
         revision = self.get_revision()
@@ -90,6 +355,39 @@ class Editor(BaseRevisionDetailMixin, View):
         return self.render_to_response(context)
 
 
+class Tree(BaseRevisionDetailMixin, View):
+    """
+    The subfolders of the folder in the `path` GET param, loaded by the editor
+    sidebar when the folder is opened.
+    """
+    http_method_names = ['get']
+    page_type = 'tree'
+
+    def get(self, request, *args, **kwargs):
+        path = request.GET.get('path', '').strip('/')
+        if '..' in path.split('/'):
+            raise Http404('Invalid path {}'.format(path))
+
+        try:
+            nodes = get_tree_nodes(request.user.token, self.get_revision(), path)
+        except NotFoundException as e:
+            raise Http404(e)
+
+        return JsonResponse({
+            'path': path,
+            'folders': [
+                {
+                    'path': node.path,
+                    'title': node.title,
+                    'url': node.get_absolute_url(),
+                    'has_children': node.has_children,
+                    'changed': node.changed,
+                }
+                for node in nodes
+            ]
+        })
+
+
 class EditFile(BaseRevisionDetailMixin, FormMixin, ProcessFormView):
     form_class = ContentForm
     template_name = 'revision/detail-editor.html'
@@ -105,13 +403,43 @@ class EditFile(BaseRevisionDetailMixin, FormMixin, ProcessFormView):
 
         return self._revision_file
 
+    def get_overlaps(self):
+        if not hasattr(self, '_overlaps'):
+            self._overlaps = get_overlaps(self.request.user.token, self.get_revision_file())
+        return self._overlaps
+
+    def get_etag_parts(self):
+        parts = super(EditFile, self).get_etag_parts()
+        parts.append(self.get_overlaps())
+        return parts
+
+    def get_context_data(self, **kwargs):
+        context = super(EditFile, self).get_context_data(**kwargs)
+        context['overlaps'] = self.get_overlaps()
+        return context
+
     def get_form_kwargs(self):
         kwargs = super(EditFile, self).get_form_kwargs()
         kwargs['revision_file'] = self.get_revision_file()
         return kwargs
 
+    def get(self, request, *args, **kwargs):
+        try:
+            return super(EditFile, self).get(request, *args, **kwargs)
+        except FileTooLargeException as e:
+            messages.error(request, str(e))
+            return redirect('revision:editor', revision_id=self.kwargs['revision_id'])
+
     def form_valid(self, form):
-        form.save()
+        try:
+            form.save()
+        except FileTooLargeException as e:
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
+        except ConflictException:
+            form.add_error(None, CONFLICT_MSG)
+            return self.form_invalid(form)
+
         messages.success(self.request, 'File changed.')
         return super(EditFile, self).form_valid(form)
 
@@ -130,6 +458,8 @@ class ChangeState(BaseRevisionDetailMixin, SuccessMessageMixin, FormMixin, Proce
 
     def form_valid(self, form):
         form.save()
+        revision_index.expire()
+        expire_dashboards()
         return super(ChangeState, self).form_valid(form)
 
     def get_success_url(self):
@@ -186,3 +516,77 @@ class Changes(BaseRevisionDetailMixin, View):
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return self.render_to_response(context)
+
+
+class Diff(BaseRevisionDetailMixin, View):
+    """
+    The diff of the revision, loaded by the Changes page.
+
+    It's streamed from GitHub as it's downloaded instead of being built in
+    memory and, as there's no CSRF token in it, it can be compressed.
+    """
+    http_method_names = ['get']
+    page_type = 'diff'
+
+    def get(self, request, *args, **kwargs):
+        return StreamingHttpResponse(
+            self.get_revision().iter_diff(), content_type='text/plain; charset=utf-8'
+        )
+
+
+class RevisionSearch(SearchMixin, BaseRevisionDetailMixin, View):
+    http_method_names = ['get']
+    template_name = 'revision/detail-search.html'
+    page_type = 'search'
+
+    def get_etag_parts(self):
+        # results also depend on the pages of the base branch the revision didn't change
+        search_index.update(self.request.user.token)
+        parts = super(RevisionSearch, self).get_etag_parts()
+        parts.append(search_index.tree_sha)
+        return parts
+
+    def get_results(self):
+        return search(self.request.user.token, self.get_query(), revision=self.get_revision())
+
+    def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        return self.render_to_response(context)
+
+
+class ExportRevision(ExportMixin, BaseRevisionDetailMixin, View):
+    http_method_names = ['get']
+    page_type = 'export'
+
+    def get_export_filename(self):
+        return 'revision-{}.tar.gz'.format(self.get_revision().id)
+
+    def get_export_chunks(self):
+        revision = self.get_revision()
+        return iter_tarball(self.request.user.token, revision.branch_name, revision.get_blob_shas())
+
+
+class ImportRevision(BaseRevisionDetailMixin, FormMixin, ProcessFormView):
+    form_class = ImportForm
+    template_name = 'revision/detail-import.html'
+    page_type = 'import'
+
+    def form_valid(self, form):
+        revision = self.get_revision()
+        try:
+            paths = import_tarball(
+                self.request.user.token, revision.branch_name, revision.get_blob_shas(), form.cleaned_data['tarball'],
+                parent_sha=revision.head_sha
+            )
+        except (InvalidTarballException, FileTooLargeException) as e:
+            form.add_error('tarball', str(e))
+            return self.form_invalid(form)
+        except ConflictException:
+            form.add_error(None, CONFLICT_MSG)
+            return self.form_invalid(form)
+
+        messages.success(self.request, '{} files changed.'.format(len(paths)))
+        return super(ImportRevision, self).form_valid(form)
+
+    def get_success_url(self):
+        return reverse('revision:editor', kwargs={'revision_id': self.get_revision().id})
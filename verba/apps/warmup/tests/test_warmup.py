@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.core.urlresolvers import reverse
+
+from verba_settings import config
+
+from warmup import utils
+
+
+@mock.patch('warmup.utils.RevisionManager')
+@mock.patch('warmup.utils.Branch')
+@mock.patch('warmup.utils.APIRequest')
+class WarmUpTestCase(SimpleTestCase):
+    def setUp(self):
+        super(WarmUpTestCase, self).setUp()
+        utils._ready.clear()
+
+    def test_without_token(self, MockedAPIRequest, MockedBranch, MockedRevisionManager):  # noqa
+        utils.warm_up()
+
+        self.assertTrue(utils.is_ready())
+        self.assertFalse(MockedBranch.called)
+        self.assertFalse(MockedRevisionManager.called)
+
+    @override_settings(VERBA_GITHUB_TOKEN='service-token')
+    def test_prefetch(self, MockedAPIRequest, MockedBranch, MockedRevisionManager):  # noqa
+        revision = mock.MagicMock()
+        MockedRevisionManager().get_all.return_value = [revision]
+
+        utils.warm_up()
+
+        self.assertTrue(utils.is_ready())
+        MockedAPIRequest.assert_called_with('service-token')
+        MockedBranch.assert_called_with('service-token', config.BRANCHES.BASE)
+        MockedBranch().get_git_tree.assert_called_with(config.PATHS.CONTENT_FOLDER, recursive=True)
+        MockedRevisionManager.assert_called_with('service-token')
+
+    @mock.patch.dict(settings.VERBA_CONFIG['CACHE_SNAPSHOT'], {'PATH': '/path/to/snapshot'})
+    @mock.patch('warmup.utils.load_snapshot')
+    def test_load_snapshot(self, mocked_load_snapshot, MockedAPIRequest, MockedBranch, MockedRevisionManager):  # noqa
+        utils.warm_up()
+
+        self.assertTrue(utils.is_ready())
+        self.assertTrue(mocked_load_snapshot.called)
+
+    @override_settings(VERBA_GITHUB_TOKEN='service-token')
+    @mock.patch('warmup.utils.logger')
+    def test_github_errors_dont_stop_warm_up(self, mocked_logger, MockedAPIRequest, MockedBranch, MockedRevisionManager):  # noqa
+        MockedRevisionManager().get_all.side_effect = Exception()
+
+        utils.warm_up()
+
+        self.assertTrue(utils.is_ready())
+        self.assertTrue(mocked_logger.exception.called)
+
+
+class ReadyViewTestCase(SimpleTestCase):
+    def setUp(self):
+        super(ReadyViewTestCase, self).setUp()
+        self.url = reverse('warmup:ready')
+
+    def tearDown(self):
+        super(ReadyViewTestCase, self).tearDown()
+        utils._ready.clear()
+        utils._lazy_warm_up = None
+
+    @mock.patch('warmup.utils.warm_up')
+    def test_not_ready(self, mocked_warm_up):
+        utils._ready.clear()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+
+    def test_warms_up_lazily(self):
+        utils._ready.clear()
+        utils._lazy_warm_up = None
+
+        with mock.patch('warmup.utils.warm_up', side_effect=utils._ready.set) as mocked_warm_up:
+            self.client.get(self.url)
+            utils._lazy_warm_up.join()
+            self.client.get(self.url)
+
+        self.assertEqual(mocked_warm_up.call_count, 1)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_ready(self):
+        utils._ready.set()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,133 @@
+import os
+import time
+import logging
+import threading
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.core.urlresolvers import get_resolver
+from django.template import engines
+from django.utils.module_loading import module_has_submodule
+
+from github import Branch
+from github.api import APIRequest
+from github.snapshot import load_snapshot
+from revision.models import RevisionManager
+
+from verba_settings import config
+
+
+logger = logging.getLogger('warmup')
+
+_ready = threading.Event()
+_lazy_warm_up = None
+_lazy_warm_up_lock = threading.Lock()
+
+
+def is_ready():
+    """
+    Returns True once this process has been warmed up.
+    """
+    return _ready.is_set()
+
+
+def import_apps():
+    """
+    Imports the modules Django only imports on first use.
+    """
+    for app_config in apps.get_app_configs():
+        for module_name in ('views', 'forms', 'urls'):
+            if module_has_submodule(app_config.module, module_name):
+                import_module('{}.{}'.format(app_config.name, module_name))
+
+
+def compile_templates():
+    """
+    Loads every template so that, with the cached loader, they are compiled
+    only once before forking.
+    """
+    for engine in engines.all():
+        for template_dir in engine.template_dirs:
+            for root, _, file_names in os.walk(template_dir):
+                for file_name in file_names:
+                    template_name = os.path.relpath(os.path.join(root, file_name), template_dir)
+                    try:
+                        engine.get_template(template_name)
+                    except Exception:
+                        logger.exception('Could not compile template {}'.format(template_name))
+
+
+def populate_urls():
+    """
+    Populates the URL resolvers which are otherwise built by the first request.
+    """
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for _, namespace_resolver in resolver.namespace_dict.values():
+        namespace_resolver.reverse_dict
+
+
+def open_connections(token):
+    """
+    Opens a pooled connection to the GitHub API.
+    `rate_limit` is used as it doesn't count against the rate limit.
+    """
+    APIRequest(token).set_url('rate_limit').get()
+
+
+def prefetch(token):
+    """
+    Fetches the base branch tree and the open revisions so that the response
+    cache only needs to revalidate them. If loaded from a snapshot, they are
+    revalidated with conditional requests which don't count against the
+    rate limit.
+    """
+    Branch(token, config.BRANCHES.BASE).get_git_tree(config.PATHS.CONTENT_FOLDER, recursive=True)
+
+    for revision in RevisionManager(token).get_all():
+        revision.assignees  # fetches the issue
+
+
+def warm_up():
+    """
+    Does up front everything the first requests would otherwise pay for and
+    marks the process as ready.
+
+    The GitHub caches are reloaded from the last snapshot if there is one.
+    Talking to GitHub requires `settings.VERBA_GITHUB_TOKEN` and any error
+    there is only logged as a cold cache is better than a process that
+    doesn't start.
+    """
+    start = time.time()
+
+    import_apps()
+    compile_templates()
+    populate_urls()
+
+    if config.CACHE_SNAPSHOT.PATH:
+        load_snapshot()
+
+    token = getattr(settings, 'VERBA_GITHUB_TOKEN', None)
+    if token:
+        try:
+            open_connections(token)
+            prefetch(token)
+        except Exception:
+            logger.exception('Could not prefetch data from GitHub')
+
+    _ready.set()
+    logger.info('Warmed up in {:.1f}s'.format(time.time() - start))
+
+
+def warm_up_lazily():
+    """
+    Starts warming up this process in the background if it hasn't been
+    warmed up yet, e.g. when not run through gunicorn's `on_starting` hook
+    but by `runserver` or another WSGI server.
+    """
+    global _lazy_warm_up
+    with _lazy_warm_up_lock:
+        if _lazy_warm_up is None and not is_ready():
+            _lazy_warm_up = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+            _lazy_warm_up.start()
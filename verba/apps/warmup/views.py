@@ -0,0 +1,18 @@
+from django.http import HttpResponse
+from django.views.generic.base import View
+
+from .utils import is_ready, warm_up_lazily
+
+
+class ReadyView(View):
+    """
+    Readiness probe: 503 until this process has been warmed up.
+
+    Processes not warmed up before serving, i.e. not started by gunicorn
+    with gunicorn.conf.py, start warming up on the first probe.
+    """
+    def get(self, request, *args, **kwargs):
+        if not is_ready():
+            warm_up_lazily()
+            return HttpResponse('Warming up', status=503)
+        return HttpResponse('Ready')
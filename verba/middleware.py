@@ -0,0 +1,33 @@
+import re
+
+from django.middleware.gzip import GZipMiddleware as DjangoGZipMiddleware
+
+
+# exports are already compressed and images and fonts don't compress
+re_compressible = re.compile(r'^(text/|application/json|application/javascript|image/svg\+xml)')
+
+
+class GZipMiddleware(DjangoGZipMiddleware):
+    """
+    Compresses responses, streamed ones included, unless they contain a CSRF
+    token as compressing secrets together with content an attacker can
+    influence exposes them to BREACH.
+
+    Pages with forms are left as they are while the API, the diffs and
+    the search results are compressed.
+
+    The ETag of compressed responses is made weak instead of being changed
+    so that conditional requests still match the ETag of the view.
+    """
+    def process_response(self, request, response):
+        # set by `get_token` when a CSRF token is rendered
+        if request.META.get('CSRF_COOKIE_USED'):
+            return response
+        if not re_compressible.match(response.get('Content-Type', '')):
+            return response
+
+        etag = response.get('ETag')
+        response = super(GZipMiddleware, self).process_response(request, response)
+        if etag and response.get('Content-Encoding') == 'gzip':
+            response['ETag'] = etag if etag.startswith('W/') else 'W/{}'.format(etag)
+        return response
@@ -30,13 +30,16 @@ INSTALLED_APPS = [
 PROJECT_APPS = [
     'auth',
     'revision',
+    'warmup',
+    'api',
 ]
 
 INSTALLED_APPS += PROJECT_APPS
 
-MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 
 MIDDLEWARE_CLASSES = [
+    'verba.middleware.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +58,14 @@ WSGI_APPLICATION = 'verba.wsgi.application'
 
 DATABASES = {}
 
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Internationalization
 
 LANGUAGE_CODE = 'en-gb'
@@ -123,6 +134,9 @@ VERBA_CONFIG = {
     'GITHUB_AUTH': {
         'CLIENT_ID': None,
         'CLIENT_SECRET': None,
+        # seconds a user is trusted to be able to read the repo when reading it
+        # with the service token, settings.VERBA_GITHUB_TOKEN
+        'ACCESS_CACHE_TIMEOUT': 300,
     },
     'PATHS': {
         'CONTENT_FOLDER': 'pages/',  # path to folder containing the content files
@@ -147,11 +161,71 @@ VERBA_CONFIG = {
         'WRITERS': [],
         'DEVELOPERS': []
     },
+    'FILES': {
+        'LARGE_SIZE': 1024 * 1024,  # files bigger than this (in bytes) go through the git data API
+        'MAX_SIZE': 10 * 1024 * 1024,  # files bigger than this (in bytes) can't be read or saved
+    },
+    'IMPORT': {
+        # imported tarballs over these limits are rejected as they are read
+        'MAX_MEMBERS': 5000,  # files and folders
+        'MAX_SIZE': 100 * 1024 * 1024,  # total uncompressed size (in bytes) of the files
+    },
+    'CONCURRENCY': {
+        # max number of concurrent GitHub requests per process for each task
+        'INCLUDES': 5,  # fetching the files included by manifests
+        'SEARCH': 5,  # fetching the pages to add to the search index
+        'OVERLAP': 5,  # fetching the files changed by the open revisions
+        'BULK': 3,  # changing or creating revisions in bulk
+        'EXPORT': 5,  # reading files to export and creating blobs of imported ones
+        'REVISION_INDEX': 5,  # fetching the labels and assignees of the updated revisions
+        'TREE': 5,  # fetching the subfolders of the folders opened in the editor sidebar
+    },
+    'SEARCH': {
+        'REFRESH_INTERVAL': 60,  # min seconds between checks of the base branch for changes to index
+        'MAX_RESULTS': 50,
+    },
+    'OVERLAP': {
+        'REFRESH_INTERVAL': 30,  # min seconds between checks of the open revisions for changed files
+    },
+    'EVENTS': {
+        # poll the repo events in the background instead of checking GitHub
+        # on requests, for when GitHub webhooks can't reach Verba
+        'POLL': False,
+        'MIN_POLL_INTERVAL': 60,  # seconds, GitHub can ask for longer with X-Poll-Interval
+        # folder of the lock of the one process polling and of the leases it shares
+        # with the other processes, verba-events in the temp folder by default
+        'STATE_PATH': None,
+    },
+    'CACHE_SNAPSHOT': {
+        # file the GitHub caches are saved to and reloaded from when the
+        # process starts so that it doesn't start cold, None to disable
+        'PATH': None,
+        'INTERVAL': 300,  # seconds between snapshots, only taken if the caches have changed
+    },
+    'API': {
+        'PAGE_SIZE': 50,
+        'MAX_PAGE_SIZE': 100,
+        'TOKEN_CACHE_TIMEOUT': 300,  # seconds the user of a token sent by a script is cached
+    },
+    'DASHBOARD': {
+        'CACHE_TIMEOUT': 30,  # seconds the revisions assigned to a user are cached before checking GitHub again
+    },
+    'REVISION_INDEX': {
+        # SQLite database of the revision list, ':memory:' keeps one per process
+        'DATABASE': ':memory:',
+        'REFRESH_INTERVAL': 30,  # min seconds between checks of the open revisions for updates
+        'PAGE_SIZE': 25,
+    },
 }
 
 AUTH_USER_MODEL = 'auth.models.VerbaUser'
 LOGIN_URL = 'auth:login'
-SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+# sessions are files shared by the workers of a host, in /dev/shm/verba-sessions by default.
+# /dev/shm is emptied on every restart and deploy of e.g. Heroku dynos, logging everybody
+# out, and deployments running several hosts need SESSION_FILE_PATH set to a shared
+# persistent folder or sticky sessions.
+SESSION_ENGINE = 'auth.sessions'
+SESSION_FILE_PATH = os.environ.get('SESSION_FILE_PATH')
 AUTHENTICATION_BACKENDS = (
     'auth.backends.VerbaBackend',
 )
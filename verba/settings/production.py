@@ -5,6 +5,15 @@ import os
 DEBUG = False
 TEMPLATES[0]['OPTIONS']['debug'] = DEBUG
 
+# compile each template only once per process
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
 SECRET_KEY = os.environ["SECRET_KEY"]
 
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost').split(',')
@@ -16,6 +25,7 @@ ADMINS = (
 MANAGERS = ADMINS
 
 MIDDLEWARE_CLASSES = [
+    'verba.middleware.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -26,9 +36,15 @@ MIDDLEWARE_CLASSES = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# hashed file names and precompressed (gzip and brotli) files served by
+# whitenoise with far-future immutable cache headers
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
 VERBA_GITHUB_TOKEN = os.environ["VERBA_GITHUB_TOKEN"]
 VERBA_CONFIG['REPO'] = os.environ["VERBA_REPO"]
 VERBA_CONFIG['REVIEW_GITHUB_USERS'] = os.environ["VERBA_REVIEW_GITHUB_USERS"]
+VERBA_CONFIG['CACHE_SNAPSHOT']['PATH'] = os.environ.get('VERBA_CACHE_SNAPSHOT_PATH')
+VERBA_CONFIG['EVENTS']['POLL'] = os.environ.get('VERBA_POLL_EVENTS', '').lower() in ('1', 'true')
 VERBA_CONFIG['PREVIEW']['URL_GENERATOR'] = \
     lambda rev: os.environ["VERBA_REVIEW_URL_GENERATOR"].format(rev._pull.issue_nr)
 
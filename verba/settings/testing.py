@@ -1,4 +1,6 @@
 from .base import *  # noqa
+import os
+import tempfile
 
 
 VERBA_CONFIG.update({
@@ -11,3 +13,5 @@ VERBA_CONFIG['ASSIGNEES'] = {
     'WRITERS': ['test-owner', 'test-owner-2'],
     'DEVELOPERS': ['test-developer']
 }
+
+SESSION_FILE_PATH = os.path.join(tempfile.gettempdir(), 'verba-test-sessions')
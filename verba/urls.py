@@ -3,7 +3,9 @@ from django.conf.urls import url, include
 
 
 urlpatterns = [
-    url(r'^$', RedirectView.as_view(url='/revision/', permanent=False), name='index'),
+    url(r'^$', RedirectView.as_view(pattern_name='revision:assigned', permanent=False), name='index'),
     url(r'^revision/', include('revision.urls', namespace='revision')),
     url(r'^auth/', include('auth.urls', namespace='auth')),
+    url(r'^ready/', include('warmup.urls', namespace='warmup')),
+    url(r'^api/v1/', include('api.urls', namespace='api')),
 ]